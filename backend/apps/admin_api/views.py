@@ -4,9 +4,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from apps.tenancy.models import Tenant
+from apps.tenancy.registry import invalidate_tenant
 from apps.iam.models import User
 from apps.iam.permissions import IsPlatformSuperAdmin, IsTenantAdmin
 from apps.providers.models import Provider
+from apps.providers.registry import invalidate_provider
 from apps.pricing.models import PricingRule
 
 from .serializers import (
@@ -40,6 +42,9 @@ class TenantListCreateView(generics.ListCreateAPIView):
                 role="TENANT_OWNER",
                 is_active=True,
             )
+        # The slug / id may be cached as "not found" from before it existed.
+        # On commit, so no lookup can cache the miss again in between.
+        transaction.on_commit(lambda: invalidate_tenant(tenant))
         return tenant
 
 
@@ -49,6 +54,11 @@ class TenantDetailView(generics.RetrieveUpdateAPIView):
     lookup_url_kwarg = "tenant_id"
     queryset = Tenant.objects.all()
 
+    def perform_update(self, serializer):
+        previous_slug = serializer.instance.slug
+        tenant = serializer.save()
+        invalidate_tenant(tenant, previous_slug=previous_slug)
+
 
 class TenantStatusUpdateView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated, IsPlatformSuperAdmin]
@@ -72,6 +82,7 @@ class TenantStatusUpdateView(generics.GenericAPIView):
 
         tenant.status = new_status
         tenant.save(update_fields=["status", "updated_at"])
+        invalidate_tenant(tenant)
 
         # You can hook audit logging here (reason, notes).
         return Response(
@@ -151,6 +162,10 @@ class ProviderDetailView(generics.RetrieveUpdateAPIView):
             qs = qs.filter(tenant=tenant)
         return qs
 
+    def perform_update(self, serializer):
+        provider = serializer.save()
+        invalidate_provider(provider)
+
 
 class PricingRuleListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated, IsTenantAdmin]
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.bookings.services import confirm_booking_and_issue_tickets, create_booking
+from apps.catalog.models import Trip
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Count queries and time create_booking + ticket issuance for bookings of "
+        "different sizes on --trip. Every run is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trip", required=True)
+        parser.add_argument("--sizes", default="1,10,50", help="Comma-separated passenger counts.")
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--with-seats", action="store_true", help="Also pick a seat per passenger.")
+
+    def handle(self, *args, **options):
+        trip = Trip.objects.select_related("tenant").get(id=options["trip"])
+        sizes = [int(size) for size in options["sizes"].split(",")]
+
+        for size in sizes:
+            passengers = [{"type": "ADULT", "first_name": "Bench", "last_name": f"P{i}"} for i in range(size)]
+            seat_selection = (
+                {"enabled": True, "requested_seats": [str(i) for i in range(1, size + 1)]}
+                if options["with_seats"]
+                else {}
+            )
+            timings, queries = [], 0
+            for _ in range(options["runs"]):
+                try:
+                    with transaction.atomic():
+                        # Room for the booking whatever the trip's real state is.
+                        Trip.objects.filter(id=trip.id).update(available_seats=size, vehicle_capacity=size)
+                        trip.vehicle_capacity = size
+                        with CaptureQueriesContext(connection) as captured:
+                            started = time.perf_counter()
+                            booking, _ = create_booking(trip.tenant, None, trip.id, passengers, seat_selection, {})
+                            confirm_booking_and_issue_tickets(booking)
+                            timings.append(time.perf_counter() - started)
+                        queries = len(captured.captured_queries)
+                        raise _Rollback
+                except _Rollback:
+                    pass
+
+            timings.sort()
+            self.stdout.write(
+                f"passengers={size:>3} queries={queries:>3} "
+                f"median={timings[len(timings) // 2] * 1000:.1f}ms best={timings[0] * 1000:.1f}ms"
+            )
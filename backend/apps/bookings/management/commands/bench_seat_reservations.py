@@ -0,0 +1,87 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from apps.bookings.models import Booking
+from apps.bookings.services import SEAT_HOLDING_STATUSES, create_booking
+from apps.catalog.models import Trip
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent bookings at one trip and check throughput and that it "
+        "is never oversold. Works on a throwaway copy of --trip, deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trip", required=True, help="Trip id to copy (route, provider, pricing).")
+        parser.add_argument("--capacity", type=int, default=200)
+        parser.add_argument("--bookings", type=int, default=400)
+        parser.add_argument("--passengers", type=int, default=1, help="Passengers per booking.")
+        parser.add_argument("--workers", type=int, default=32)
+        parser.add_argument("--keep", action="store_true", help="Keep the copied trip and its bookings.")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            raise CommandError("Needs a database with concurrent writers (PostgreSQL).")
+
+        trip = Trip.objects.select_related("tenant").get(id=options["trip"])
+        tenant = trip.tenant
+        trip.pk = None
+        trip.external_id = f"bench-{int(time.time())}"
+        trip.vehicle_capacity = options["capacity"]
+        trip.available_seats = options["capacity"]
+        trip.save(force_insert=True)
+
+        passengers = [
+            {"type": "ADULT", "first_name": "Bench", "last_name": f"P{i}"} for i in range(options["passengers"])
+        ]
+        outcomes = {"ok": 0, "sold_out": 0, "error": 0}
+        lock = threading.Lock()
+
+        def book(_):
+            try:
+                create_booking(tenant, None, trip.id, passengers, {}, {})
+                key = "ok"
+            except ValidationError:
+                key = "sold_out"
+            except Exception:
+                key = "error"
+            finally:
+                connection.close()
+            with lock:
+                outcomes[key] += 1
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                list(pool.map(book, range(options["bookings"])))
+            elapsed = time.perf_counter() - started
+
+            trip.refresh_from_db()
+            held = (
+                Booking.objects.filter(trip=trip, status__in=SEAT_HOLDING_STATUSES).aggregate(
+                    seats=Sum("seats_count")
+                )["seats"]
+                or 0
+            )
+
+            self.stdout.write(
+                f"bookings={options['bookings']} workers={options['workers']} elapsed={elapsed:.2f}s "
+                f"rate={options['bookings'] / elapsed:,.0f} bookings/s"
+            )
+            self.stdout.write(
+                f"ok={outcomes['ok']} sold_out={outcomes['sold_out']} error={outcomes['error']} "
+                f"held={held} capacity={options['capacity']} available_seats={trip.available_seats}"
+            )
+            if held > options["capacity"] or held + trip.available_seats != options["capacity"]:
+                raise CommandError("Seat counter inconsistent: trip oversold or seats leaked.")
+            self.stdout.write(self.style.SUCCESS("No oversell."))
+        finally:
+            if not options["keep"]:
+                trip.delete()
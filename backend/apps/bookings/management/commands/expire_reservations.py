@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.bookings.services import expire_due_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire PENDING_PAYMENT bookings past reservation_expires_at in batches, "
+        "returning their seats and emitting booking.expired. Safe to run several "
+        "copies at once. Use --loop to keep sweeping."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep running, sleeping --interval when idle.")
+        parser.add_argument("--interval", type=float, default=None, help="Seconds to sleep when nothing is due.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"] or getattr(settings, "BOOKING_EXPIRY_BATCH_SIZE", 1000)
+        interval = options["interval"]
+        if interval is None:
+            interval = getattr(settings, "BOOKING_EXPIRY_INTERVAL_SECONDS", 5)
+
+        while True:
+            started = time.monotonic()
+            total = 0
+            # Drain the backlog batch by batch; each batch is its own transaction.
+            while True:
+                expired = expire_due_bookings(batch_size)
+                total += expired
+                if expired < batch_size:
+                    break
+
+            if total:
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"Expired {total} bookings in {elapsed:.2f}s.")
+
+            if not options["loop"]:
+                return
+            close_old_connections()
+            time.sleep(interval)
@@ -8,6 +8,9 @@ from apps.catalog.models import Trip
 from apps.iam.models import User
 
 
+# Bookings in these statuses hold seats on Trip.available_seats.
+SEAT_HOLDING_STATUSES = ("PENDING_PAYMENT", "CONFIRMED")
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ("PENDING_PAYMENT", "Pending payment"),
@@ -44,6 +47,12 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=["tenant", "provider", "trip"]),
             models.Index(fields=["tenant", "status"]),
+            # Only pending bookings can expire; keeps the sweeper's scan tiny.
+            models.Index(
+                fields=["reservation_expires_at"],
+                name="booking_pending_expiry_idx",
+                condition=models.Q(status="PENDING_PAYMENT"),
+            ),
         ]
 
     def __str__(self) -> str:
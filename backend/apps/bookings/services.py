@@ -1,5 +1,5 @@
-backend/apps/bookings/services.py
 import uuid
+from collections import defaultdict
 from datetime import timedelta
 from typing import List, Dict
 
@@ -8,12 +8,43 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 from apps.catalog.models import Trip, RouteStop
+from apps.catalog.services import (
+    claim_seats,
+    release_seat_labels,
+    release_seats,
+    release_seats_by_trip,
+    reserve_seats,
+)
 from apps.pricing.services import calculate_fare_for_trip_from_route
 from apps.tenancy.models import Tenant
 from apps.providers.models import Provider
 from apps.iam.models import User
-from .models import Booking, BookingPassenger, BookingSeat, Ticket
-from apps.notifications.services import enqueue_event
+from .models import SEAT_HOLDING_STATUSES, Booking, BookingPassenger, BookingSeat, Ticket
+from apps.notifications.services import enqueue_event, enqueue_events
+
+
+def _transition(booking: Booking, from_statuses, to_status: str) -> bool:
+    """
+    Move booking to to_status only if it is still in one of from_statuses.
+    The conditional UPDATE makes seat releases happen exactly once even when
+    cancel, expiry and payment callbacks race.
+    """
+    now = timezone.now()
+    changed = Booking.objects.filter(id=booking.id, status__in=from_statuses).update(
+        status=to_status, updated_at=now
+    )
+    if changed:
+        booking.status = to_status
+        booking.updated_at = now
+    return bool(changed)
+
+
+def _release_booking_seats(booking: Booking) -> None:
+    """
+    Give a booking's seats back to the trip counter and its seat map.
+    """
+    release_seats(booking.trip_id, booking.seats_count, tenant_id=booking.tenant_id)
+    release_seat_labels(booking.trip_id, booking.seats.values_list("seat_number", flat=True))
 
 
 @transaction.atomic
@@ -29,25 +60,14 @@ def create_booking(
     Create booking + passengers + seats + compute price.
     Returns (booking, per_passenger_amount).
     """
-    # Lock trip row for capacity-safe booking
-    trip = (
-        Trip.objects.select_for_update()
-        .select_related("provider", "tenant", "route")
-        .get(id=trip_id, tenant=tenant)
-    )
+    # No row locks: seats are taken with one conditional UPDATE further down.
+    trip = Trip.objects.select_related("provider", "tenant", "route").get(id=trip_id, tenant=tenant)
 
     provider: Provider = trip.provider
 
-    # Capacity check – count active seats
-    active_bookings = Booking.objects.select_for_update().filter(
-        trip=trip, status__in=["PENDING_PAYMENT", "CONFIRMED"]
-    )
-    existing_seats = (
-        BookingPassenger.objects.filter(booking__in=active_bookings).count()
-    )
-
+    # Cheap early exit on a sold-out trip (the authoritative check is reserve_seats).
     new_seats = len(passengers_payload)
-    if trip.vehicle_capacity and existing_seats + new_seats > trip.vehicle_capacity:
+    if trip.vehicle_capacity and trip.available_seats < new_seats:
         raise ValidationError("Not enough seats available for this trip.")
 
     # Compute per-passenger fare from route
@@ -75,10 +95,11 @@ def create_booking(
         },
     )
 
-    passenger_objs = []
-    for p in passengers_payload:
-        passenger_objs.append(
-            BookingPassenger.objects.create(
+    # Client-side UUIDs let passengers and seats go in one INSERT each.
+    passenger_objs = BookingPassenger.objects.bulk_create(
+        [
+            BookingPassenger(
+                id=uuid.uuid4(),
                 booking=booking,
                 passenger_type=p["type"],
                 first_name=p["first_name"],
@@ -86,18 +107,31 @@ def create_booking(
                 email=p.get("email", ""),
                 phone=p.get("phone", ""),
             )
-        )
+            for p in passengers_payload
+        ]
+    )
 
-    # simple seat allocation: map requested seats in order
+    # Seat selection: claim the requested seats on the trip's seat map
+    # (atomic check-and-set; untracked labels pass through, see
+    # claim_seats), then map them to passengers in order.
     seat_req = (seat_selection or {}).get("requested_seats", [])
     if (seat_selection or {}).get("enabled") and seat_req:
-        for idx, passenger in enumerate(passenger_objs):
-            seat_num = seat_req[idx] if idx < len(seat_req) else ""
-            BookingSeat.objects.create(
-                booking=booking,
-                passenger=passenger,
-                seat_number=seat_num,
-            )
+        seat_req = claim_seats(trip, seat_req[:new_seats])
+        BookingSeat.objects.bulk_create(
+            [
+                BookingSeat(
+                    id=uuid.uuid4(),
+                    booking=booking,
+                    passenger=passenger,
+                    seat_number=seat_req[idx] if idx < len(seat_req) else "",
+                )
+                for idx, passenger in enumerate(passenger_objs)
+            ]
+        )
+
+    # Take the seats last, so the trip row's write lock is held only until
+    # commit; failure rolls the booking back.
+    reserve_seats(trip, new_seats)
 
     # Fire booking.created event
     enqueue_event(
@@ -128,12 +162,10 @@ def confirm_booking_and_issue_tickets(booking: Booking):
         # Already confirmed, ensure tickets exist
         if booking.tickets.exists():
             return booking
-    elif booking.status != "PENDING_PAYMENT":
+    elif not _transition(booking, ["PENDING_PAYMENT"], "CONFIRMED"):
+        # e.g. expired (seats already released) before the payment landed
         raise ValidationError("Booking cannot be confirmed from its current status.")
 
-    booking.status = "CONFIRMED"
-    booking.save(update_fields=["status", "updated_at"])
-
     if not booking.tickets.exists():
         from apps.catalog.models import Trip
 
@@ -145,21 +177,24 @@ def confirm_booking_and_issue_tickets(booking: Booking):
             timezone.datetime.combine(trip.service_date, trip.arrival_time)
         )
 
-        issued_ticket_ids = []
-        for passenger in booking.passengers.all():
+        tickets = []
+        for passenger_id in booking.passengers.values_list("id", flat=True):
             ticket_code = f"TKT-{booking.id.hex[:8]}-{uuid.uuid4().hex[:6]}".upper()
-            qr_payload = f"{ticket_code}|booking={booking.id}|passenger={passenger.id}"
-            ticket = Ticket.objects.create(
-                tenant=booking.tenant,
-                provider=booking.provider,
-                booking=booking,
-                passenger=passenger,
-                ticket_code=ticket_code,
-                qr_payload=qr_payload,
-                valid_from=valid_from,
-                valid_until=valid_until,
+            tickets.append(
+                Ticket(
+                    id=uuid.uuid4(),
+                    tenant_id=booking.tenant_id,
+                    provider_id=booking.provider_id,
+                    booking=booking,
+                    passenger_id=passenger_id,
+                    ticket_code=ticket_code,
+                    qr_payload=f"{ticket_code}|booking={booking.id}|passenger={passenger_id}",
+                    valid_from=valid_from,
+                    valid_until=valid_until,
+                )
             )
-            issued_ticket_ids.append(str(ticket.id))
+        Ticket.objects.bulk_create(tickets)
+        issued_ticket_ids = [str(ticket.id) for ticket in tickets]
 
         # Fire ticket.issued event
         enqueue_event(
@@ -187,12 +222,10 @@ def cancel_booking(booking: Booking, reason: str = "") -> Dict:
       - set status to CANCELLED
       - return simple refund info stub (you'll wire real policy later)
     """
-    if booking.status not in ["PENDING_PAYMENT", "CONFIRMED"]:
-        raise ValidationError("Booking cannot be cancelled in its current status.")
-
     previous_status = booking.status
-    booking.status = "CANCELLED"
-    booking.save(update_fields=["status", "updated_at"])
+    if not _transition(booking, SEAT_HOLDING_STATUSES, "CANCELLED"):
+        raise ValidationError("Booking cannot be cancelled in its current status.")
+    _release_booking_seats(booking)
 
     # simple example: 100% refund if still pending payment, 0% if confirmed (you'll refine)
     refund_amount = 0
@@ -226,3 +259,84 @@ def cancel_booking(booking: Booking, reason: str = "") -> Dict:
         },
         "reason": reason,
     }
+
+
+@transaction.atomic
+def mark_booking_payment_failed(booking: Booking) -> Booking:
+    """
+    PENDING_PAYMENT -> PAYMENT_FAILED, giving the held seats back.
+    """
+    if _transition(booking, ["PENDING_PAYMENT"], "PAYMENT_FAILED"):
+        _release_booking_seats(booking)
+    return booking
+
+
+@transaction.atomic
+def expire_booking(booking: Booking) -> bool:
+    """
+    PENDING_PAYMENT -> EXPIRED once reservation_expires_at has passed,
+    giving the held seats back. Returns True if the booking was expired.
+    """
+    if booking.reservation_expires_at is None or booking.reservation_expires_at > timezone.now():
+        return False
+    if not _transition(booking, ["PENDING_PAYMENT"], "EXPIRED"):
+        return False
+    _release_booking_seats(booking)
+    enqueue_event(tenant=booking.tenant, event_type="booking.expired", payload=_expired_payload(booking))
+    return True
+
+
+def _expired_payload(booking) -> Dict:
+    return {
+        "booking_id": str(booking.id),
+        "tenant_id": str(booking.tenant_id),
+        "provider_id": str(booking.provider_id),
+        "trip_id": str(booking.trip_id),
+        "seats_count": booking.seats_count,
+    }
+
+
+@transaction.atomic
+def expire_due_bookings(limit: int, now=None) -> int:
+    """
+    Expire up to `limit` PENDING_PAYMENT bookings whose reservation has
+    passed, oldest first, in a handful of statements: rows are claimed with
+    SKIP LOCKED (concurrent sweepers and payment callbacks do not block each
+    other), flipped to EXPIRED in one UPDATE, and their seats are returned
+    per trip. Returns the number expired.
+    """
+    now = now or timezone.now()
+    due = list(
+        Booking.objects.select_for_update(skip_locked=True)
+        .filter(status="PENDING_PAYMENT", reservation_expires_at__lte=now)
+        .order_by("reservation_expires_at")
+        .only("id", "tenant_id", "provider_id", "trip_id", "seats_count")[:limit]
+    )
+    if not due:
+        return 0
+
+    # The rows are locked by us, so none can leave PENDING_PAYMENT meanwhile.
+    Booking.objects.filter(id__in=[b.id for b in due]).update(status="EXPIRED", updated_at=now)
+
+    seats_by_trip = defaultdict(int)
+    for booking in due:
+        seats_by_trip[booking.trip_id] += booking.seats_count
+    release_seats_by_trip(seats_by_trip, tenant_ids=[b.tenant_id for b in due])
+
+    labels_by_trip = defaultdict(list)
+    for trip_id, label in (
+        BookingSeat.objects.filter(booking__in=due)
+        .exclude(seat_number="")
+        .values_list("booking__trip_id", "seat_number")
+    ):
+        labels_by_trip[trip_id].append(label)
+    for trip_id, labels in labels_by_trip.items():
+        release_seat_labels(trip_id, labels)
+
+    enqueue_events(
+        [
+            {"tenant_id": b.tenant_id, "event_type": "booking.expired", "payload": _expired_payload(b)}
+            for b in due
+        ]
+    )
+    return len(due)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.catalog.models import Trip, TripSeatMap
+from apps.catalog.services import claim_seats, reserve_seats
+from apps.catalog.tests import make_trip
+
+from .models import Booking, BookingPassenger, BookingSeat
+from .services import cancel_booking, expire_booking, expire_due_bookings
+
+
+class SeatReleaseTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(capacity=4)
+
+    def book(self, labels, expires_in=timedelta(minutes=15)) -> Booking:
+        """
+        A PENDING_PAYMENT booking holding the given seats, as create_booking
+        leaves it.
+        """
+        booking = Booking.objects.create(
+            tenant=self.trip.tenant,
+            provider=self.trip.provider,
+            trip=self.trip,
+            status="PENDING_PAYMENT",
+            reservation_expires_at=timezone.now() + expires_in,
+            seats_count=len(labels),
+        )
+        claim_seats(self.trip, labels)
+        for label in labels:
+            passenger = BookingPassenger.objects.create(booking=booking, first_name="Ada", last_name="Obi")
+            BookingSeat.objects.create(booking=booking, passenger=passenger, seat_number=label)
+        reserve_seats(self.trip, len(labels))
+        return booking
+
+    def assertSeats(self, available: int, states: str):
+        self.assertEqual(Trip.objects.get(pk=self.trip.pk).available_seats, available)
+        self.assertEqual(TripSeatMap.objects.get(trip=self.trip).states, states)
+
+    def test_cancel_releases_seats_once(self):
+        booking = self.book(["1", "2"])
+        self.assertSeats(2, "1100")
+
+        cancel_booking(booking)
+        self.assertSeats(4, "0000")
+
+        with self.assertRaises(ValidationError):
+            cancel_booking(Booking.objects.get(pk=booking.pk))
+        self.assertSeats(4, "0000")
+
+    def test_expire_booking_releases_seats(self):
+        booking = self.book(["3"], expires_in=timedelta(minutes=-1))
+
+        self.assertTrue(expire_booking(booking))
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, "EXPIRED")
+        self.assertSeats(4, "0000")
+
+        self.assertFalse(expire_booking(booking))
+        self.assertSeats(4, "0000")
+
+    def test_expire_booking_waits_for_the_deadline(self):
+        booking = self.book(["3"])
+
+        self.assertFalse(expire_booking(booking))
+        self.assertSeats(3, "0010")
+
+    def test_sweeper_releases_only_due_bookings(self):
+        due = self.book(["1", "2"], expires_in=timedelta(minutes=-5))
+        live = self.book(["4"])
+
+        self.assertEqual(expire_due_bookings(limit=10), 1)
+
+        self.assertEqual(Booking.objects.get(pk=due.pk).status, "EXPIRED")
+        self.assertEqual(Booking.objects.get(pk=live.pk).status, "PENDING_PAYMENT")
+        self.assertSeats(3, "0001")
+        self.assertEqual(expire_due_bookings(limit=10), 0)
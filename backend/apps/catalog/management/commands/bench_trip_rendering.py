@@ -0,0 +1,132 @@
+import time
+import uuid
+from datetime import date, time as dtime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from apps.catalog.models import City, Route, Stop, Trip
+from apps.providers.models import Provider
+from apps.trip_planning.rendering import encode_json, render_search_rows
+from apps.trip_planning.serializers import TripResultSerializer
+from apps.trip_planning.services import TripSearchResult
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark trip search rendering: serializer + JSONRenderer "
+        "versus the pre-rendered fast path. Uses unsaved objects (no database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        repeat = options["repeat"]
+        items = self._items(rows)
+
+        legacy_body = self._legacy(items)
+        fast_body = encode_json(render_search_rows(items))
+        if legacy_body != fast_body:
+            raise CommandError("Fast path output differs from the serializer output.")
+
+        legacy = self._time(lambda: self._legacy(items), repeat)
+        fast = self._time(lambda: encode_json(render_search_rows(items)), repeat)
+
+        self.stdout.write(f"rows={rows} repeat={repeat} bytes={len(fast_body)} (identical)")
+        self.stdout.write(f"serializer: {legacy * 1e6 / rows:8.1f} us/row")
+        self.stdout.write(f"fast path:  {fast * 1e6 / rows:8.1f} us/row")
+        self.stdout.write(f"speedup:    {legacy / fast:8.2f}x")
+
+    def _legacy(self, items) -> bytes:
+        data = TripResultSerializer([self._legacy_row(item) for item in items], many=True).data
+        return JSONRenderer().render(data)
+
+    def _legacy_row(self, item) -> dict:
+        # The dict TripSearchView used to hand to TripResultSerializer.
+        trip = item.trip
+        route = trip.route
+        origin = item.origin
+        destination = item.destination
+        provider = trip.provider
+        return {
+            "trip_id": str(trip.id),
+            "provider": {
+                "id": provider.code,
+                "name": provider.name,
+                "logo_url": getattr(provider, "logo_url", "") or "",
+            },
+            "mode": route.mode,
+            "product_type": route.product_type,
+            "origin": {
+                "stop_id": origin.code,
+                "name": origin.name,
+                "city_code": origin.city.code if origin.city else "",
+            },
+            "destination": {
+                "stop_id": destination.code,
+                "name": destination.name,
+                "city_code": destination.city.code if destination.city else "",
+            },
+            "departure_time": trip.departure_datetime,
+            "arrival_time": trip.arrival_datetime,
+            "duration_minutes": trip.duration_minutes,
+            "available_seats": trip.available_seats,
+            "price": {
+                "currency": trip.currency,
+                "total": item.total_price,
+                "per_passenger": item.per_passenger_price,
+                "fees_included": True,
+            },
+            "constraints": {
+                "refundable": True,
+                "changeable": True,
+                "baggage_included": True,
+                "checkin_required": False,
+            },
+            "tags": [],
+            "preview": {
+                "vehicle_type": trip.vehicle_type or "",
+                "route_label": f"{origin.name} → {destination.name}",
+                "badge": "",
+                "primary_color": "",
+            },
+        }
+
+    def _items(self, count: int):
+        provider = Provider(id=uuid.uuid4(), name="Bench Lines")
+        provider.code = "BENCH"
+        city = City(id=uuid.uuid4(), name="Lagos", code="LOS")
+        origin = Stop(id=uuid.uuid4(), code="LOS-01", name="Lagos Central", city=city)
+        destination = Stop(id=uuid.uuid4(), code="IBD-01", name="Ibadan Terminal", city=None)
+        route = Route(id=uuid.uuid4(), mode="BUS", product_type="INTERCITY", origin=origin, destination=destination)
+
+        items = []
+        for i in range(count):
+            trip = Trip(
+                id=uuid.uuid4(),
+                route=route,
+                provider=provider,
+                service_date=date(2026, 3, 1),
+                departure_time=dtime(6 + i % 12, i % 60),
+                arrival_time=dtime(9 + i % 12, (i * 7) % 60),
+                time_zone="Africa/Lagos",
+                base_price=Decimal("4500.00") + i,
+                currency="NGN",
+                available_seats=40 - i % 40,
+                vehicle_type="Coach",
+            )
+            items.append(TripSearchResult(trip, passengers=2, origin=origin, destination=destination))
+        return items
+
+    def _time(self, fn, repeat: int) -> float:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.bookings.services import SEAT_HOLDING_STATUSES
+from apps.catalog.models import Trip
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Trip.available_seats as vehicle_capacity minus seats held "
+        "by PENDING_PAYMENT / CONFIRMED bookings. Use to backfill the counter "
+        "or to repair drift. Trips without a seat limit (vehicle_capacity=0) "
+        "are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", help="Tenant slug (default: all tenants).")
+        parser.add_argument("--include-past", action="store_true", help="Also recount past service dates.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        qs = Trip.objects.filter(vehicle_capacity__gt=0)
+        if options["tenant"]:
+            qs = qs.filter(tenant__slug=options["tenant"])
+        if not options["include_past"]:
+            qs = qs.filter(service_date__gte=timezone.localdate())
+
+        qs = qs.annotate(
+            held=Coalesce(
+                Sum("bookings__seats_count", filter=Q(bookings__status__in=SEAT_HOLDING_STATUSES)),
+                Value(0),
+                output_field=IntegerField(),
+            )
+        ).only("id", "vehicle_capacity", "available_seats")
+
+        changed = []
+        for trip in qs.iterator(chunk_size=2000):
+            seats = max(0, trip.vehicle_capacity - trip.held)
+            if seats != trip.available_seats:
+                trip.available_seats = seats
+                changed.append(trip)
+
+        if not options["dry_run"] and changed:
+            with transaction.atomic():
+                Trip.objects.bulk_update(changed, ["available_seats"], batch_size=1000)
+
+        self.stdout.write(f"{len(changed)} trip(s) {'would change' if options['dry_run'] else 'updated'}.")
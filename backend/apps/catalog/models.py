@@ -1,13 +1,24 @@
 import uuid
+from functools import lru_cache
+from zoneinfo import ZoneInfo
 
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 from apps.tenancy.models import Tenant
 from apps.providers.models import Provider
 
 
+@lru_cache(maxsize=64)
+def get_zone(name: str) -> ZoneInfo:
+    """
+    Cached ZoneInfo lookup for Trip.time_zone (hot in search rendering).
+    """
+    return ZoneInfo(name)
+
+
 # ---------------------------
 # Enums
 # ---------------------------
@@ -295,6 +306,8 @@ class Trip(models.Model):
             models.Index(fields=["tenant", "provider", "service_date"]),
             models.Index(fields=["tenant", "provider", "external_id"]),
             models.Index(fields=["tenant", "route"]),
+            # Timetable loads / departure-window scans for search
+            models.Index(fields=["tenant", "service_date", "route", "departure_time"]),
         ]
 
     def __str__(self):
@@ -310,9 +323,8 @@ class Trip(models.Model):
         Combine service_date + departure_time into a timezone-aware datetime.
         """
         from datetime import datetime
-        from zoneinfo import ZoneInfo
 
-        tz = ZoneInfo(self.time_zone)
+        tz = get_zone(self.time_zone)
         dt = datetime.combine(self.service_date, self.departure_time)
         return dt.replace(tzinfo=tz)
 
@@ -323,9 +335,8 @@ class Trip(models.Model):
         NOTE: For overnight trips, you might need logic to add +1 day.
         """
         from datetime import datetime, timedelta
-        from zoneinfo import ZoneInfo
 
-        tz = ZoneInfo(self.time_zone)
+        tz = get_zone(self.time_zone)
         dt = datetime.combine(self.service_date, self.arrival_time)
         # TODO (later): handle overnight trips explicitly.
         return dt.replace(tzinfo=tz)
@@ -343,3 +354,31 @@ class Trip(models.Model):
         True if the trip has not yet departed (based on departure_datetime).
         """
         return self.departure_datetime >= timezone.now()
+
+
+class TripSeatMap(models.Model):
+    """
+    Seat states of one trip as a fixed-width string, one character per seat
+    ("0" free, "1" taken), so a seat is claimed or released with a single
+    conditional UPDATE on its position. seat_labels maps positions to the
+    labels passengers pick ("1".."N" from vehicle_capacity).
+    """
+
+    SEAT_FREE = "0"
+    SEAT_TAKEN = "1"
+
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, primary_key=True, related_name="seat_map")
+    states = models.TextField()
+    seat_labels = models.JSONField(default=list)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "trip_seat_map"
+
+    @cached_property
+    def positions(self) -> dict:
+        """
+        {seat label: 0-based position in states}.
+        """
+        return {label: i for i, label in enumerate(self.seat_labels)}
@@ -0,0 +1,297 @@
+from typing import Dict, Iterable, List
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Func, IntegerField, Q, Sum, TextField, Value, When
+from django.db.models.functions import Greatest, Substr
+from django.db.models.lookups import Exact
+
+from apps.bookings.models import SEAT_HOLDING_STATUSES, Booking
+from apps.trip_planning.cache import note_inventory_writes
+
+from .models import Trip, TripSeatMap
+
+
+# ---------------------------
+# Seat availability
+#
+# Trip.available_seats is the single seat counter: search filters on it,
+# bookings reserve and release through it, and provider inventory syncs
+# set it. Every change goes through the helpers below, which also move the
+# tenant's inventory version on commit so cached searches drop stale seat
+# counts.
+#
+# vehicle_capacity=0 means "no seat limit": such trips never touch the
+# counter and are always bookable.
+# ---------------------------
+
+def _note_inventory_writes(tenant_ids: Iterable) -> None:
+    for tenant_id in set(tenant_ids):
+        transaction.on_commit(lambda tenant_id=tenant_id: note_inventory_writes(tenant_id))
+
+
+def has_seats(count: int) -> Q:
+    """
+    Trip filter: room for `count` more passengers.
+    """
+    return Q(available_seats__gte=count) | Q(vehicle_capacity=0)
+
+
+def reserve_seats(trip: Trip, count: int) -> None:
+    """
+    Take `count` seats with a single conditional decrement
+    (UPDATE .. SET available_seats = available_seats - n WHERE available_seats >= n).
+    No prior lock is needed; raises ValidationError when not enough are left.
+    """
+    if not trip.vehicle_capacity:
+        return
+    taken = Trip.objects.filter(pk=trip.pk, available_seats__gte=count).update(
+        available_seats=F("available_seats") - count
+    )
+    if not taken:
+        raise ValidationError("Not enough seats available for this trip.")
+    trip.available_seats = max(0, trip.available_seats - count)
+    _note_inventory_writes([trip.tenant_id])
+
+
+def _trip_tenant_ids(trip_ids: Iterable) -> List:
+    return list(Trip.objects.filter(pk__in=list(trip_ids)).values_list("tenant_id", flat=True).distinct())
+
+
+def release_seats(trip_id, count: int, tenant_id=None) -> None:
+    """
+    Give seats back after a cancellation, expiry or failed payment.
+    Pass tenant_id when known to save looking it up.
+    """
+    if count > 0:
+        Trip.objects.filter(pk=trip_id, vehicle_capacity__gt=0).update(available_seats=F("available_seats") + count)
+        _note_inventory_writes([tenant_id] if tenant_id is not None else _trip_tenant_ids([trip_id]))
+
+
+def release_seats_by_trip(seats_by_trip: Dict, tenant_ids: Iterable = None) -> int:
+    """
+    release_seats for many trips in one UPDATE ({trip_id: seats}).
+    tenant_ids, when known, are the tenants owning those trips.
+    """
+    seats_by_trip = {trip_id: seats for trip_id, seats in seats_by_trip.items() if seats > 0}
+    if not seats_by_trip:
+        return 0
+    _note_inventory_writes(tenant_ids if tenant_ids is not None else _trip_tenant_ids(seats_by_trip))
+    return Trip.objects.filter(pk__in=seats_by_trip.keys(), vehicle_capacity__gt=0).update(
+        available_seats=F("available_seats")
+        + Case(
+            *(When(pk=trip_id, then=Value(seats)) for trip_id, seats in seats_by_trip.items()),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def _held_seats(trip_ids: Iterable) -> Dict:
+    """
+    {trip_id: seats held by our PENDING_PAYMENT / CONFIRMED bookings}.
+    """
+    return dict(
+        Booking.objects.filter(trip_id__in=list(trip_ids), status__in=SEAT_HOLDING_STATUSES)
+        .values("trip_id")
+        .annotate(seats=Sum("seats_count"))
+        .values_list("trip_id", "seats")
+        .order_by()
+    )
+
+
+@transaction.atomic
+def set_available_seats(seats_by_trip: Dict) -> int:
+    """
+    Set the counter from provider inventory ({trip_id: seats}).
+
+    The provider's count does not know about seats our own bookings hold,
+    so those are subtracted. The trip rows are locked first, so no
+    reservation lands between counting held seats and writing.
+    Returns the number of trips written.
+    """
+    if not seats_by_trip:
+        return 0
+    locked = list(
+        Trip.objects.select_for_update()
+        .filter(pk__in=list(seats_by_trip))
+        .order_by("pk")
+        .values_list("pk", "tenant_id")
+    )
+    held = _held_seats(seats_by_trip)
+    trips = [
+        Trip(pk=trip_id, available_seats=max(0, seats_by_trip[trip_id] - held.get(trip_id, 0)))
+        for trip_id, _ in locked
+    ]
+    _note_inventory_writes(tenant_id for _, tenant_id in locked)
+    return Trip.objects.bulk_update(trips, ["available_seats"], batch_size=1000)
+
+
+def change_capacity(trip: Trip, old_capacity: int) -> None:
+    """
+    Follow a vehicle_capacity edit (trip already saved with the new value):
+    shift the counter by the difference, or count it from held seats when
+    the trip had no seat limit before, and resize the seat map.
+    """
+    new_capacity = trip.vehicle_capacity
+    if new_capacity == old_capacity:
+        return
+    if new_capacity:
+        if old_capacity:
+            seats = Greatest(F("available_seats") + (new_capacity - old_capacity), Value(0))
+        else:
+            seats = max(0, new_capacity - _held_seats([trip.pk]).get(trip.pk, 0))
+        Trip.objects.filter(pk=trip.pk).update(available_seats=seats)
+        _note_inventory_writes([trip.tenant_id])
+    _resize_seat_map(trip.pk, new_capacity)
+
+
+# ---------------------------
+# Seat map
+#
+# Individual seats live in TripSeatMap.states, one character per seat.
+# Claiming seats i, j is "UPDATE .. SET states = <states with i, j taken>
+# WHERE substr(states, i, 1) = free AND substr(states, j, 1) = free": an
+# O(1)-per-seat check-and-set that cannot double-book, with no scan over
+# BookingSeat.
+# ---------------------------
+
+def _default_seat_labels(trip: Trip) -> List[str]:
+    return [str(i) for i in range(1, trip.vehicle_capacity + 1)]
+
+
+def get_seat_map(trip: Trip) -> TripSeatMap:
+    """
+    The trip's seat map, created all-free from vehicle_capacity on first use.
+    """
+    labels = _default_seat_labels(trip)
+    seat_map, _ = TripSeatMap.objects.get_or_create(
+        trip=trip,
+        defaults={"states": TripSeatMap.SEAT_FREE * len(labels), "seat_labels": labels},
+    )
+    return seat_map
+
+
+def _spliced_states(positions: Iterable[int], new: str):
+    """
+    Expression for `states` with every given 0-based position set to `new`.
+    """
+    states = F("states")
+    parts, cursor = [], 0
+    for position in sorted(positions):
+        if position > cursor:
+            parts.append(Substr(states, cursor + 1, position - cursor))
+        parts.append(Value(new))
+        cursor = position + 1
+    parts.append(Substr(states, cursor + 1))
+    # Flat "a || b || c" rather than Concat, which nests one level per part.
+    return Func(*parts, function="", arg_joiner=" || ", output_field=TextField())
+
+
+def _set_seat_states(trip_id, positions: List[int], new: str, expected: str = None) -> bool:
+    """
+    Set all positions to `new` in one UPDATE (SQL substr is 1-based). With
+    `expected`, only if every seat is currently in that state; otherwise
+    False and nothing changes.
+    """
+    conditions = []
+    if expected is not None:
+        conditions = [Exact(Substr(F("states"), position + 1, 1), Value(expected)) for position in positions]
+    return bool(
+        TripSeatMap.objects.filter(*conditions, trip_id=trip_id).update(states=_spliced_states(positions, new))
+    )
+
+
+def claim_seats(trip: Trip, labels: Iterable[str]) -> List[str]:
+    """
+    Mark the given seats taken, all or none, in one UPDATE. Raises
+    ValidationError for repeated or already-taken seats.
+
+    Only "1".."N" seats of a trip with a seat limit are on the seat map.
+    Other labels (e.g. "12A", or any seat on a vehicle_capacity=0 trip)
+    are returned unchecked, and the booking is bounded by the seat counter
+    alone, as before seat maps existed.
+    """
+    labels = [str(label) for label in labels]
+    if len(set(labels)) != len(labels):
+        raise ValidationError("The same seat was requested more than once.")
+    if not trip.vehicle_capacity:
+        return labels
+
+    seat_map = get_seat_map(trip)
+    positions = [seat_map.positions.get(label) for label in labels]
+    if None in positions:
+        return labels
+
+    claimed = not positions or _set_seat_states(
+        trip.pk, positions, TripSeatMap.SEAT_TAKEN, expected=TripSeatMap.SEAT_FREE
+    )
+    if not claimed:
+        seat_map.refresh_from_db(fields=["states"])
+        taken = [
+            label
+            for label, position in zip(labels, positions)
+            if seat_map.states[position] != TripSeatMap.SEAT_FREE
+        ]
+        raise ValidationError(f"Seat {', '.join(taken) or labels[0]} is no longer available.")
+    return labels
+
+
+def release_seat_labels(trip_id, labels: Iterable[str]) -> None:
+    """
+    Free previously claimed seats in one UPDATE. Unknown labels are ignored.
+    Callers release a booking's seats exactly once (see bookings._transition),
+    so the seats are still theirs.
+    """
+    labels = [str(label) for label in labels if label]
+    if not labels:
+        return
+    seat_map = TripSeatMap.objects.filter(trip_id=trip_id).only("trip_id", "seat_labels").first()
+    if seat_map is None:
+        return
+    positions = sorted({seat_map.positions[label] for label in labels if label in seat_map.positions})
+    if positions:
+        _set_seat_states(trip_id, positions, TripSeatMap.SEAT_FREE)
+
+
+def _resize_seat_map(trip_id, new_capacity: int) -> None:
+    """
+    Grow or shrink a seat map to the new capacity. Taken seats past the new
+    end are kept until released.
+    """
+    seat_map = TripSeatMap.objects.select_for_update().filter(trip_id=trip_id).first()
+    if seat_map is None:
+        return
+    states = seat_map.states
+    if new_capacity > len(states):
+        states += TripSeatMap.SEAT_FREE * (new_capacity - len(states))
+    else:
+        last_taken = states.rfind(TripSeatMap.SEAT_TAKEN)
+        states = states[: max(new_capacity, last_taken + 1)]
+    TripSeatMap.objects.filter(trip_id=trip_id).update(
+        states=states,
+        seat_labels=[str(i) for i in range(1, len(states) + 1)],
+    )
+
+
+def render_seat_map(trip: Trip) -> Dict:
+    """
+    Live seat map payload. One read; trips nobody has picked a seat on yet
+    are reported all-free without creating their row.
+    """
+    seat_map = TripSeatMap.objects.filter(trip=trip).first()
+    if seat_map is None:
+        labels = _default_seat_labels(trip)
+        states = TripSeatMap.SEAT_FREE * len(labels)
+    else:
+        labels, states = seat_map.seat_labels, seat_map.states
+
+    seats = [
+        {"label": label, "available": state == TripSeatMap.SEAT_FREE}
+        for label, state in zip(labels, states)
+    ]
+    return {
+        "trip_id": str(trip.id),
+        "capacity": len(seats),
+        "available": sum(1 for seat in seats if seat["available"]),
+        "seats": seats,
+    }
@@ -0,0 +1,133 @@
+import threading
+from datetime import date, time
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from apps.providers.models import Provider
+from apps.tenancy.models import Tenant
+
+from .models import Route, Trip, TripSeatMap
+from .services import claim_seats, release_seat_labels, reserve_seats
+
+
+def make_trip(capacity: int = 4, slug: str = "acme") -> Trip:
+    tenant = Tenant.objects.create(name=slug, slug=slug, primary_domain=f"{slug}.example.com")
+    provider = Provider.objects.create(tenant=tenant, name=f"{slug} buses")
+    route = Route.objects.create(tenant=tenant, provider=provider, code="R1", name="Lagos - Ibadan")
+    return Trip.objects.create(
+        tenant=tenant,
+        provider=provider,
+        route=route,
+        service_date=date(2030, 1, 1),
+        departure_time=time(8, 0),
+        arrival_time=time(10, 0),
+        vehicle_capacity=capacity,
+        available_seats=capacity,
+    )
+
+
+def _race(workers: int, target) -> list:
+    """
+    Run target() on `workers` threads released at the same moment; returns
+    each call's result or the ValidationError it raised.
+    """
+    barrier = threading.Barrier(workers)
+    results = []
+    lock = threading.Lock()
+
+    def run():
+        try:
+            barrier.wait()
+            try:
+                result = target()
+            except ValidationError as exc:
+                result = exc
+            with lock:
+                results.append(result)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SeatMapTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(capacity=4)
+
+    def test_claim_and_release(self):
+        self.assertEqual(claim_seats(self.trip, ["1", "3"]), ["1", "3"])
+        self.assertEqual(TripSeatMap.objects.get(trip=self.trip).states, "1010")
+
+        release_seat_labels(self.trip.id, ["1"])
+        self.assertEqual(TripSeatMap.objects.get(trip=self.trip).states, "0010")
+
+    def test_claim_is_all_or_nothing(self):
+        claim_seats(self.trip, ["2"])
+        with self.assertRaises(ValidationError):
+            claim_seats(self.trip, ["1", "2"])
+        self.assertEqual(TripSeatMap.objects.get(trip=self.trip).states, "0100")
+
+    def test_rejects_repeated_seats(self):
+        with self.assertRaises(ValidationError):
+            claim_seats(self.trip, ["1", "1"])
+
+    def test_untracked_labels_bypass_the_seat_map(self):
+        self.assertEqual(claim_seats(self.trip, ["12A", "1"]), ["12A", "1"])
+        self.assertEqual(TripSeatMap.objects.get(trip=self.trip).states, "0000")
+
+    def test_unlimited_trip_has_no_seat_map(self):
+        trip = make_trip(capacity=0, slug="open")
+
+        self.assertEqual(claim_seats(trip, ["7"]), ["7"])
+        self.assertFalse(TripSeatMap.objects.filter(trip=trip).exists())
+
+
+class SeatContentionTests(TransactionTestCase):
+    """
+    Concurrent bookers on separate connections: the conditional UPDATE
+    must never hand out the same seat twice.
+    """
+
+    workers = 8
+
+    def test_one_winner_per_seat(self):
+        trip = make_trip(capacity=4)
+        claim_seats(trip, [])  # create the seat map up front
+
+        results = _race(self.workers, lambda: claim_seats(Trip.objects.get(pk=trip.pk), ["2"]))
+
+        self.assertEqual(sum(1 for r in results if r == ["2"]), 1)
+        self.assertEqual(sum(1 for r in results if isinstance(r, ValidationError)), self.workers - 1)
+        self.assertEqual(TripSeatMap.objects.get(trip=trip).states, "0100")
+
+
+class SeatCounterContentionTests(TransactionTestCase):
+    """
+    Concurrent reservations against Trip.available_seats: the conditional
+    decrement must stop at zero without any row lock taken up front.
+    """
+
+    workers = 8
+
+    def test_counter_never_oversells(self):
+        trip = make_trip(capacity=3)
+
+        results = _race(self.workers, lambda: reserve_seats(Trip.objects.get(pk=trip.pk), 1))
+
+        self.assertEqual(sum(1 for r in results if r is None), 3)
+        trip.refresh_from_db()
+        self.assertEqual(trip.available_seats, 0)
+
+    def test_unlimited_trip_is_always_bookable(self):
+        trip = make_trip(capacity=0)
+
+        results = _race(self.workers, lambda: reserve_seats(Trip.objects.get(pk=trip.pk), 1))
+
+        self.assertTrue(all(r is None for r in results))
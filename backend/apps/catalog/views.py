@@ -1,10 +1,14 @@
 from django.db import transaction
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from apps.providers.permissions import IsProviderUserOrTenantAdmin
+from apps.trip_planning.spatial import apply_stop_writes
+from apps.trip_planning.timetable import note_route_writes, note_trip_writes
 from .models import Stop, Route, Trip
+from .services import change_capacity
 from .serializers import StopSerializer, RouteSerializer, TripSerializer
 
 
@@ -32,6 +36,7 @@ class ProviderStopsBulkUpsertView(generics.GenericAPIView):
         created = 0
         updated = 0
         result = []
+        written = []
 
         for s in stops_payload:
             external_id = s.get("external_id")
@@ -57,6 +62,10 @@ class ProviderStopsBulkUpsertView(generics.GenericAPIView):
             else:
                 updated += 1
             result.append({"id": str(obj.id), "external_id": external_id, "code": obj.code})
+            written.append((str(obj.id), float(obj.lat), float(obj.lng), bool(obj.active)))
+
+        # Patch the nearest-stop index only once the rows are visible to other workers.
+        transaction.on_commit(lambda: apply_stop_writes(tenant.id, written))
 
         return Response(
             {"created": created, "updated": updated, "stops": result},
@@ -136,6 +145,8 @@ class ProviderRoutesBulkUpsertView(generics.GenericAPIView):
                 }
             )
 
+        transaction.on_commit(lambda: note_route_writes(tenant.id))
+
         return Response(
             {"created": created, "updated": updated, "routes": result},
             status=status.HTTP_200_OK,
@@ -160,11 +171,36 @@ class ProviderTripsBulkUpsertView(generics.GenericAPIView):
         provider = request.provider
         trips_payload = request.data.get("trips", [])
 
+        # Capacities feed seat arithmetic, so they go through the serializer
+        # field (a string "40" becomes 40, junk is a 400) before any write.
+        capacity_field = self.get_serializer().fields["vehicle_capacity"]
+        capacities, errors = [], {}
+        for index, t in enumerate(trips_payload):
+            try:
+                capacities.append(capacity_field.run_validation(t.get("vehicle_capacity", 0)))
+            except ValidationError as exc:
+                errors[index] = {"vehicle_capacity": exc.detail}
+        if errors:
+            raise ValidationError({"trips": errors})
+
+        # Current capacities of the trips being updated, in one locked read:
+        # change_capacity applies the difference, which must not move under us.
+        old_capacities = dict(
+            Trip.objects.select_for_update()
+            .filter(
+                tenant=tenant,
+                provider=provider,
+                external_id__in=[t.get("external_id") for t in trips_payload],
+            )
+            .order_by("pk")
+            .values_list("external_id", "vehicle_capacity")
+        )
+
         created = 0
         updated = 0
         result = []
 
-        for t in trips_payload:
+        for t, capacity in zip(trips_payload, capacities):
             external_id = t.get("external_id")
             route_id = t["route_id"]
 
@@ -176,22 +212,27 @@ class ProviderTripsBulkUpsertView(generics.GenericAPIView):
                 "departure_time": t["departure_time"],
                 "arrival_time": t["arrival_time"],
                 "vehicle_type": t.get("vehicle_type", ""),
-                "vehicle_capacity": t.get("vehicle_capacity", 0),
+                "vehicle_capacity": capacity,
                 "operating_days": t.get("operating_days", []),
                 "time_zone": t.get("time_zone", "Africa/Lagos"),
             }
 
+            # New trips start with every seat free; afterwards the counter is
+            # owned by bookings and inventory sync.
             trip, is_created = Trip.objects.update_or_create(
                 tenant=tenant,
                 provider=provider,
                 external_id=external_id,
                 defaults=defaults,
+                create_defaults={**defaults, "available_seats": defaults["vehicle_capacity"]},
             )
 
             if is_created:
                 created += 1
             else:
                 updated += 1
+                change_capacity(trip, old_capacities.get(external_id, trip.vehicle_capacity))
+            old_capacities[external_id] = trip.vehicle_capacity
 
             result.append(
                 {
@@ -201,6 +242,9 @@ class ProviderTripsBulkUpsertView(generics.GenericAPIView):
                 }
             )
 
+        written_ids = [r["id"] for r in result]
+        transaction.on_commit(lambda: note_trip_writes(tenant.id, written_ids))
+
         return Response(
             {"created": created, "updated": updated, "trips": result},
             status=status.HTTP_200_OK,
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Small thread-safe in-process LRU with a per-entry TTL.
+
+    Used as the local tier in front of Django's cache framework for hot,
+    per-worker lookups where even a Redis round trip is too much.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class VersionedLRUCache(LRUCache):
+    """
+    LRUCache whose entries can be invalidated across workers.
+
+    invalidate() drops keys locally and bumps a shared version counter
+    (apps.core.versioning); every worker compares that counter at most once
+    per check_interval_seconds and clears itself when it moved. Lookups in
+    between never leave the process.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        check_interval_seconds: float = 1.0,
+    ):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.namespace = namespace
+        self.check_interval_seconds = check_interval_seconds
+        self._seen_version = None
+        self._checked_at = 0.0
+
+    def _sync(self) -> None:
+        from .versioning import get_version
+
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_seconds:
+            return
+        self._checked_at = now
+        version = get_version(self.namespace, "all")
+        if version != self._seen_version:
+            if self._seen_version is not None:
+                self.clear()
+            self._seen_version = version
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self._sync()
+        return super().get(key, default)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        from .versioning import bump_version
+
+        for key in keys:
+            self.delete(key)
+        bump_version(self.namespace, "all")
@@ -0,0 +1,37 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace: str, tenant_id) -> str:
+    return f"version:{namespace}:{tenant_id}"
+
+
+def get_version(namespace: str, tenant_id) -> int:
+    """
+    Current version counter for (namespace, tenant).
+
+    Counters live in the default Django cache, so every worker sees the same
+    value once a shared backend (Redis / Memcached) is configured. A missing key
+    is seeded with a millisecond timestamp so an evicted counter never comes
+    back with a value an in-process structure was already built against.
+    """
+    key = _version_key(namespace, tenant_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_version(namespace: str, tenant_id) -> int:
+    """
+    Increment the (namespace, tenant) counter and return the new value.
+    """
+    key = _version_key(namespace, tenant_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key was never seeded (or got evicted) – seed it, then bump.
+        get_version(namespace, tenant_id)
+        return cache.incr(key)
@@ -0,0 +1,257 @@
+"""
+Per-endpoint protection for webhook delivery: a circuit breaker that
+stops calling endpoints which keep failing, and an adaptive (AIMD)
+concurrency limit that backs off when an endpoint slows down.
+
+State lives in each worker process; persist_circuits() merges it into
+WebhookEndpointCircuit for the admin API and so a restarted worker
+resumes where it left off.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WebhookEndpointCircuit
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    """
+    CLOSED: requests flow; the last `window` outcomes are kept and the
+    circuit trips OPEN once at least `min_requests` of them show a failure
+    rate >= `failure_rate`.
+    OPEN: no requests for `open_seconds`, then HALF_OPEN.
+    HALF_OPEN: a single probe; success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, window: int, min_requests: int, failure_rate: float, open_seconds: float):
+        self.min_requests = min_requests
+        self.failure_rate_threshold = failure_rate
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.trip_count = 0
+        self.unsaved_trips = 0  # trips not yet added to the snapshot
+        self.opened_at = None  # aware datetime, for reporting
+        self._opened_mono = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def retry_at(self):
+        """
+        When a request refused now should be tried again.
+        """
+        remaining = max(0.0, self.open_seconds - (time.monotonic() - self._opened_mono))
+        return timezone.now() + timedelta(seconds=remaining)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_mono < self.open_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+            if self.state == OPEN:
+                return  # late result of a request sent before the trip
+            self._outcomes.append(ok)
+            if len(self._outcomes) >= self.min_requests and self.failure_rate >= self.failure_rate_threshold:
+                self._trip()
+
+    def _trip(self) -> None:
+        self.state = OPEN
+        self.trip_count += 1
+        self.unsaved_trips += 1
+        self.opened_at = timezone.now()
+        self._opened_mono = time.monotonic()
+        self._outcomes.clear()
+
+
+class AdaptiveLimit:
+    """
+    AIMD cap on in-flight requests to one endpoint: +1 per `limit` fast
+    successes, halved on a failure or a response slower than
+    `latency_target_ms`. Never below 1 or above `max_limit`.
+    """
+
+    def __init__(self, max_limit: int, latency_target_ms: int):
+        self.max_limit = max(1, max_limit)
+        self.latency_target_ms = latency_target_ms
+        self.limit = float(self.max_limit)
+        self.latency_ewma_ms = None
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def record(self, ok: bool, latency_ms: int) -> None:
+        with self._cond:
+            if self.latency_ewma_ms is None:
+                self.latency_ewma_ms = float(latency_ms)
+            else:
+                self.latency_ewma_ms = 0.8 * self.latency_ewma_ms + 0.2 * latency_ms
+
+            if ok and latency_ms <= self.latency_target_ms:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(1.0, self.limit / 2)
+            self._cond.notify_all()
+
+
+_breakers: Dict = {}
+_limits: Dict = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(endpoint_id) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(endpoint_id)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                window=getattr(settings, "WEBHOOK_BREAKER_WINDOW", 20),
+                min_requests=getattr(settings, "WEBHOOK_BREAKER_MIN_REQUESTS", 10),
+                failure_rate=getattr(settings, "WEBHOOK_BREAKER_FAILURE_RATE", 0.5),
+                open_seconds=getattr(settings, "WEBHOOK_BREAKER_OPEN_SECONDS", 30),
+            )
+            _restore(breaker, endpoint_id)
+            _breakers[endpoint_id] = breaker
+        return breaker
+
+
+def get_limit(endpoint_id) -> AdaptiveLimit:
+    with _registry_lock:
+        limit = _limits.get(endpoint_id)
+        if limit is None:
+            limit = AdaptiveLimit(
+                max_limit=getattr(settings, "WEBHOOK_ENDPOINT_CONCURRENCY", 4),
+                latency_target_ms=getattr(settings, "WEBHOOK_LATENCY_TARGET_MS", 1000),
+            )
+            _limits[endpoint_id] = limit
+        return limit
+
+
+def _restore(breaker: CircuitBreaker, endpoint_id) -> None:
+    """
+    Seed a new breaker from the last snapshot, so a restart neither forgets
+    the trip count nor hammers an endpoint whose circuit was open.
+    """
+    saved = WebhookEndpointCircuit.objects.filter(endpoint_id=endpoint_id).first()
+    if saved is None:
+        return
+    breaker.trip_count = saved.trip_count
+    if saved.state != CLOSED and saved.opened_at is not None:
+        elapsed = (timezone.now() - saved.opened_at).total_seconds()
+        breaker.state = OPEN
+        breaker.opened_at = saved.opened_at
+        breaker._opened_mono = time.monotonic() - elapsed
+
+
+def _merge(row: WebhookEndpointCircuit, breaker: CircuitBreaker, now) -> None:
+    """
+    Fold one worker's breaker into the shared snapshot row. Trips add up,
+    and an OPEN row stays OPEN until its open period is over, whatever
+    this worker's own breaker says.
+    """
+    row.trip_count += breaker.unsaved_trips
+    breaker.trip_count = row.trip_count
+    row_open = (
+        row.state == OPEN
+        and row.opened_at is not None
+        and (now - row.opened_at).total_seconds() < breaker.open_seconds
+    )
+    if row_open and (breaker.state != OPEN or breaker.opened_at < row.opened_at):
+        return
+    row.state = breaker.state
+    row.opened_at = breaker.opened_at
+
+
+def persist_circuits(endpoints: Iterable) -> None:
+    """
+    Merge the breaker/limit state of the given endpoints into their
+    snapshot rows. Every worker has its own breakers, so rows are locked
+    and merged (see _merge) rather than overwritten; failure rate and
+    concurrency figures are the last writer's.
+    """
+    endpoints = {endpoint.id: endpoint for endpoint in endpoints}
+    if not endpoints:
+        return
+    now = timezone.now()
+    saved_trips = []
+    with transaction.atomic():
+        WebhookEndpointCircuit.objects.bulk_create(
+            [
+                WebhookEndpointCircuit(endpoint_id=endpoint.id, tenant_id=endpoint.tenant_id, updated_at=now)
+                for endpoint in endpoints.values()
+            ],
+            ignore_conflicts=True,
+        )
+        # Locked in a fixed order, so two workers cannot deadlock.
+        rows = list(
+            WebhookEndpointCircuit.objects.select_for_update()
+            .filter(endpoint_id__in=list(endpoints))
+            .order_by("endpoint_id")
+        )
+        for row in rows:
+            breaker, limit = get_breaker(row.endpoint_id), get_limit(row.endpoint_id)
+            saved_trips.append((breaker, breaker.unsaved_trips))
+            _merge(row, breaker, now)
+            row.failure_rate = breaker.failure_rate
+            row.concurrency_limit = int(limit.limit)
+            row.latency_ewma_ms = limit.latency_ewma_ms
+            row.updated_at = now
+        WebhookEndpointCircuit.objects.bulk_update(
+            rows,
+            [
+                "state",
+                "failure_rate",
+                "trip_count",
+                "opened_at",
+                "concurrency_limit",
+                "latency_ewma_ms",
+                "updated_at",
+            ],
+        )
+    for breaker, trips in saved_trips:
+        breaker.unsaved_trips -= trips
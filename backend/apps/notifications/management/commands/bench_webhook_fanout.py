@@ -0,0 +1,84 @@
+import statistics
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+from apps.notifications.models import NotificationEvent, WebhookEndpoint
+from apps.notifications.services import dispatch_event
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """
+    Keep-alive receiver; /<ms> answers 200 after sleeping that many milliseconds.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(int(self.path.strip("/") or 0) / 1000)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare webhook fan-out of one event to many endpoints: serial bare "
+        "requests.post (old dispatcher) vs pooled concurrent dispatch_event. "
+        "Runs against a local stub server; touches no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoints", type=int, default=20)
+        parser.add_argument("--max-delay-ms", type=int, default=100, help="Slowest endpoint's response time.")
+        parser.add_argument("--events", type=int, default=20)
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        count = options["endpoints"]
+        delays = [options["max_delay_ms"] * (i + 1) // count for i in range(count)]
+        endpoints = [
+            WebhookEndpoint(
+                id=uuid.uuid4(),
+                name=f"stub-{i}",
+                url=f"http://127.0.0.1:{server.server_port}/{delay}",
+                secret="bench",
+                event_types=["booking.created"],
+            )
+            for i, delay in enumerate(delays)
+        ]
+        event = NotificationEvent(event_type="booking.created", payload={"booking_id": str(uuid.uuid4())})
+
+        def serial():
+            for ep in endpoints:
+                requests.post(ep.url, data=b"{}", headers={"Content-Type": "application/json"}, timeout=5)
+
+        def fanout():
+            outcomes = dispatch_event(event, endpoints)
+            assert all(outcome.ok for outcome in outcomes), [o.error for o in outcomes if not o.ok]
+
+        try:
+            for label, run in (("serial", serial), ("pooled fan-out", fanout)):
+                timings = []
+                for _ in range(options["events"]):
+                    started = time.perf_counter()
+                    run()
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"{label:>15}: median={statistics.median(timings):.1f}ms "
+                    f"p95={sorted(timings)[int(len(timings) * 0.95) - 1]:.1f}ms"
+                )
+            self.stdout.write(f"slowest endpoint: {max(delays)}ms across {count} endpoints")
+        finally:
+            server.shutdown()
@@ -0,0 +1,41 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.notifications.services import deliver_due_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver outbox NotificationEvents to webhook endpoints from a thread "
+        "pool, one WebhookDelivery per endpoint, retrying failed deliveries with "
+        "exponential backoff. Several workers can run at once. Use --loop to "
+        "keep running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling, sleeping --interval when idle.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when nothing is due.")
+
+    def handle(self, *args, **options):
+        threads = options["threads"] or getattr(settings, "WEBHOOK_WORKER_THREADS", 16)
+        batch_size = options["batch_size"] or threads * 4
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="webhook") as pool:
+            while True:
+                fanned_out, sent = deliver_due_events(pool, batch_size)
+                if fanned_out or sent:
+                    self.stdout.write(f"Fanned out {fanned_out} events, sent {sent} deliveries.")
+                drained = fanned_out < batch_size and sent < batch_size
+                if not options["loop"]:
+                    if drained:
+                        return
+                    continue
+                if drained:
+                    close_old_connections()
+                    time.sleep(options["interval"])
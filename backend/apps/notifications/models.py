@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.utils import timezone
 
 from apps.tenancy.models import Tenant
 
@@ -18,6 +20,14 @@ class WebhookEndpoint(models.Model):
     secret = models.CharField(max_length=255, help_text="Signing secret for HMAC")
 
     event_types = ArrayField(models.CharField(max_length=64), default=list, blank=True)
+    timeout_seconds = models.FloatField(
+        null=True, blank=True, help_text="Per-request timeout; defaults to WEBHOOK_TIMEOUT_SECONDS"
+    )
+
+    # Opt-in batching: up to batch_max_events events per signed request,
+    # holding the first one at most batch_max_wait_ms for the batch to fill.
+    batch_max_events = models.PositiveIntegerField(default=1, help_text="1 = one request per event")
+    batch_max_wait_ms = models.PositiveIntegerField(default=0)
 
     is_active = models.BooleanField(default=True)
 
@@ -28,17 +38,32 @@ class WebhookEndpoint(models.Model):
         db_table = "webhook_endpoint"
         indexes = [
             models.Index(fields=["tenant"]),
+            # event_types @> ARRAY[...] on routing-table misses.
+            GinIndex(fields=["event_types"], name="webhook_endpoint_types_gin"),
         ]
 
     def __str__(self) -> str:
         return f"{self.tenant.slug} - {self.name}"
 
+    @property
+    def batches(self) -> bool:
+        return self.batch_max_events > 1
+
 
 class NotificationEvent(models.Model):
+    """
+    Outbox row: written in the same transaction as the change it describes.
+    The deliver_webhooks worker fans PENDING events out into one
+    WebhookDelivery per subscribed endpoint; afterwards status summarizes
+    those deliveries (SENT once all are, DEAD if any ran out of attempts).
+    """
+
     STATUS_CHOICES = [
         ("PENDING", "Pending"),
+        ("DELIVERING", "Delivering"),
         ("SENT", "Sent"),
         ("FAILED", "Failed"),
+        ("DEAD", "Dead letter"),
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -50,6 +75,7 @@ class NotificationEvent(models.Model):
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="PENDING")
     attempts = models.IntegerField(default=0)
     last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -58,9 +84,95 @@ class NotificationEvent(models.Model):
         db_table = "notification_event"
         indexes = [
             models.Index(fields=["tenant", "event_type", "status"]),
+            # Events still waiting to be fanned out, oldest first.
+            models.Index(
+                fields=["next_attempt_at"],
+                name="notification_event_due_idx",
+                condition=models.Q(status="PENDING"),
+            ),
         ]
 
     def __str__(self) -> str:
         return f"{self.event_type} ({self.tenant.slug})"
 
 
+class WebhookDelivery(models.Model):
+    """
+    One event to one endpoint, with its own retry state, so a retry only
+    re-sends to the endpoints that failed.
+    """
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+        ("DEAD", "Dead letter"),
+    ]
+    DUE_STATUSES = ("PENDING", "FAILED")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="webhook_deliveries")
+    event = models.ForeignKey(NotificationEvent, on_delete=models.CASCADE, related_name="deliveries")
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name="deliveries")
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    response_code = models.IntegerField(null=True, blank=True)
+    latency_ms = models.IntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "webhook_delivery"
+        unique_together = ("event", "endpoint")
+        indexes = [
+            models.Index(fields=["tenant", "status", "endpoint"]),
+            # The worker's queue: only undelivered rows, oldest due first.
+            models.Index(
+                fields=["next_attempt_at"],
+                name="webhook_delivery_due_idx",
+                condition=models.Q(status__in=["PENDING", "FAILED"]),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event_id} -> {self.endpoint_id} ({self.status})"
+
+
+class WebhookEndpointCircuit(models.Model):
+    """
+    Snapshot of an endpoint's circuit breaker and adaptive concurrency
+    limit, written by the delivery worker (see breaker.py).
+    """
+
+    STATE_CHOICES = [
+        ("CLOSED", "Closed"),
+        ("OPEN", "Open"),
+        ("HALF_OPEN", "Half open"),
+    ]
+
+    endpoint = models.OneToOneField(
+        WebhookEndpoint, on_delete=models.CASCADE, primary_key=True, related_name="circuit"
+    )
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="webhook_circuits")
+
+    state = models.CharField(max_length=16, choices=STATE_CHOICES, default="CLOSED")
+    failure_rate = models.FloatField(default=0)
+    trip_count = models.PositiveIntegerField(default=0)
+    opened_at = models.DateTimeField(null=True, blank=True)
+
+    concurrency_limit = models.PositiveIntegerField(default=0)
+    latency_ewma_ms = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "webhook_endpoint_circuit"
+        indexes = [
+            models.Index(fields=["tenant", "state"]),
+        ]
@@ -0,0 +1,78 @@
+import threading
+from typing import List
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from apps.core import metrics
+from apps.core.cache import VersionedLRUCache
+
+from .models import WebhookEndpoint
+
+ROUTING_VERSION_NAMESPACE = "notifications.routing"
+
+_routes = VersionedLRUCache(
+    ROUTING_VERSION_NAMESPACE,
+    max_entries=getattr(settings, "WEBHOOK_ROUTING_MAX_ENTRIES", 4096),
+    ttl_seconds=getattr(settings, "WEBHOOK_ROUTING_TTL_SECONDS", 300),
+    check_interval_seconds=getattr(settings, "WEBHOOK_ROUTING_VERSION_CHECK_SECONDS", 1.0),
+)
+
+# (endpoint count, latest updated_at) the routing table was last checked against.
+_seen_endpoints = None
+_seen_lock = threading.Lock()
+
+
+def endpoints_for(tenant_id, event_type: str) -> List[WebhookEndpoint]:
+    """
+    Active endpoints subscribed to event_type, from the in-process routing
+    table; a miss runs one GIN-indexed event_types lookup. Instances are
+    shared and must be treated as read-only.
+    """
+    key = (str(tenant_id), event_type)
+    endpoints = _routes.get(key)
+    if endpoints is not None:
+        metrics.incr("notifications.routing.cache_hit")
+        return endpoints
+
+    metrics.incr("notifications.routing.cache_miss")
+    endpoints = list(
+        WebhookEndpoint.objects.filter(
+            tenant_id=tenant_id,
+            is_active=True,
+            event_types__contains=[event_type],
+        ).order_by("id")
+    )
+    _routes.set(key, endpoints)
+    return endpoints
+
+
+def invalidate_routes() -> None:
+    """
+    Drop the routing table here and bump the shared routing version. Called
+    on any endpoint write; those are rare next to event volume.
+
+    The bump only reaches other processes when CACHES["default"] is shared
+    (see settings); deliver_webhooks workers do not depend on it and call
+    sync_routes() every round instead.
+    """
+    _routes.clear()
+    _routes.invalidate()
+
+
+def sync_routes() -> None:
+    """
+    Drop the routing table when any endpoint was added, edited or removed
+    since the last call. One aggregate over webhook_endpoint, read straight
+    from the database, so it works without a shared cache.
+    """
+    global _seen_endpoints
+
+    state = WebhookEndpoint.objects.aggregate(count=Count("id"), latest=Max("updated_at"))
+    state = (state["count"], state["latest"])
+    with _seen_lock:
+        if state == _seen_endpoints:
+            return
+        if _seen_endpoints is not None:
+            _routes.clear()
+        _seen_endpoints = state
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import WebhookEndpoint
+from .models import WebhookDelivery, WebhookEndpoint, WebhookEndpointCircuit
 
 
 class WebhookEndpointSerializer(serializers.ModelSerializer):
@@ -11,8 +11,82 @@ class WebhookEndpointSerializer(serializers.ModelSerializer):
             "url",
             "secret",
             "event_types",
+            "timeout_seconds",
+            "batch_max_events",
+            "batch_max_wait_ms",
             "is_active",
             "created_at",
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
+
+    def validate_batch_max_events(self, value):
+        if not 1 <= value <= 500:
+            raise serializers.ValidationError("Must be between 1 and 500.")
+        return value
+
+    def validate_batch_max_wait_ms(self, value):
+        if value > 60000:
+            raise serializers.ValidationError("Must be at most 60000 ms.")
+        return value
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    event_type = serializers.CharField(source="event.event_type", read_only=True)
+
+    class Meta:
+        model = WebhookDelivery
+        fields = [
+            "id",
+            "event",
+            "event_type",
+            "endpoint",
+            "status",
+            "attempts",
+            "response_code",
+            "latency_ms",
+            "last_error",
+            "next_attempt_at",
+            "delivered_at",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class WebhookRedeliverySerializer(serializers.Serializer):
+    """
+    Filter for bulk redelivery; defaults to every FAILED or DEAD delivery.
+    """
+
+    delivery_ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+    statuses = serializers.ListField(
+        child=serializers.ChoiceField(choices=["FAILED", "DEAD", "SENT"]),
+        required=False,
+        default=["FAILED", "DEAD"],
+    )
+    endpoint_id = serializers.UUIDField(required=False)
+    event_type = serializers.CharField(required=False)
+    created_from = serializers.DateTimeField(required=False)
+    created_until = serializers.DateTimeField(required=False)
+
+
+class WebhookEndpointCircuitSerializer(serializers.ModelSerializer):
+    endpoint_name = serializers.CharField(source="endpoint.name", read_only=True)
+    endpoint_url = serializers.CharField(source="endpoint.url", read_only=True)
+
+    class Meta:
+        model = WebhookEndpointCircuit
+        fields = [
+            "endpoint",
+            "endpoint_name",
+            "endpoint_url",
+            "state",
+            "failure_rate",
+            "trip_count",
+            "opened_at",
+            "concurrency_limit",
+            "latency_ewma_ms",
+            "updated_at",
+        ]
+        read_only_fields = fields
@@ -1,71 +1,420 @@
 import hashlib
 import hmac
 import json
-from typing import Dict
+import random
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Tuple
 
-import requests
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from .models import WebhookEndpoint, NotificationEvent
+from .models import WebhookDelivery, WebhookEndpoint, NotificationEvent
+from .breaker import get_breaker, persist_circuits
+from .routing import endpoints_for, sync_routes
+from .transport import DeliveryOutcome, post, post_all
 from apps.tenancy.models import Tenant
 
+# last_error of a delivery the breaker refused to send.
+CIRCUIT_OPEN = "Circuit open"
+
 
 def enqueue_event(tenant: Tenant, event_type: str, payload: Dict) -> NotificationEvent:
     """
-    Create NotificationEvent and synchronously dispatch webhooks for now.
-    You can later move dispatch into Celery workers.
+    Record the event in the outbox. It commits (or rolls back) with the
+    caller's transaction and is delivered by the deliver_webhooks worker,
+    so no HTTP call ever runs while booking rows are locked.
     """
-    event = NotificationEvent.objects.create(
+    return NotificationEvent.objects.create(
         tenant=tenant,
         event_type=event_type,
         payload=payload,
         status="PENDING",
+        next_attempt_at=timezone.now(),
     )
-    dispatch_event(event)
-    return event
-
-def dispatch_event(event: NotificationEvent):
-    endpoints = WebhookEndpoint.objects.filter(
-        tenant=event.tenant,
-        is_active=True,
-        event_types__contains=[event.event_type],
+
+
+def enqueue_events(events: List[Dict]) -> List[NotificationEvent]:
+    """
+    Bulk enqueue_event for sweepers: one INSERT for many events.
+    Each item is {"tenant_id", "event_type", "payload"}.
+    """
+    now = timezone.now()
+    return NotificationEvent.objects.bulk_create(
+        [
+            NotificationEvent(
+                id=uuid.uuid4(),
+                tenant_id=item["tenant_id"],
+                event_type=item["event_type"],
+                payload=item["payload"],
+                status="PENDING",
+                next_attempt_at=now,
+            )
+            for item in events
+        ]
     )
 
-    if not endpoints.exists():
-        event.status = "SENT"  # nothing to do, but don't leave as pending
-        event.save(update_fields=["status", "updated_at"])
-        return
 
+# ---------------------------
+# Delivery worker
+#
+# fan_out_pending_events: PENDING event -> one WebhookDelivery per endpoint.
+# claim_due_deliveries -> send_deliveries (thread pool, no DB) ->
+# record_delivery_outcomes. Claimed deliveries are leased by pushing
+# next_attempt_at forward, so a crashed worker's rows are picked up again
+# once the lease runs out.
+# ---------------------------
+
+def _lease() -> timedelta:
+    return timedelta(seconds=getattr(settings, "WEBHOOK_CLAIM_LEASE_SECONDS", 60))
+
+
+def endpoints_for_event(event: NotificationEvent) -> List[WebhookEndpoint]:
+    return endpoints_for(event.tenant_id, event.event_type)
+
+
+@transaction.atomic
+def fan_out_pending_events(limit: int) -> int:
+    """
+    Turn up to `limit` PENDING events into delivery rows (one INSERT for
+    the batch). SKIP LOCKED lets several workers share the queue.
+    """
+    now = timezone.now()
+    events = list(
+        NotificationEvent.objects.select_for_update(skip_locked=True)
+        .filter(status="PENDING", next_attempt_at__lte=now)
+        .order_by("next_attempt_at")[:limit]
+    )
+    if not events:
+        return 0
+
+    deliveries, routed, unrouted = [], [], []
+    batching = {}
+    for event in events:
+        endpoints = endpoints_for_event(event)
+        # No subscriber: nothing to do, but don't leave it pending.
+        (routed if endpoints else unrouted).append(event.id)
+        for endpoint in endpoints:
+            due = now
+            if endpoint.batches:
+                # Hold the delivery so a batch can fill up.
+                batching[endpoint.id] = endpoint
+                due = now + timedelta(milliseconds=endpoint.batch_max_wait_ms)
+            deliveries.append(
+                WebhookDelivery(
+                    id=uuid.uuid4(),
+                    tenant_id=event.tenant_id,
+                    event=event,
+                    endpoint=endpoint,
+                    next_attempt_at=due,
+                )
+            )
+    WebhookDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+    for endpoint in batching.values():
+        _release_full_batch(endpoint, now)
+
+    NotificationEvent.objects.filter(id__in=routed).update(status="DELIVERING", updated_at=now)
+    NotificationEvent.objects.filter(id__in=unrouted).update(status="SENT", updated_at=now)
+    return len(events)
+
+
+def _release_full_batch(endpoint: WebhookEndpoint, now) -> None:
+    """
+    Make held deliveries due right away once a full batch is waiting.
+    """
+    held = _held_deliveries(endpoint.id, now)
+    if held.count() >= endpoint.batch_max_events:
+        held.update(next_attempt_at=now)
+
+
+def _held_deliveries(endpoint_id, now):
+    """
+    Deliveries fan-out is holding back for a batching endpoint. Pending
+    deliveries rescheduled by an open circuit wait for the circuit instead.
+    """
+    return WebhookDelivery.objects.filter(
+        endpoint_id=endpoint_id, status="PENDING", next_attempt_at__gt=now
+    ).exclude(last_error=CIRCUIT_OPEN)
+
+
+def _claim_batch_mates(deliveries: List[WebhookDelivery], now) -> List[WebhookDelivery]:
+    """
+    A batch window runs from the endpoint's oldest delivery: once that one
+    is due, lock enough of the endpoint's held deliveries to fill its last
+    batch, so they go out with it instead of each waiting out its own
+    window.
+    """
+    due, endpoints = defaultdict(int), {}
+    for delivery in deliveries:
+        if delivery.endpoint.batches:
+            due[delivery.endpoint_id] += 1
+            endpoints[delivery.endpoint_id] = delivery.endpoint
+
+    mates = []
+    for endpoint_id, count in due.items():
+        room = -count % endpoints[endpoint_id].batch_max_events
+        if room:
+            mates.extend(
+                _held_deliveries(endpoint_id, now)
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("event", "endpoint")
+                .order_by("next_attempt_at")[:room]
+            )
+    return mates
+
+
+def claim_due_deliveries(limit: int) -> List[WebhookDelivery]:
+    """
+    Lock and lease up to `limit` due deliveries, plus the held deliveries
+    that complete a due batch (so a round may return a little more than
+    `limit`).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        deliveries = list(
+            WebhookDelivery.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("event", "endpoint")
+            .filter(status__in=WebhookDelivery.DUE_STATUSES, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:limit]
+        )
+        if deliveries:
+            deliveries += _claim_batch_mates(deliveries, now)
+            WebhookDelivery.objects.filter(id__in=[d.id for d in deliveries]).update(next_attempt_at=now + _lease())
+    return deliveries
+
+
+def dispatch_event(event: NotificationEvent, endpoints: List[WebhookEndpoint]) -> List[DeliveryOutcome]:
+    """
+    POST the event to the given endpoints concurrently over pooled
+    connections, each with its own timeout. Network only, no database
+    access, so it can run on worker threads. Returns one outcome per endpoint.
+    """
     payload_bytes = json.dumps(event.payload).encode("utf-8")
+    default_timeout = getattr(settings, "WEBHOOK_TIMEOUT_SECONDS", 5)
 
-    last_error = ""
-    success_any = False
+    return post_all(
+        [
+            {
+                "endpoint": ep,
+                "url": ep.url,
+                "data": payload_bytes,
+                "headers": {
+                    "Content-Type": "application/json",
+                    "X-GeoConnect-Event": event.event_type,
+                    "X-GeoConnect-Signature": _sign_payload(ep.secret, payload_bytes),
+                },
+                "timeout": ep.timeout_seconds or default_timeout,
+            }
+            for ep in endpoints
+        ]
+    )
 
-    for ep in endpoints:
-        signature = _sign_payload(ep.secret, payload_bytes)
-        headers = {
-            "Content-Type": "application/json",
-            "X-GeoConnect-Event": event.event_type,
-            "X-GeoConnect-Signature": signature,
+
+def dispatch_batch(endpoint: WebhookEndpoint, events: List[NotificationEvent]) -> DeliveryOutcome:
+    """
+    POST several events to a batching endpoint as one request. The HMAC
+    signature covers the whole batch body.
+    """
+    body = json.dumps(
+        {
+            "events": [
+                {
+                    "id": str(event.id),
+                    "event_type": event.event_type,
+                    "created_at": event.created_at.isoformat(),
+                    "payload": event.payload,
+                }
+                for event in events
+            ]
         }
-        try:
-            resp = requests.post(ep.url, data=payload_bytes, headers=headers, timeout=5)
-            if 200 <= resp.status_code < 300:
-                success_any = True
+    ).encode("utf-8")
+    return post(
+        endpoint=endpoint,
+        url=endpoint.url,
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "X-GeoConnect-Event": "batch",
+            "X-GeoConnect-Batch-Size": str(len(events)),
+            "X-GeoConnect-Signature": _sign_payload(endpoint.secret, body),
+        },
+        timeout=endpoint.timeout_seconds or getattr(settings, "WEBHOOK_TIMEOUT_SECONDS", 5),
+    )
+
+
+def _circuit_open(delivery: WebhookDelivery) -> DeliveryOutcome:
+    return DeliveryOutcome(delivery.endpoint, False, None, CIRCUIT_OPEN, None, skipped=True)
+
+
+def send_deliveries(pool, deliveries: List[WebhookDelivery]) -> List[Tuple[WebhookDelivery, DeliveryOutcome]]:
+    """
+    Send claimed deliveries on `pool` (a ThreadPoolExecutor): one
+    dispatch_event per event, so the payload is encoded once, and one
+    dispatch_batch per batch_max_events deliveries of a batching endpoint.
+    Endpoints whose circuit is open get no request; their deliveries come
+    back as skipped. Every real request's outcome feeds the breaker.
+    """
+    by_event, by_batch_endpoint = defaultdict(list), defaultdict(list)
+    for delivery in deliveries:
+        if delivery.endpoint.batches:
+            by_batch_endpoint[delivery.endpoint_id].append(delivery)
+        else:
+            by_event[delivery.event_id].append(delivery)
+
+    results = []
+    futures = []
+    for group in by_event.values():
+        allowed = []
+        for delivery in group:
+            if get_breaker(delivery.endpoint_id).allow():
+                allowed.append(delivery)
             else:
-                last_error = f"Endpoint {ep.url} returned {resp.status_code}"
-        except Exception as exc:  # noqa
-            last_error = str(exc)
-
-    event.attempts += 1
-    event.updated_at = timezone.now()
-    if success_any:
-        event.status = "SENT"
-        event.last_error = ""
-    else:
-        event.status = "FAILED"
-        event.last_error = last_error
-    event.save(update_fields=["status", "attempts", "last_error", "updated_at"])
+                results.append((delivery, _circuit_open(delivery)))
+        if allowed:
+            futures.append((allowed, pool.submit(dispatch_event, allowed[0].event, [d.endpoint for d in allowed])))
+
+    batch_futures = []
+    for group in by_batch_endpoint.values():
+        size = group[0].endpoint.batch_max_events
+        for start in range(0, len(group), size):
+            chunk = group[start:start + size]
+            if not get_breaker(chunk[0].endpoint_id).allow():
+                results.extend((delivery, _circuit_open(delivery)) for delivery in chunk)
+                continue
+            batch_futures.append(
+                (chunk, pool.submit(dispatch_batch, chunk[0].endpoint, [d.event for d in chunk]))
+            )
+
+    for group, future in futures:
+        for delivery, outcome in zip(group, future.result()):
+            get_breaker(delivery.endpoint_id).record(outcome.ok)
+            results.append((delivery, outcome))
+    for chunk, future in batch_futures:
+        outcome = future.result()
+        get_breaker(chunk[0].endpoint_id).record(outcome.ok)
+        results.extend((delivery, outcome) for delivery in chunk)
+    return results
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Exponential backoff with jitter: base * 2^(attempts-1), capped.
+    """
+    base = getattr(settings, "WEBHOOK_BACKOFF_BASE_SECONDS", 10)
+    cap = getattr(settings, "WEBHOOK_BACKOFF_MAX_SECONDS", 3600)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def record_delivery_outcomes(results: List[Tuple[WebhookDelivery, DeliveryOutcome]]) -> None:
+    """
+    Save each delivery's outcome (one bulk UPDATE) and refresh the status
+    of the events involved. Failures are rescheduled with backoff, or
+    dead-lettered after WEBHOOK_MAX_ATTEMPTS.
+    """
+    if not results:
+        return
+    now = timezone.now()
+    max_attempts = getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 8)
+    # A batch shares one outcome; one delay per outcome keeps it together.
+    delays = {}
+    for delivery, outcome in results:
+        delivery.updated_at = now
+        if outcome.skipped:
+            # Circuit open: straight back to the queue for when it half-opens,
+            # without spending an attempt.
+            delivery.last_error = outcome.error
+            delivery.next_attempt_at = get_breaker(delivery.endpoint_id).retry_at()
+            continue
+        delivery.attempts += 1
+        delivery.response_code = outcome.status_code
+        delivery.latency_ms = outcome.latency_ms
+        delivery.last_error = outcome.error
+        if outcome.ok:
+            delivery.status = "SENT"
+            delivery.delivered_at = now
+        elif delivery.attempts >= max_attempts:
+            delivery.status = "DEAD"
+        else:
+            delivery.status = "FAILED"
+            if id(outcome) not in delays:
+                delays[id(outcome)] = retry_delay(delivery.attempts)
+            delivery.next_attempt_at = now + delays[id(outcome)]
+
+    WebhookDelivery.objects.bulk_update(
+        [delivery for delivery, _ in results],
+        [
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "response_code",
+            "latency_ms",
+            "last_error",
+            "delivered_at",
+            "updated_at",
+        ],
+    )
+    refresh_event_statuses({delivery.event_id for delivery, _ in results})
+
+
+def refresh_event_statuses(event_ids) -> None:
+    """
+    Summarize deliveries onto their events: SENT when all are sent, DEAD
+    when one is dead and nothing is left to retry, FAILED while a retry is
+    scheduled, otherwise DELIVERING.
+    """
+    statuses = defaultdict(set)
+    for event_id, status in (
+        WebhookDelivery.objects.filter(event_id__in=event_ids).values_list("event_id", "status").distinct()
+    ):
+        statuses[event_id].add(status)
+
+    by_status = defaultdict(list)
+    for event_id, seen in statuses.items():
+        if seen == {"SENT"}:
+            by_status["SENT"].append(event_id)
+        elif "FAILED" in seen:
+            by_status["FAILED"].append(event_id)
+        elif "PENDING" in seen:
+            by_status["DELIVERING"].append(event_id)
+        else:
+            by_status["DEAD"].append(event_id)
+
+    now = timezone.now()
+    for status, ids in by_status.items():
+        NotificationEvent.objects.filter(id__in=ids).update(status=status, updated_at=now)
+
+
+def deliver_due_events(pool, limit: int) -> Tuple[int, int]:
+    """
+    One worker round: fan out pending events, then claim, send and record
+    due deliveries (first attempts and retries alike). Returns
+    (events fanned out, deliveries sent).
+    """
+    sync_routes()
+    fanned_out = fan_out_pending_events(limit)
+    deliveries = claim_due_deliveries(limit)
+    record_delivery_outcomes(send_deliveries(pool, deliveries))
+    persist_circuits(delivery.endpoint for delivery in deliveries)
+    return fanned_out, len(deliveries)
+
+
+def redeliver(deliveries) -> int:
+    """
+    Queue a filtered WebhookDelivery queryset for immediate resend, with a
+    fresh attempt budget. Two UPDATEs whatever the size of the set.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Events first: the delivery filter may stop matching once updated.
+        NotificationEvent.objects.filter(id__in=deliveries.values("event_id")).update(
+            status="DELIVERING", updated_at=now
+        )
+        return WebhookDelivery.objects.filter(id__in=deliveries.values("id")).update(
+            status="PENDING", attempts=0, next_attempt_at=now, last_error="", updated_at=now
+        )
 
 
 def _sign_payload(secret: str, payload: bytes) -> str:
@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.tenancy.models import Tenant
+
+from .models import NotificationEvent, WebhookDelivery, WebhookEndpoint
+from .services import deliver_due_events, enqueue_event, refresh_event_statuses
+from .transport import DeliveryOutcome
+
+
+def _fake_post(endpoint, url, data, headers, timeout):
+    """
+    Stand-in for transport.post: URLs containing "fail" answer 500.
+    """
+    ok = "fail" not in url
+    return DeliveryOutcome(endpoint, ok, 200 if ok else 500, "" if ok else f"Endpoint {url} returned 500", 5)
+
+
+@mock.patch("apps.notifications.transport.post", _fake_post)
+class DeliveryWorkerTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Acme", slug="acme", primary_domain="acme.example.com")
+        self.good = self.endpoint("good", "https://good.example.com/hook")
+        self.bad = self.endpoint("bad", "https://fail.example.com/hook")
+        self.pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.pool.shutdown)
+
+    def endpoint(self, name: str, url: str) -> WebhookEndpoint:
+        return WebhookEndpoint.objects.create(
+            tenant=self.tenant, name=name, url=url, secret="s3cret", event_types=["booking.created"]
+        )
+
+    def run_worker(self):
+        return deliver_due_events(self.pool, limit=50)
+
+    def make_due(self):
+        WebhookDelivery.objects.filter(status="FAILED").update(next_attempt_at=timezone.now())
+
+    def test_retries_only_the_failed_endpoint(self):
+        event = enqueue_event(self.tenant, "booking.created", {"booking_id": "b1"})
+
+        self.assertEqual(self.run_worker(), (1, 2))
+        good = WebhookDelivery.objects.get(event=event, endpoint=self.good)
+        bad = WebhookDelivery.objects.get(event=event, endpoint=self.bad)
+        self.assertEqual((good.status, good.attempts), ("SENT", 1))
+        self.assertEqual((bad.status, bad.attempts), ("FAILED", 1))
+        self.assertGreater(bad.next_attempt_at, timezone.now())
+        self.assertEqual(NotificationEvent.objects.get(pk=event.pk).status, "FAILED")
+
+        self.make_due()
+        self.assertEqual(self.run_worker(), (0, 1))
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual(good.attempts, 1)
+        self.assertEqual(bad.attempts, 2)
+
+    def test_failed_delivery_backs_off(self):
+        event = enqueue_event(self.tenant, "booking.created", {"booking_id": "b1"})
+
+        self.run_worker()
+        bad = WebhookDelivery.objects.get(event=event, endpoint=self.bad)
+        self.assertEqual((bad.status, bad.attempts), ("FAILED", 1))
+        self.assertGreater(bad.next_attempt_at, timezone.now())
+
+        # Not due yet: the next round sends nothing.
+        self.assertEqual(self.run_worker(), (0, 0))
+
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=3)
+    def test_dead_letters_after_max_attempts(self):
+        event = enqueue_event(self.tenant, "booking.created", {"booking_id": "b1"})
+
+        self.run_worker()
+        for _ in range(2):
+            self.make_due()
+            self.run_worker()
+
+        bad = WebhookDelivery.objects.get(event=event, endpoint=self.bad)
+        self.assertEqual((bad.status, bad.attempts), ("DEAD", 3))
+        self.assertEqual(NotificationEvent.objects.get(pk=event.pk).status, "DEAD")
+
+        # Nothing is left to claim.
+        self.make_due()
+        self.assertEqual(self.run_worker(), (0, 0))
+
+    def test_event_without_subscribers_is_closed(self):
+        event = enqueue_event(self.tenant, "booking.expired", {"booking_id": "b1"})
+
+        self.assertEqual(self.run_worker(), (1, 0))
+        self.assertEqual(NotificationEvent.objects.get(pk=event.pk).status, "SENT")
+
+
+class RefreshEventStatusesTests(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Acme", slug="acme", primary_domain="acme.example.com")
+        self.endpoints = [
+            WebhookEndpoint.objects.create(
+                tenant=self.tenant, name=f"ep{i}", url=f"https://ep{i}.example.com/hook", secret="s3cret"
+            )
+            for i in range(2)
+        ]
+
+    def event_with(self, *statuses) -> NotificationEvent:
+        event = NotificationEvent.objects.create(
+            tenant=self.tenant, event_type="booking.created", status="DELIVERING"
+        )
+        for endpoint, status in zip(self.endpoints, statuses):
+            WebhookDelivery.objects.create(
+                tenant=self.tenant,
+                event=event,
+                endpoint=endpoint,
+                status=status,
+                next_attempt_at=timezone.now() + timedelta(minutes=1),
+            )
+        return event
+
+    def test_summaries(self):
+        cases = {
+            ("SENT", "SENT"): "SENT",
+            ("SENT", "FAILED"): "FAILED",
+            ("DEAD", "FAILED"): "FAILED",
+            ("SENT", "PENDING"): "DELIVERING",
+            ("DEAD", "PENDING"): "DELIVERING",
+            ("SENT", "DEAD"): "DEAD",
+        }
+        events = {statuses: self.event_with(*statuses) for statuses in cases}
+
+        refresh_event_statuses([event.id for event in events.values()])
+
+        for statuses, expected in cases.items():
+            with self.subTest(statuses=statuses):
+                self.assertEqual(NotificationEvent.objects.get(pk=events[statuses].pk).status, expected)
@@ -0,0 +1,113 @@
+"""
+HTTP side of webhook delivery: one keep-alive connection pool per
+endpoint host, and concurrent fan-out of one payload to many endpoints.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .breaker import get_limit
+
+
+class DeliveryOutcome:
+    """
+    Result of one POST to one endpoint. `skipped` means no request was
+    made (circuit open) and the delivery should simply be rescheduled.
+    """
+
+    __slots__ = ("endpoint", "ok", "status_code", "error", "latency_ms", "skipped")
+
+    def __init__(
+        self,
+        endpoint,
+        ok: bool,
+        status_code: Optional[int],
+        error: str,
+        latency_ms: Optional[int],
+        skipped: bool = False,
+    ):
+        self.endpoint = endpoint
+        self.ok = ok
+        self.status_code = status_code
+        self.error = error
+        self.latency_ms = latency_ms
+        self.skipped = skipped
+
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+_fanout_pool: Optional[ThreadPoolExecutor] = None
+_fanout_pool_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Shared Session for the URL's scheme://host:port, so repeat deliveries
+    reuse open TCP/TLS connections instead of handshaking every time.
+    """
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=getattr(settings, "WEBHOOK_POOL_MAXSIZE", 10),
+                max_retries=0,  # retries are the outbox's job
+            )
+            session.mount(key, adapter)
+            _sessions[key] = session
+        return session
+
+
+def _fanout_executor() -> ThreadPoolExecutor:
+    global _fanout_pool
+    with _fanout_pool_lock:
+        if _fanout_pool is None:
+            _fanout_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, "WEBHOOK_FANOUT_THREADS", 32),
+                thread_name_prefix="webhook-fanout",
+            )
+        return _fanout_pool
+
+
+def post(endpoint, url: str, data: bytes, headers: Dict, timeout: float) -> DeliveryOutcome:
+    """
+    One POST, within the endpoint's adaptive concurrency limit, which is
+    fed the outcome and latency.
+    """
+    limit = get_limit(endpoint.id)
+    with limit.slot():
+        started = time.perf_counter()
+        try:
+            resp = get_session(url).post(url, data=data, headers=headers, timeout=timeout)
+            resp.close()
+            ok = 200 <= resp.status_code < 300
+            error = "" if ok else f"Endpoint {url} returned {resp.status_code}"
+            status_code = resp.status_code
+        except Exception as exc:  # noqa
+            ok, status_code, error = False, None, str(exc)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+    limit.record(ok, latency_ms)
+    return DeliveryOutcome(endpoint, ok, status_code, error, latency_ms)
+
+
+def post_all(requests_to_send: List[Dict]) -> List[DeliveryOutcome]:
+    """
+    Send every request concurrently and return outcomes in the same order.
+    Items are post() keyword arguments. Wall time is roughly that of the
+    slowest endpoint; each request keeps its own timeout.
+    """
+    if len(requests_to_send) == 1:
+        return [post(**requests_to_send[0])]
+    pool = _fanout_executor()
+    futures = [pool.submit(post, **item) for item in requests_to_send]
+    return [future.result() for future in futures]
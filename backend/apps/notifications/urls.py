@@ -1,5 +1,11 @@
 from django.urls import path
-from .views import WebhookEndpointListCreateView, WebhookEndpointDetailView
+from .views import (
+    WebhookCircuitListView,
+    WebhookDeliveryListView,
+    WebhookEndpointDetailView,
+    WebhookEndpointListCreateView,
+    WebhookRedeliverView,
+)
 
 urlpatterns = [
     path(
@@ -12,4 +18,19 @@ urlpatterns = [
         WebhookEndpointDetailView.as_view(),
         name="admin-webhooks-detail",
     ),
+    path(
+        "notifications/deliveries",
+        WebhookDeliveryListView.as_view(),
+        name="admin-webhook-deliveries-list",
+    ),
+    path(
+        "notifications/deliveries/redeliver",
+        WebhookRedeliverView.as_view(),
+        name="admin-webhook-deliveries-redeliver",
+    ),
+    path(
+        "notifications/circuits",
+        WebhookCircuitListView.as_view(),
+        name="admin-webhook-circuits-list",
+    ),
 ]
@@ -1,10 +1,17 @@
-from rest_framework import generics
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from apps.iam.permissions import IsTenantAdmin
-from .models import WebhookEndpoint
-from .serializers import WebhookEndpointSerializer
+from .models import WebhookDelivery, WebhookEndpoint, WebhookEndpointCircuit
+from .serializers import (
+    WebhookDeliverySerializer,
+    WebhookEndpointCircuitSerializer,
+    WebhookEndpointSerializer,
+    WebhookRedeliverySerializer,
+)
+from .routing import invalidate_routes
+from .services import redeliver
 
 
 class WebhookEndpointListCreateView(generics.ListCreateAPIView):
@@ -16,6 +23,7 @@ class WebhookEndpointListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(tenant=self.request.tenant)
+        invalidate_routes()
 
 
 class WebhookEndpointDetailView(generics.RetrieveUpdateAPIView):
@@ -25,3 +33,83 @@ class WebhookEndpointDetailView(generics.RetrieveUpdateAPIView):
 
     def get_queryset(self):
         return WebhookEndpoint.objects.filter(tenant=self.request.tenant)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_routes()
+
+
+class WebhookDeliveryListView(generics.ListAPIView):
+    """
+    GET /api/v1/admin/notifications/deliveries?status=&endpoint_id=&event_type=&event_id=&limit=
+    """
+
+    permission_classes = [IsAuthenticated, IsTenantAdmin]
+    serializer_class = WebhookDeliverySerializer
+
+    def get_queryset(self):
+        qs = WebhookDelivery.objects.filter(tenant=self.request.tenant).select_related("event")
+        params = self.request.query_params
+        if params.get("status"):
+            qs = qs.filter(status=params["status"])
+        if params.get("endpoint_id"):
+            qs = qs.filter(endpoint_id=params["endpoint_id"])
+        if params.get("event_type"):
+            qs = qs.filter(event__event_type=params["event_type"])
+        if params.get("event_id"):
+            qs = qs.filter(event_id=params["event_id"])
+        try:
+            limit = min(int(params.get("limit", 100)), 1000)
+        except ValueError:
+            limit = 100
+        return qs.order_by("-created_at")[:limit]
+
+
+class WebhookRedeliverView(generics.GenericAPIView):
+    """
+    POST /api/v1/admin/notifications/deliveries/redeliver
+
+    Re-queue the matching deliveries (by default all FAILED/DEAD ones) for
+    the worker to resend; only those endpoints are contacted again.
+    """
+
+    permission_classes = [IsAuthenticated, IsTenantAdmin]
+    serializer_class = WebhookRedeliverySerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        qs = WebhookDelivery.objects.filter(tenant=request.tenant, status__in=data["statuses"])
+        if data.get("delivery_ids"):
+            qs = qs.filter(id__in=data["delivery_ids"])
+        if data.get("endpoint_id"):
+            qs = qs.filter(endpoint_id=data["endpoint_id"])
+        if data.get("event_type"):
+            qs = qs.filter(event__event_type=data["event_type"])
+        if data.get("created_from"):
+            qs = qs.filter(created_at__gte=data["created_from"])
+        if data.get("created_until"):
+            qs = qs.filter(created_at__lt=data["created_until"])
+
+        return Response({"requeued": redeliver(qs)}, status=status.HTTP_202_ACCEPTED)
+
+
+class WebhookCircuitListView(generics.ListAPIView):
+    """
+    GET /api/v1/admin/notifications/circuits?state=OPEN
+
+    Circuit breaker state, trip counts and current concurrency limit per
+    endpoint, as last reported by the delivery worker.
+    """
+
+    permission_classes = [IsAuthenticated, IsTenantAdmin]
+    serializer_class = WebhookEndpointCircuitSerializer
+
+    def get_queryset(self):
+        qs = WebhookEndpointCircuit.objects.filter(tenant=self.request.tenant).select_related("endpoint")
+        state = self.request.query_params.get("state")
+        if state:
+            qs = qs.filter(state=state)
+        return qs.order_by("-trip_count", "endpoint__name")
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import HealthCheckView, ReadinessCheckView
+from .views import HealthCheckView, MetricsView, ReadinessCheckView
 
 urlpatterns = [
     path("health", HealthCheckView.as_view(), name="health-check"),
     path("readiness", ReadinessCheckView.as_view(), name="readiness-check"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
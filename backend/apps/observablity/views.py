@@ -1,10 +1,15 @@
+import os
+
 from django.db import connections
 from django.db.utils import OperationalError
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.core import metrics
+from apps.iam.permissions import IsPlatformSuperAdmin
+
 
 class HealthCheckView(APIView):
     """
@@ -65,3 +70,18 @@ class ReadinessCheckView(APIView):
             },
             status=status_code,
         )
+
+
+class MetricsView(APIView):
+    """
+    GET /api/v1/metrics (platform super admins only)
+
+    Internal counters (cache hit/miss etc.) of the one worker process that
+    served this request, not of the whole deployment: counters live in
+    process memory, so each scrape sees a single worker's numbers. "pid"
+    tells the workers apart.
+    """
+    permission_classes = [IsAuthenticated, IsPlatformSuperAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"pid": os.getpid(), "counters": metrics.snapshot()}, status=status.HTTP_200_OK)
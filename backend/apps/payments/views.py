@@ -5,7 +5,7 @@ from rest_framework.views import APIView
 
 from .models import PaymentTransaction
 from .services import mark_payment_success, mark_payment_failed
-from apps.bookings.services import confirm_booking_and_issue_tickets
+from apps.bookings.services import confirm_booking_and_issue_tickets, mark_booking_payment_failed
 from apps.core.services import register_idempotency_key, IdempotencyError
 
 
@@ -97,9 +97,7 @@ class PaymentWebhookView(APIView):
         elif status_str in ["failed", "error"]:
             payment = mark_payment_failed(payment, payload)
             booking = payment.booking
-            if booking.status == "PENDING_PAYMENT":
-                booking.status = "PAYMENT_FAILED"
-                booking.save(update_fields=["status", "updated_at"])
+            mark_booking_payment_failed(booking)
             response_body = {
                 "received": True,
                 "booking_id": str(booking.id),
@@ -1,6 +1,6 @@
 from rest_framework.permissions import BasePermission
 from apps.iam.models import User
-from .models import Provider
+from .registry import get_provider_for_tenant
 
 
 class IsProviderUserOrTenantAdmin(BasePermission):
@@ -27,9 +27,8 @@ class IsProviderUserOrTenantAdmin(BasePermission):
         if not provider_id:
             return False
 
-        try:
-            provider = Provider.objects.get(id=provider_id, tenant=tenant)
-        except Provider.DoesNotExist:
+        provider = get_provider_for_tenant(tenant.id if tenant else None, provider_id)
+        if provider is None:
             return False
 
         request.provider = provider  # attach for later use
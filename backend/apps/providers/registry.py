@@ -0,0 +1,49 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from apps.core import metrics
+from apps.core.cache import VersionedLRUCache
+
+from .models import Provider
+
+PROVIDERS_VERSION_NAMESPACE = "providers.context"
+
+_MISSING = object()
+
+_entries = VersionedLRUCache(
+    PROVIDERS_VERSION_NAMESPACE,
+    max_entries=getattr(settings, "PROVIDER_CONTEXT_MAX_ENTRIES", 8192),
+    ttl_seconds=getattr(settings, "PROVIDER_CONTEXT_TTL_SECONDS", 15),
+    check_interval_seconds=getattr(settings, "PROVIDER_CONTEXT_VERSION_CHECK_SECONDS", 1.0),
+)
+
+
+def get_provider_for_tenant(tenant_id, provider_id) -> Optional[Provider]:
+    """
+    Provider with this id inside the tenant, or None. Served from a short-TTL
+    in-process cache; instances are shared and must be treated as read-only.
+    """
+    if tenant_id is None or not provider_id:
+        return None
+
+    key = (str(tenant_id), str(provider_id))
+    cached = _entries.get(key)
+    if cached is not None:
+        metrics.incr("providers.lookup.cache_hit")
+        return None if cached is _MISSING else cached
+
+    metrics.incr("providers.lookup.cache_miss")
+    try:
+        provider = Provider.objects.get(id=provider_id, tenant_id=tenant_id)
+    except (Provider.DoesNotExist, ValidationError, ValueError):
+        _entries.set(key, _MISSING)
+        return None
+
+    _entries.set(key, provider)
+    return provider
+
+
+def invalidate_provider(provider: Provider) -> None:
+    _entries.invalidate((str(provider.tenant_id), str(provider.id)))
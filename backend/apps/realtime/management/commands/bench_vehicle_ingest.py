@@ -0,0 +1,85 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.catalog.models import Trip
+from apps.providers.models import Provider
+from apps.realtime.services import ingest_vehicle_locations, parse_vehicle_location
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark vehicle location ingest (parse + trip resolution + write) "
+        "against the configured database. Writes are rolled back unless --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--provider", help="Provider id to ingest for (required unless --parse-only).")
+        parser.add_argument("--pings", type=int, default=50000)
+        parser.add_argument("--batch", type=int, default=5000, help="Pings per request-sized batch.")
+        parser.add_argument("--vehicles", type=int, default=2000)
+        parser.add_argument("--parse-only", action="store_true", help="Measure row parsing only (no database).")
+        parser.add_argument("--keep", action="store_true", help="Commit the rows instead of rolling back.")
+
+    def handle(self, *args, **options):
+        provider = None
+        trip_ids = []
+        if not options["parse_only"]:
+            if not options["provider"]:
+                raise CommandError("--provider is required unless --parse-only is given.")
+            provider = Provider.objects.select_related("tenant").get(id=options["provider"])
+            trip_ids = [
+                str(t) for t in Trip.objects.filter(provider=provider).values_list("id", flat=True)[:500]
+            ]
+
+        pings = self._pings(options["pings"], options["vehicles"], trip_ids)
+        batch = options["batch"]
+
+        started = time.perf_counter()
+        if options["parse_only"]:
+            for ping in pings:
+                parse_vehicle_location(ping)
+        else:
+            try:
+                with transaction.atomic():
+                    for i in range(0, len(pings), batch):
+                        ingest_vehicle_locations(provider.tenant, provider, pings[i : i + batch])
+                    if not options["keep"]:
+                        raise _Rollback()
+            except _Rollback:
+                pass
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"pings={len(pings)} batch={batch} elapsed={elapsed:.3f}s "
+            f"rate={len(pings) / elapsed:,.0f} pings/s"
+            + (" (parse only)" if options["parse_only"] else "")
+        )
+
+    def _pings(self, count: int, vehicles: int, trip_ids):
+        rnd = random.Random(7)
+        base = timezone.now()
+        pings = []
+        for i in range(count):
+            ping = {
+                "vehicle_id": f"VEH-{i % vehicles:05d}",
+                "lat": 6.4 + rnd.random(),
+                "lng": 3.3 + rnd.random(),
+                "speed_kmh": rnd.uniform(0, 90),
+                "heading_deg": rnd.uniform(0, 360),
+                "timestamp": (base + timedelta(seconds=i // vehicles)).isoformat(),
+                "occupancy": {"capacity": 40, "seats_taken": rnd.randint(0, 40)},
+                "status": "IN_SERVICE",
+            }
+            if trip_ids:
+                ping["trip_id"] = trip_ids[i % len(trip_ids)]
+            pings.append(ping)
+        return pings
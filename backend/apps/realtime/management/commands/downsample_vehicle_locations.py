@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.realtime.models import VehicleLocation, VehicleTrajectoryMinute
+from apps.realtime.services import summarize_vehicle_minutes
+
+
+class Command(BaseCommand):
+    help = (
+        "Compact vehicle_location pings into per-minute VehicleTrajectoryMinute "
+        "rows. Continues from the last summarized minute; pings arriving after "
+        "their minute was summarized are folded in when partition retention "
+        "(manage_vehicle_location_partitions) re-summarizes a partition before "
+        "dropping it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lag-minutes",
+            type=int,
+            default=None,
+            help="Only summarize minutes at least this old (late pings settle first).",
+        )
+        parser.add_argument("--since", help="ISO datetime to (re)summarize from; default: after the last run.")
+        parser.add_argument("--window-minutes", type=int, default=60, help="Minutes aggregated per transaction.")
+
+    def handle(self, *args, **options):
+        lag = options["lag_minutes"]
+        if lag is None:
+            lag = getattr(settings, "VEHICLE_TRAJECTORY_LAG_MINUTES", 10)
+        until = (timezone.now() - timedelta(minutes=lag)).replace(second=0, microsecond=0)
+
+        if options["since"]:
+            since = parse_datetime(options["since"])
+        else:
+            last = VehicleTrajectoryMinute.objects.aggregate(last=Max("minute"))["last"]
+            if last is not None:
+                since = last + timedelta(minutes=1)
+            else:
+                since = VehicleLocation.objects.aggregate(first=Min("recorded_at"))["first"]
+                if since is not None:
+                    since = since.replace(second=0, microsecond=0)
+
+        if since is None or since >= until:
+            self.stdout.write("Nothing to downsample.")
+            return
+
+        window = timedelta(minutes=options["window_minutes"])
+        total = 0
+        start = since
+        while start < until:
+            end = min(start + window, until)
+            total += summarize_vehicle_minutes(start, end)
+            start = end
+
+        self.stdout.write(f"Summarized {since.isoformat()} .. {until.isoformat()}: {total} vehicle-minutes.")
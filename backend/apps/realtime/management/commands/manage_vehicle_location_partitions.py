@@ -0,0 +1,273 @@
+import re
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+
+from apps.realtime.models import VehicleLocation, VehicleTrajectoryMinute
+from apps.realtime.services import retention_cutoff, summarize_vehicle_minutes
+
+TABLE = VehicleLocation._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+
+def _start_of_period(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _step(period: str) -> timedelta:
+    return timedelta(days=7 if period == "week" else 1)
+
+
+def _utc(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain range partitions of vehicle_location on recorded_at: create "
+        "upcoming partitions and drop those past retention. Run with --init "
+        "once to convert the table. PostgreSQL only. An expired partition is "
+        "re-summarized into vehicle_trajectory_minute right before it is "
+        "dropped, so late pings in already-summarized minutes are kept. Expired "
+        "rows in the default partition are deleted as well."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--init", action="store_true", help="Convert vehicle_location to a partitioned table.")
+        parser.add_argument("--period", choices=["day", "week"], default=None)
+        parser.add_argument("--ahead", type=int, default=3, help="Partitions to keep created ahead of today.")
+        parser.add_argument("--retention-days", type=int, default=None)
+        parser.add_argument(
+            "--force-drop",
+            action="store_true",
+            help="Drop expired partitions even if they have not been downsampled yet.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning requires PostgreSQL.")
+
+        self.dry_run = options["dry_run"]
+        period = options["period"] or getattr(settings, "VEHICLE_LOCATION_PARTITION_PERIOD", "day")
+        retention_days = options["retention_days"]
+        if retention_days is None:
+            retention_days = getattr(settings, "VEHICLE_LOCATION_RETENTION_DAYS", 7)
+
+        if options["init"]:
+            self._init(period)
+            if self.dry_run:
+                return
+
+        if not self._is_partitioned():
+            raise CommandError(f"{TABLE} is not partitioned yet; run with --init first.")
+
+        today = datetime.now(dt_timezone.utc).date()
+        first = _start_of_period(today, period) - _step(period)
+        for i in range(options["ahead"] + 2):
+            start = first + _step(period) * i
+            self._ensure_partition(start, start + _step(period))
+
+        self._drop_expired(retention_cutoff(retention_days), options["force_drop"])
+
+    # ---------------------------
+    # DDL helpers
+    # ---------------------------
+
+    def _execute(self, sql: str, params=None) -> None:
+        self.stdout.write(sql if params is None else f"{sql} -- {params}")
+        if not self.dry_run:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+
+    def _is_partitioned(self) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+            return cursor.fetchone() is not None
+
+    def _partitions(self):
+        """
+        {start date: partition name} for the dated partitions.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = %s::regclass",
+                [TABLE],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        found = {}
+        for name in names:
+            match = PARTITION_RE.match(name)
+            if match:
+                found[datetime.strptime(match.group(1), "%Y%m%d").date()] = name
+        return found
+
+    @transaction.atomic
+    def _init(self, period: str) -> None:
+        if self._is_partitioned():
+            self.stdout.write(f"{TABLE} is already partitioned.")
+            return
+
+        legacy = f"{TABLE}_legacy"
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT min(recorded_at), max(recorded_at) FROM {TABLE}")
+            oldest, newest = cursor.fetchone()
+
+        self._execute(f"ALTER TABLE {TABLE} RENAME TO {legacy}")
+        # A partition's primary key must match the parent's (id, recorded_at).
+        self._execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {TABLE}_pkey")
+        self._execute(f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY (id, recorded_at)")
+        self._execute(
+            f"CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            "PARTITION BY RANGE (recorded_at)"
+        )
+        # Unique keys on a partitioned table must include the partition key.
+        self._execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, recorded_at)")
+        for index in VehicleLocation._meta.indexes:
+            columns = ", ".join(VehicleLocation._meta.get_field(f).column for f in index.fields)
+            self._execute(f"CREATE INDEX ON {TABLE} ({columns})")
+        # LIKE copies neither foreign keys nor indexes. Declared on the parent,
+        # both are cloned onto every partition as it is attached.
+        for field in VehicleLocation._meta.concrete_fields:
+            if field.is_relation and field.db_constraint:
+                target = field.target_field
+                self._execute(
+                    f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_{field.column}_fk "
+                    f"FOREIGN KEY ({field.column}) "
+                    f"REFERENCES {target.model._meta.db_table} ({target.column}) "
+                    "DEFERRABLE INITIALLY DEFERRED"
+                )
+        self._execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+        # Existing rows: everything before the first dated partition stays in
+        # the legacy table, attached as one partition, and ages out with it.
+        if oldest is None:
+            self._execute(f"DROP TABLE {legacy}")
+            return
+        boundary = _start_of_period(newest.date(), period) + _step(period)
+        self._execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s)",
+            [_utc(boundary)],
+        )
+        self._execute(f"ALTER TABLE {legacy} RENAME TO {TABLE}_p{oldest.date():%Y%m%d}")
+
+    def _ensure_partition(self, start: date, end: date) -> None:
+        existing = self._partitions()
+        if start in existing:
+            return
+        # Ranges must not overlap an existing (e.g. converted legacy) partition.
+        for name in existing.values():
+            lower, upper = self._bounds(name)
+            if (lower is None or lower < _utc(end)) and upper > _utc(start):
+                return
+
+        name = f"{TABLE}_p{start:%Y%m%d}"
+        with transaction.atomic():
+            # Indexes, the primary key and foreign keys come from the parent
+            # on ATTACH PARTITION below.
+            self._execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            # Early / late pings may already sit in the default partition.
+            self._execute(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE recorded_at >= %s AND recorded_at < %s RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved",
+                [_utc(start), _utc(end)],
+            )
+            self._execute(
+                f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+                [_utc(start), _utc(end)],
+            )
+
+    def _bounds(self, name: str):
+        """
+        (lower, upper) of a partition; lower is None for MINVALUE.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c WHERE c.relname = %s",
+                [name],
+            )
+            bound = cursor.fetchone()[0]
+        # FOR VALUES FROM ('2026-01-01 00:00:00+00') TO ('2026-01-02 00:00:00+00')
+        lower, upper = (
+            part.strip().strip("()").strip("'") for part in bound.split("FROM", 1)[1].split(" TO ", 1)
+        )
+        return (
+            None if lower == "MINVALUE" else datetime.fromisoformat(lower),
+            datetime.fromisoformat(upper),
+        )
+
+    def _has_rows_after(self, name: str, after) -> bool:
+        with connection.cursor() as cursor:
+            if after is None:
+                cursor.execute(f"SELECT 1 FROM {name} LIMIT 1")
+            else:
+                cursor.execute(f"SELECT 1 FROM {name} WHERE recorded_at >= %s LIMIT 1", [after])
+            return cursor.fetchone() is not None
+
+    def _resummarize(self, name: str, lower, upper) -> None:
+        """
+        Fold late pings into the partition's minute summaries. Inserts into
+        the partition are blocked until the surrounding transaction (which
+        drops it) ends, so nothing lands after the summary is taken.
+        """
+        self._execute(f"LOCK TABLE {name} IN SHARE MODE")
+        if self.dry_run:
+            return
+        if lower is None:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT min(recorded_at) FROM {name}")
+                lower = cursor.fetchone()[0]
+            if lower is None:
+                return
+            lower = lower.replace(second=0, microsecond=0)
+        written = summarize_vehicle_minutes(lower, upper)
+        self.stdout.write(f"Re-summarized {name}: {written} vehicle-minutes.")
+
+    def _drop_expired(self, cutoff: datetime, force: bool) -> None:
+        last_minute = VehicleTrajectoryMinute.objects.aggregate(last=Max("minute"))["last"]
+        downsampled_until = last_minute + timedelta(minutes=1) if last_minute else None
+
+        for start, name in sorted(self._partitions().items()):
+            lower, upper = self._bounds(name)
+            if upper > cutoff:
+                continue
+            if not force and self._has_rows_after(name, downsampled_until):
+                self.stdout.write(
+                    self.style.WARNING(f"Skipping {name}: not downsampled yet (run downsample_vehicle_locations).")
+                )
+                continue
+            with transaction.atomic():
+                self._resummarize(name, lower, upper)
+                self._execute(f"DROP TABLE {name}")
+
+        self._purge_default(cutoff, downsampled_until, force)
+
+    def _purge_default(self, cutoff: datetime, downsampled_until, force: bool) -> None:
+        """
+        Delete default-partition rows past retention. Ingest rejects pings
+        that old, so these are rows from before that check or from a gap
+        between dated partitions; like a partition, they wait until they
+        have been downsampled.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT max(recorded_at) FROM {DEFAULT_PARTITION} WHERE recorded_at < %s", [cutoff])
+            newest = cursor.fetchone()[0]
+        if newest is None:
+            return
+        if not force and (downsampled_until is None or newest >= downsampled_until):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Skipping expired rows in {DEFAULT_PARTITION}: not downsampled yet "
+                    "(run downsample_vehicle_locations)."
+                )
+            )
+            return
+        self._execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE recorded_at < %s", [cutoff])
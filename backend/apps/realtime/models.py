@@ -34,6 +34,8 @@ class VehicleLocation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # Range-partitioned by recorded_at in PostgreSQL (primary key becomes
+        # (id, recorded_at)); see the manage_vehicle_location_partitions command.
         db_table = "vehicle_location"
         indexes = [
             models.Index(fields=["tenant", "provider", "vehicle_id", "recorded_at"]),
@@ -41,6 +43,76 @@ class VehicleLocation(models.Model):
         ]
 
 
+class VehicleLatestPosition(models.Model):
+    """
+    Last known position per vehicle, upserted on ingest so "where is the
+    fleet now" never has to scan vehicle_location.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="vehicle_latest_positions")
+    provider = models.ForeignKey(Provider, on_delete=models.CASCADE, related_name="vehicle_latest_positions")
+    trip = models.ForeignKey(
+        Trip, on_delete=models.SET_NULL, null=True, blank=True, related_name="vehicle_latest_positions"
+    )
+
+    vehicle_id = models.CharField(max_length=64)
+    lat = models.FloatField()
+    lng = models.FloatField()
+    speed_kmh = models.FloatField(null=True, blank=True)
+    heading_deg = models.FloatField(null=True, blank=True)
+
+    occupancy_capacity = models.PositiveIntegerField(default=0)
+    occupancy_taken = models.PositiveIntegerField(default=0)
+
+    status = models.CharField(max_length=32, default="IN_SERVICE")
+
+    recorded_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "vehicle_latest_position"
+        unique_together = ("tenant", "provider", "vehicle_id")
+        indexes = [
+            models.Index(fields=["tenant", "trip"]),
+        ]
+
+
+class VehicleTrajectoryMinute(models.Model):
+    """
+    Per-minute summary of a vehicle's pings, written by the
+    downsample_vehicle_locations command before raw partitions are dropped.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="vehicle_trajectory_minutes")
+    provider = models.ForeignKey(Provider, on_delete=models.CASCADE, related_name="vehicle_trajectory_minutes")
+    trip = models.ForeignKey(
+        Trip, on_delete=models.SET_NULL, null=True, blank=True, related_name="vehicle_trajectory_minutes"
+    )
+
+    vehicle_id = models.CharField(max_length=64)
+    minute = models.DateTimeField()
+
+    lat = models.FloatField()
+    lng = models.FloatField()
+    speed_avg_kmh = models.FloatField(null=True, blank=True)
+    speed_max_kmh = models.FloatField(null=True, blank=True)
+    occupancy_taken_max = models.PositiveIntegerField(default=0)
+
+    samples = models.PositiveIntegerField(default=0)
+    first_recorded_at = models.DateTimeField()
+    last_recorded_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "vehicle_trajectory_minute"
+        indexes = [
+            models.Index(fields=["tenant", "provider", "vehicle_id", "minute"]),
+            models.Index(fields=["tenant", "trip", "minute"]),
+            models.Index(fields=["minute"]),
+        ]
+
+
 class TripStatus(models.Model):
     STATUS_CHOICES = [
         ("SCHEDULED", "Scheduled"),
@@ -64,11 +136,10 @@ class TripStatus(models.Model):
 
     class Meta:
         db_table = "trip_status"
-        indexes = [
-            models.Index(fields=["tenant", "provider", "trip"]),
-        ]
+        # One status row per trip; also the conflict target of the bulk upsert.
+        unique_together = ("tenant", "provider", "trip")
 
-  class TripInventory(models.Model):
+class TripInventory(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="trip_inventories")
     provider = models.ForeignKey(Provider, on_delete=models.CASCADE, related_name="trip_inventories")
@@ -1,17 +1,23 @@
 from rest_framework import serializers
-from .models import VehicleLocation, TripStatus, TripInventory, ServiceAlert
-
-
-class VehicleLocationInputSerializer(serializers.Serializer):
-    vehicle_id = serializers.CharField(max_length=64)
-    trip_id = serializers.UUIDField(required=False)
-    lat = serializers.FloatField()
-    lng = serializers.FloatField()
-    speed_kmh = serializers.FloatField(required=False, allow_null=True)
-    heading_deg = serializers.FloatField(required=False, allow_null=True)
-    timestamp = serializers.DateTimeField()
-    occupancy = serializers.DictField(required=False)
-    status = serializers.CharField(max_length=32, required=False)
+from .models import VehicleLatestPosition, VehicleLocation, TripStatus, TripInventory, ServiceAlert
+
+
+class VehicleLatestPositionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VehicleLatestPosition
+        fields = [
+            "vehicle_id",
+            "trip",
+            "lat",
+            "lng",
+            "speed_kmh",
+            "heading_deg",
+            "occupancy_capacity",
+            "occupancy_taken",
+            "status",
+            "recorded_at",
+        ]
+        read_only_fields = fields
 
 
 class TripStatusInputSerializer(serializers.Serializer):
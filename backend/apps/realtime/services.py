@@ -0,0 +1,497 @@
+import csv
+import io
+import math
+import uuid
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.catalog.models import Trip
+from apps.catalog.services import set_available_seats
+from apps.providers.models import Provider
+from apps.tenancy.models import Tenant
+from .models import TripInventory, TripStatus, VehicleLatestPosition, VehicleLocation, VehicleTrajectoryMinute
+
+
+class RowError(Exception):
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+# ---------------------------
+# Row parsing
+# ---------------------------
+
+# Column bounds: occupancy counts are PositiveIntegerField (int4), and a
+# value COPY cannot store would fail the whole batch rather than its row.
+MAX_OCCUPANCY_COUNT = 2**31 - 1
+MAX_SPEED_KMH = 1000.0
+
+def _float(row: Dict, field: str, required: bool = True, low=None, high=None) -> Optional[float]:
+    value = row.get(field)
+    if value is None or value == "":
+        if required:
+            raise RowError("MISSING_FIELD", f"{field} is required.")
+        return None
+    if isinstance(value, bool):
+        raise RowError("INVALID_FIELD", f"{field} must be a number.")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise RowError("INVALID_FIELD", f"{field} must be a number.")
+    if not math.isfinite(value) or (low is not None and value < low) or (high is not None and value > high):
+        raise RowError("INVALID_FIELD", f"{field} is out of range.")
+    return value
+
+
+def _count(occupancy: Dict, field: str) -> int:
+    value = occupancy.get(field, 0)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise RowError("INVALID_FIELD", f"occupancy.{field} must be an integer.")
+    try:
+        value = int(value)
+    except ValueError:
+        raise RowError("INVALID_FIELD", f"occupancy.{field} must be an integer.")
+    if value < 0 or value > MAX_OCCUPANCY_COUNT:
+        raise RowError("INVALID_FIELD", f"occupancy.{field} is out of range.")
+    return value
+
+
+def retention_cutoff(retention_days: int = None) -> datetime:
+    """
+    Pings recorded before this are past retention: their partitions are
+    dropped by manage_vehicle_location_partitions.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, "VEHICLE_LOCATION_RETENTION_DAYS", 7)
+    today = datetime.now(dt_timezone.utc).date()
+    return datetime.combine(today - timedelta(days=retention_days), time.min, tzinfo=dt_timezone.utc)
+
+
+def parse_vehicle_location(row, oldest: datetime = None) -> Dict:
+    """
+    Validate one ping, cheaply enough to run per row of a large batch.
+    Everything that could make the batch write fail is rejected here, so a
+    bad row is reported on its own. Pings recorded before `oldest` are
+    rejected too. Raises RowError.
+    """
+    if not isinstance(row, dict):
+        raise RowError("INVALID_ROW", "Each vehicle entry must be an object.")
+
+    vehicle_id = row.get("vehicle_id")
+    if not isinstance(vehicle_id, str) or not vehicle_id.strip():
+        raise RowError("MISSING_FIELD", "vehicle_id is required.")
+    vehicle_id = vehicle_id.strip()
+    if len(vehicle_id) > 64:
+        raise RowError("INVALID_FIELD", "vehicle_id is longer than 64 characters.")
+
+    trip_id = row.get("trip_id")
+    if trip_id:
+        try:
+            trip_id = trip_id if isinstance(trip_id, uuid.UUID) else uuid.UUID(str(trip_id))
+        except ValueError:
+            raise RowError("INVALID_FIELD", "trip_id must be a UUID.")
+    else:
+        trip_id = None
+
+    timestamp = row.get("timestamp")
+    try:
+        recorded_at = parse_datetime(timestamp) if isinstance(timestamp, str) else None
+    except ValueError:
+        recorded_at = None
+    if recorded_at is None:
+        raise RowError("INVALID_FIELD", "timestamp must be an ISO 8601 datetime.")
+    if timezone.is_naive(recorded_at):
+        recorded_at = timezone.make_aware(recorded_at)
+    if oldest is not None and recorded_at < oldest:
+        raise RowError("TOO_OLD", "timestamp is older than the location retention window.")
+
+    occupancy = row.get("occupancy") or {}
+    if not isinstance(occupancy, dict):
+        raise RowError("INVALID_FIELD", "occupancy must be an object.")
+
+    status = row.get("status") or "IN_SERVICE"
+    if not isinstance(status, str) or len(status) > 32:
+        raise RowError("INVALID_FIELD", "status must be a string of at most 32 characters.")
+
+    return {
+        "vehicle_id": vehicle_id,
+        "trip_id": trip_id,
+        "lat": _float(row, "lat", low=-90, high=90),
+        "lng": _float(row, "lng", low=-180, high=180),
+        "speed_kmh": _float(row, "speed_kmh", required=False, low=0, high=MAX_SPEED_KMH),
+        "heading_deg": _float(row, "heading_deg", required=False, low=0, high=360),
+        "occupancy_capacity": _count(occupancy, "capacity"),
+        "occupancy_taken": _count(occupancy, "seats_taken"),
+        "status": status,
+        "recorded_at": recorded_at,
+    }
+
+
+# ---------------------------
+# Bulk ingest
+# ---------------------------
+
+def _copy_rows(rows: List[Dict], tenant_id, provider_id) -> None:
+    """
+    Stream rows into vehicle_location with PostgreSQL COPY (csv format).
+    """
+    now = timezone.now()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for r in rows:
+        writer.writerow(
+            (
+                uuid.uuid4(),
+                tenant_id,
+                provider_id,
+                r["trip_id"],
+                r["vehicle_id"],
+                r["lat"],
+                r["lng"],
+                r["speed_kmh"],
+                r["heading_deg"],
+                r["occupancy_capacity"],
+                r["occupancy_taken"],
+                r["status"],
+                r["recorded_at"].isoformat(),
+                now.isoformat(),
+            )
+        )
+    buffer.seek(0)
+
+    sql = (
+        f"COPY {VehicleLocation._meta.db_table} "
+        "(id, tenant_id, provider_id, trip_id, vehicle_id, lat, lng, speed_kmh, heading_deg, "
+        "occupancy_capacity, occupancy_taken, status, recorded_at, created_at) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def _bulk_create_rows(rows: List[Dict], tenant_id, provider_id) -> None:
+    VehicleLocation.objects.bulk_create(
+        [VehicleLocation(tenant_id=tenant_id, provider_id=provider_id, **r) for r in rows],
+        batch_size=getattr(settings, "VEHICLE_INGEST_BATCH_SIZE", 2000),
+    )
+
+
+_LATEST_FIELDS = (
+    "trip_id",
+    "lat",
+    "lng",
+    "speed_kmh",
+    "heading_deg",
+    "occupancy_capacity",
+    "occupancy_taken",
+    "status",
+    "recorded_at",
+)
+
+
+def _upsert_latest_sql(rows: List[Dict], tenant_id, provider_id) -> None:
+    """
+    One INSERT .. ON CONFLICT for the batch; the WHERE clause keeps a stored
+    position that is newer than the incoming ping (late / replayed data).
+    Rows go in vehicle_id order, so concurrent batches lock the positions
+    they share in the same order and cannot deadlock.
+    """
+    from psycopg2.extras import execute_values
+
+    table = VehicleLatestPosition._meta.db_table
+    columns = ("id", "tenant_id", "provider_id", "vehicle_id") + _LATEST_FIELDS + ("updated_at",)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in _LATEST_FIELDS + ("updated_at",))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s "
+        f"ON CONFLICT (tenant_id, provider_id, vehicle_id) DO UPDATE SET {updates} "
+        f"WHERE {table}.recorded_at < EXCLUDED.recorded_at"
+    )
+    now = timezone.now()
+    values = [
+        (uuid.uuid4(), tenant_id, provider_id, r["vehicle_id"])
+        + tuple(r[f] for f in _LATEST_FIELDS)
+        + (now,)
+        for r in sorted(rows, key=lambda r: r["vehicle_id"])
+    ]
+    with connection.cursor() as cursor:
+        execute_values(cursor.cursor, sql, values, page_size=1000)
+
+
+def _upsert_latest_orm(rows: List[Dict], tenant_id, provider_id) -> None:
+    stored = dict(
+        VehicleLatestPosition.objects.filter(
+            tenant_id=tenant_id,
+            provider_id=provider_id,
+            vehicle_id__in=[r["vehicle_id"] for r in rows],
+        ).values_list("vehicle_id", "recorded_at")
+    )
+    fresh = [r for r in rows if r["vehicle_id"] not in stored or stored[r["vehicle_id"]] < r["recorded_at"]]
+    if not fresh:
+        return
+    VehicleLatestPosition.objects.bulk_create(
+        [
+            VehicleLatestPosition(
+                tenant_id=tenant_id,
+                provider_id=provider_id,
+                vehicle_id=r["vehicle_id"],
+                **{f: r[f] for f in _LATEST_FIELDS},
+            )
+            for r in fresh
+        ],
+        batch_size=getattr(settings, "VEHICLE_INGEST_BATCH_SIZE", 2000),
+        update_conflicts=True,
+        unique_fields=["tenant", "provider", "vehicle_id"],
+        update_fields=list(_LATEST_FIELDS) + ["updated_at"],
+    )
+
+
+def update_latest_positions(rows: List[Dict], tenant_id, provider_id) -> int:
+    """
+    Fold parsed pings into VehicleLatestPosition. Only the newest ping per
+    vehicle in the batch is written, and never over a newer stored one.
+    Returns the number of vehicles in the batch.
+    """
+    latest: Dict[str, Dict] = {}
+    for r in rows:
+        seen = latest.get(r["vehicle_id"])
+        if seen is None or seen["recorded_at"] < r["recorded_at"]:
+            latest[r["vehicle_id"]] = r
+    if not latest:
+        return 0
+
+    rows = list(latest.values())
+    if connection.vendor == "postgresql":
+        _upsert_latest_sql(rows, tenant_id, provider_id)
+    else:
+        _upsert_latest_orm(rows, tenant_id, provider_id)
+    return len(rows)
+
+
+def ingest_vehicle_locations(
+    tenant: Tenant,
+    provider: Provider,
+    payload: List,
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Validate and store a batch of vehicle pings.
+
+    Bad rows, including pings older than the retention window, are reported (by index) instead of failing the batch. Trip ids
+    are checked in one query; unknown trips are stored as NULL, as before.
+    Rows are written with COPY on PostgreSQL and bulk_create elsewhere, and
+    the last known position per vehicle is refreshed.
+
+    Returns (stored rows, errors).
+    """
+    rows: List[Dict] = []
+    errors: List[Dict] = []
+    # Nothing would keep a ping older than retention: it lands in the
+    # default partition, whose range is never dropped.
+    oldest = retention_cutoff()
+    for index, raw in enumerate(payload):
+        try:
+            rows.append(parse_vehicle_location(raw, oldest))
+        except RowError as exc:
+            errors.append(
+                {
+                    "index": index,
+                    "vehicle_id": raw.get("vehicle_id") if isinstance(raw, dict) else None,
+                    "error": exc.code,
+                    "message": exc.message,
+                }
+            )
+
+    trip_ids = {r["trip_id"] for r in rows if r["trip_id"] is not None}
+    if trip_ids:
+        known = set(
+            Trip.objects.filter(id__in=trip_ids, tenant=tenant, provider=provider).values_list("id", flat=True)
+        )
+        for r in rows:
+            if r["trip_id"] is not None and r["trip_id"] not in known:
+                r["trip_id"] = None
+
+    if rows:
+        if connection.vendor == "postgresql" and getattr(settings, "VEHICLE_INGEST_USE_COPY", True):
+            _copy_rows(rows, tenant.id, provider.id)
+        else:
+            _bulk_create_rows(rows, tenant.id, provider.id)
+        update_latest_positions(rows, tenant.id, provider.id)
+
+    return rows, errors
+
+
+# ---------------------------
+# Trajectory downsampling
+# ---------------------------
+
+@transaction.atomic
+def summarize_vehicle_minutes(start, end) -> int:
+    """
+    (Re)build VehicleTrajectoryMinute rows for pings recorded in
+    [start, end). Existing summaries in the window are replaced, so running
+    a window again folds in late pings. Returns the vehicle-minutes written.
+    """
+    rows = (
+        VehicleLocation.objects.filter(recorded_at__gte=start, recorded_at__lt=end)
+        .annotate(minute=TruncMinute("recorded_at"))
+        .values("tenant_id", "provider_id", "trip_id", "vehicle_id", "minute")
+        .annotate(
+            lat=Avg("lat"),
+            lng=Avg("lng"),
+            speed_avg_kmh=Avg("speed_kmh"),
+            speed_max_kmh=Max("speed_kmh"),
+            occupancy_taken_max=Max("occupancy_taken"),
+            samples=Count("id"),
+            first_recorded_at=Min("recorded_at"),
+            last_recorded_at=Max("recorded_at"),
+        )
+        .order_by()
+    )
+
+    VehicleTrajectoryMinute.objects.filter(minute__gte=start, minute__lt=end).delete()
+    created = VehicleTrajectoryMinute.objects.bulk_create(
+        (VehicleTrajectoryMinute(**row) for row in rows.iterator(chunk_size=5000)),
+        batch_size=2000,
+    )
+    return len(created)
+
+
+# ---------------------------
+# Trip status
+# ---------------------------
+
+def apply_trip_status_updates(tenant: Tenant, provider: Provider, updates: List[Dict]) -> Tuple[int, List[Dict]]:
+    """
+    Upsert validated TripStatusInputSerializer rows in one statement.
+
+    Trip ids are checked with a single query; unknown ones are reported as
+    TRIP_NOT_FOUND. When a trip appears twice in the batch the last update
+    wins. Returns (applied, errors) like the per-row implementation did.
+    """
+    trip_ids = {u["trip_id"] for u in updates}
+    known = set(
+        Trip.objects.filter(id__in=trip_ids, tenant=tenant, provider=provider).values_list("id", flat=True)
+    )
+
+    applied = 0
+    errors: List[Dict] = []
+    latest: Dict = {}
+    for u in updates:
+        if u["trip_id"] not in known:
+            errors.append({"trip_id": str(u["trip_id"]), "error": "TRIP_NOT_FOUND"})
+            continue
+        latest[u["trip_id"]] = u
+        applied += 1
+
+    if latest:
+        TripStatus.objects.bulk_create(
+            [
+                TripStatus(
+                    tenant=tenant,
+                    provider=provider,
+                    trip_id=trip_id,
+                    status=u["status"],
+                    delay_minutes=u.get("delay_minutes", 0),
+                    reason_code=u.get("reason_code", ""),
+                )
+                for trip_id, u in latest.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["tenant", "provider", "trip"],
+            update_fields=["status", "delay_minutes", "reason_code", "updated_at"],
+        )
+
+    return applied, errors
+
+
+# ---------------------------
+# Inventory
+# ---------------------------
+
+def sync_trip_inventory(tenant: Tenant, provider: Provider, rows: List[Dict]) -> Dict:
+    """
+    Apply a (usually full) inventory snapshot of validated
+    TripInventoryInputSerializer rows.
+
+    Current (trip, service_date) rows are read in one query and only rows
+    whose seat counts differ are written, with one bulk upsert. Changed
+    counts, less the seats our own bookings hold, are copied to
+    Trip.available_seats.
+    Returns counts (applied, created, updated, unchanged) and errors.
+    """
+    trip_ids = {r["trip_id"] for r in rows}
+    known = dict(
+        Trip.objects.filter(id__in=trip_ids, tenant=tenant, provider=provider).values_list("id", "service_date")
+    )
+
+    applied = 0
+    errors: List[Dict] = []
+    incoming: Dict[Tuple, Dict] = {}
+    for r in rows:
+        if r["trip_id"] not in known:
+            errors.append({"trip_id": str(r["trip_id"]), "error": "TRIP_NOT_FOUND"})
+            continue
+        incoming[(r["trip_id"], r["service_date"])] = r
+        applied += 1
+
+    current = {
+        (trip_id, service_date): (seats_total, seats_available)
+        for trip_id, service_date, seats_total, seats_available in TripInventory.objects.filter(
+            tenant=tenant,
+            provider=provider,
+            trip_id__in={key[0] for key in incoming},
+        ).values_list("trip_id", "service_date", "seats_total", "seats_available")
+    }
+
+    created = updated = unchanged = 0
+    changed: List[TripInventory] = []
+    seats_by_trip: Dict = {}
+    for (trip_id, service_date), r in incoming.items():
+        seats = (r["seats_total"], r["seats_available"])
+        stored = current.get((trip_id, service_date))
+        if stored == seats:
+            unchanged += 1
+            continue
+        if stored is None:
+            created += 1
+        else:
+            updated += 1
+        # The provider's count for the trip's own service date is authoritative.
+        if known[trip_id] == service_date:
+            seats_by_trip[trip_id] = seats[1]
+        changed.append(
+            TripInventory(
+                tenant=tenant,
+                provider=provider,
+                trip_id=trip_id,
+                service_date=service_date,
+                seats_total=seats[0],
+                seats_available=seats[1],
+            )
+        )
+
+    if changed:
+        TripInventory.objects.bulk_create(
+            changed,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["tenant", "provider", "trip", "service_date"],
+            update_fields=["seats_total", "seats_available", "updated_at"],
+        )
+        set_available_seats(seats_by_trip)
+
+    return {
+        "applied": applied,
+        "created": created,
+        "updated": updated,
+        "unchanged": unchanged,
+        "errors": errors,
+    }
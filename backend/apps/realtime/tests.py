@@ -0,0 +1,52 @@
+import unittest
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from apps.providers.models import Provider
+from apps.tenancy.models import Tenant
+
+from .models import VehicleLocation
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Partitioning requires PostgreSQL.")
+class PartitionInitTests(TransactionTestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Acme", slug="acme", primary_domain="acme.example.com")
+        self.provider = Provider.objects.create(tenant=self.tenant, name="Acme buses")
+
+    def ping(self, recorded_at) -> VehicleLocation:
+        return VehicleLocation.objects.create(
+            tenant=self.tenant,
+            provider=self.provider,
+            vehicle_id="bus-1",
+            lat=6.5,
+            lng=3.4,
+            recorded_at=recorded_at,
+        )
+
+    def is_partitioned(self) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+                [VehicleLocation._meta.db_table],
+            )
+            return cursor.fetchone() is not None
+
+    def test_init_keeps_existing_rows(self):
+        now = timezone.now()
+        kept = [self.ping(now - timedelta(days=2)), self.ping(now - timedelta(hours=1))]
+
+        call_command("manage_vehicle_location_partitions", "--init", "--retention-days", "30")
+
+        self.assertTrue(self.is_partitioned())
+        self.assertEqual(
+            set(VehicleLocation.objects.values_list("id", flat=True)),
+            {ping.id for ping in kept},
+        )
+        # New pings route to the dated partitions.
+        self.ping(now)
+        self.assertEqual(VehicleLocation.objects.count(), 3)
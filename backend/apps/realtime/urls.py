@@ -2,6 +2,7 @@ from django.urls import path
 
 from .views import (
     ProviderVehicleLocationsView,
+    ProviderVehicleFleetView,
     ProviderTripStatusView,
     ProviderTripInventoryView,
     ProviderServiceAlertsView,
@@ -13,6 +14,11 @@ urlpatterns = [
         ProviderVehicleLocationsView.as_view(),
         name="provider-vehicles-locations",
     ),
+    path(
+        "vehicles/latest",
+        ProviderVehicleFleetView.as_view(),
+        name="provider-vehicles-latest",
+    ),
     path(
         "trips/status",
         ProviderTripStatusView.as_view(),
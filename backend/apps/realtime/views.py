@@ -1,25 +1,30 @@
+import uuid
+
 from django.db import transaction
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from apps.providers.permissions import IsProviderUserOrTenantAdmin
-from apps.catalog.models import Trip, Route
-from .models import VehicleLocation, TripStatus, TripInventory, ServiceAlert
+from apps.catalog.models import Route
+from .models import ServiceAlert, VehicleLatestPosition
 from .serializers import (
-    VehicleLocationInputSerializer,
     TripStatusInputSerializer,
     TripInventoryInputSerializer,
     ServiceAlertInputSerializer,
+    VehicleLatestPositionSerializer,
 )
+from .services import apply_trip_status_updates, ingest_vehicle_locations, sync_trip_inventory
 
 
 class ProviderVehicleLocationsView(generics.GenericAPIView):
     """
     POST /api/v1/provider/vehicles/locations
+
+    Rows are validated by services.parse_vehicle_location, not a serializer.
     """
     permission_classes = [IsAuthenticated, IsProviderUserOrTenantAdmin]
-    serializer_class = VehicleLocationInputSerializer
 
     @transaction.atomic
     def post(self, request, *args, **kwargs):
@@ -27,39 +32,44 @@ class ProviderVehicleLocationsView(generics.GenericAPIView):
         provider = request.provider
         vehicles = request.data.get("vehicles", [])
 
-        serializer = self.get_serializer(data=vehicles, many=True)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
+        if not isinstance(vehicles, list):
+            return Response(
+                {"error": {"code": "INVALID_PAYLOAD", "message": "vehicles must be a list."}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        created = 0
+        # Rows are validated individually; bad ones are reported, not fatal.
+        stored, errors = ingest_vehicle_locations(tenant, provider, vehicles)
 
-        for v in data:
-            trip = None
-            trip_id = v.get("trip_id")
-            if trip_id:
-                try:
-                    trip = Trip.objects.get(id=trip_id, tenant=tenant, provider=provider)
-                except Trip.DoesNotExist:
-                    trip = None
+        return Response(
+            {"accepted": len(stored), "failed": len(errors), "errors": errors},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-            occupancy = v.get("occupancy") or {}
-            VehicleLocation.objects.create(
-                tenant=tenant,
-                provider=provider,
-                trip=trip,
-                vehicle_id=v["vehicle_id"],
-                lat=v["lat"],
-                lng=v["lng"],
-                speed_kmh=v.get("speed_kmh"),
-                heading_deg=v.get("heading_deg"),
-                occupancy_capacity=occupancy.get("capacity", 0),
-                occupancy_taken=occupancy.get("seats_taken", 0),
-                status=v.get("status", "IN_SERVICE"),
-                recorded_at=v["timestamp"],
-            )
-            created += 1
 
-        return Response({"accepted": created, "failed": 0}, status=status.HTTP_202_ACCEPTED)
+class ProviderVehicleFleetView(generics.ListAPIView):
+    """
+    GET /api/v1/provider/vehicles/latest?trip_id=...
+
+    Last known position of each of the provider's vehicles (optionally only
+    those on one trip). Served from vehicle_latest_position, one row per vehicle.
+    """
+    permission_classes = [IsAuthenticated, IsProviderUserOrTenantAdmin]
+    serializer_class = VehicleLatestPositionSerializer
+
+    def get_queryset(self):
+        qs = VehicleLatestPosition.objects.filter(
+            tenant=self.request.tenant,
+            provider=self.request.provider,
+        )
+        trip_id = self.request.query_params.get("trip_id")
+        if trip_id:
+            try:
+                trip_id = uuid.UUID(trip_id)
+            except ValueError:
+                raise ValidationError({"trip_id": "Must be a valid UUID."})
+            qs = qs.filter(trip_id=trip_id)
+        return qs.order_by("vehicle_id")
 
 
 class ProviderTripStatusView(generics.GenericAPIView):
@@ -79,27 +89,7 @@ class ProviderTripStatusView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
-        applied = 0
-        errors = []
-
-        for u in data:
-            try:
-                trip = Trip.objects.get(id=u["trip_id"], tenant=tenant, provider=provider)
-            except Trip.DoesNotExist:
-                errors.append({"trip_id": str(u["trip_id"]), "error": "TRIP_NOT_FOUND"})
-                continue
-
-            ts, _ = TripStatus.objects.update_or_create(
-                tenant=tenant,
-                provider=provider,
-                trip=trip,
-                defaults={
-                    "status": u["status"],
-                    "delay_minutes": u.get("delay_minutes", 0),
-                    "reason_code": u.get("reason_code", ""),
-                },
-            )
-            applied += 1
+        applied, errors = apply_trip_status_updates(tenant, provider, data)
 
         return Response({"applied": applied, "errors": errors}, status=status.HTTP_200_OK)
 
@@ -107,6 +97,9 @@ class ProviderTripStatusView(generics.GenericAPIView):
 class ProviderTripInventoryView(generics.GenericAPIView):
     """
     POST /api/v1/provider/trips/inventory
+
+    Accepts full snapshots; unchanged rows are not rewritten. Responds with
+    applied/errors plus created, updated and unchanged counts.
     """
     permission_classes = [IsAuthenticated, IsProviderUserOrTenantAdmin]
     serializer_class = TripInventoryInputSerializer
@@ -121,33 +114,10 @@ class ProviderTripInventoryView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
-        applied = 0
-        errors = []
-
-        for inv in data:
-            try:
-                trip = Trip.objects.get(
-                    id=inv["trip_id"],
-                    tenant=tenant,
-                    provider=provider,
-                )
-            except Trip.DoesNotExist:
-                errors.append({"trip_id": str(inv["trip_id"]), "error": "TRIP_NOT_FOUND"})
-                continue
-
-            TripInventory.objects.update_or_create(
-                tenant=tenant,
-                provider=provider,
-                trip=trip,
-                service_date=inv["service_date"],
-                defaults={
-                    "seats_total": inv["seats_total"],
-                    "seats_available": inv["seats_available"],
-                },
-            )
-            applied += 1
+        # Seat count changes invalidate cached searches via set_available_seats.
+        result = sync_trip_inventory(tenant, provider, data)
 
-        return Response({"applied": applied, "errors": errors}, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_200_OK)
 
 
 class ProviderServiceAlertsView(generics.GenericAPIView):
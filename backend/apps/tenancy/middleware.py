@@ -1,7 +1,8 @@
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
 from django.conf import settings
-from .models import Tenant
+
+from .registry import get_tenant_by_id, get_tenant_by_slug, is_serving
 
 
 class TenantMiddleware(MiddlewareMixin):
@@ -28,19 +29,19 @@ class TenantMiddleware(MiddlewareMixin):
 
         tenant = None
 
+        # Lookups go through the in-process tenant registry; status is checked
+        # here on every request, so suspensions apply as soon as it is invalidated.
         if header_tenant_id:
-            try:
-                tenant = Tenant.objects.get(id=header_tenant_id, status__in=["PENDING", "ACTIVE"])
-            except Tenant.DoesNotExist:
+            tenant = get_tenant_by_id(header_tenant_id)
+            if not is_serving(tenant):
                 return JsonResponse(
                     {"error": {"code": "TENANT_NOT_FOUND", "message": "Invalid X-Tenant-ID"}},
                     status=400,
                 )
 
         elif subdomain and subdomain not in ["www", "api"]:
-            try:
-                tenant = Tenant.objects.get(slug=subdomain, status__in=["PENDING", "ACTIVE"])
-            except Tenant.DoesNotExist:
+            tenant = get_tenant_by_slug(subdomain)
+            if not is_serving(tenant):
                 tenant = None
 
         request.tenant = tenant
@@ -0,0 +1,70 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from apps.core.cache import VersionedLRUCache
+
+from .models import Tenant
+
+# Statuses that may serve tenant-scoped traffic.
+SERVING_STATUSES = ("PENDING", "ACTIVE")
+
+TENANTS_VERSION_NAMESPACE = "tenancy.tenants"
+
+# Misses are cached too (as _MISSING) so a bad header can't hammer the DB.
+_MISSING = object()
+
+_entries = VersionedLRUCache(
+    TENANTS_VERSION_NAMESPACE,
+    max_entries=getattr(settings, "TENANT_REGISTRY_MAX_ENTRIES", 4096),
+    ttl_seconds=getattr(settings, "TENANT_REGISTRY_TTL_SECONDS", 60),
+    check_interval_seconds=getattr(settings, "TENANT_REGISTRY_VERSION_CHECK_SECONDS", 1.0),
+)
+
+
+def _lookup(field: str, value) -> Optional[Tenant]:
+    key = (field, str(value))
+    cached = _entries.get(key)
+    if cached is not None:
+        return None if cached is _MISSING else cached
+
+    try:
+        tenant = Tenant.objects.get(**{field: value})
+    except (Tenant.DoesNotExist, ValidationError, ValueError):
+        _entries.set(key, _MISSING)
+        return None
+
+    _entries.set(("id", str(tenant.id)), tenant)
+    _entries.set(("slug", tenant.slug), tenant)
+    return tenant
+
+
+def get_tenant_by_id(tenant_id) -> Optional[Tenant]:
+    """
+    Tenant for an id (any status), or None. Instances are shared between
+    requests and must be treated as read-only.
+    """
+    return _lookup("id", tenant_id)
+
+
+def get_tenant_by_slug(slug: str) -> Optional[Tenant]:
+    """
+    Tenant for a slug / subdomain (any status), or None.
+    """
+    return _lookup("slug", slug)
+
+
+def is_serving(tenant: Optional[Tenant]) -> bool:
+    return tenant is not None and tenant.status in SERVING_STATUSES
+
+
+def invalidate_tenant(tenant: Tenant, previous_slug: Optional[str] = None) -> None:
+    """
+    Forget a tenant after it was saved. Local entries go immediately; other
+    workers drop theirs on their next version check.
+    """
+    keys = [("id", str(tenant.id)), ("slug", tenant.slug)]
+    if previous_slug:
+        keys.append(("slug", previous_slug))
+    _entries.invalidate(*keys)
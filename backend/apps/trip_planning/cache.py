@@ -0,0 +1,142 @@
+import hashlib
+import json
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.core import metrics
+from apps.core.cache import LRUCache
+from apps.core.versioning import bump_version, get_version
+
+from .journeys import DEFAULT_MAX_TRANSFERS, DEFAULT_MIN_TRANSFER_MINUTES
+from .spatial import STOPS_VERSION_NAMESPACE
+from .timetable import ROUTES_VERSION_NAMESPACE, TRIPS_VERSION_NAMESPACE
+
+INVENTORY_VERSION_NAMESPACE = "catalog.inventory"
+
+CACHE_KEY_PREFIX = "trip_search:v1:"
+RESULT_SET_KEY_PREFIX = "trip_search:results:v1:"
+
+_local = LRUCache(
+    max_entries=getattr(settings, "TRIP_SEARCH_CACHE_MAX_ENTRIES", 2048),
+    ttl_seconds=getattr(settings, "TRIP_SEARCH_CACHE_TTL_SECONDS", 30),
+)
+
+
+# Result sets behind paginated searches, keyed by search_id.
+_result_sets = LRUCache(
+    max_entries=getattr(settings, "TRIP_SEARCH_RESULT_SETS_MAX_ENTRIES", 1024),
+    ttl_seconds=getattr(settings, "TRIP_SEARCH_RESULT_SET_TTL_SECONDS", 600),
+)
+
+
+def _shared_cache():
+    alias = getattr(settings, "TRIP_SEARCH_SHARED_CACHE", "")
+    return caches[alias] if alias else None
+
+
+def _ttl() -> int:
+    return getattr(settings, "TRIP_SEARCH_CACHE_TTL_SECONDS", 30)
+
+
+def search_fingerprint(tenant_id, validated_data: Dict) -> str:
+    """
+    Cache key for a validated TripSearchRequestSerializer payload.
+
+    Inputs are normalized (defaults, ordering, decimal formatting) and combined
+    with the tenant's catalog and inventory versions, so any stop, route,
+    trip or inventory write moves every key for that tenant.
+    """
+    tenant_id = str(tenant_id)
+    filters = validated_data.get("filters") or {}
+    max_price = filters.get("max_price")
+
+    normalized = {
+        "tenant": tenant_id,
+        "versions": [
+            get_version(STOPS_VERSION_NAMESPACE, tenant_id),
+            get_version(ROUTES_VERSION_NAMESPACE, tenant_id),
+            get_version(TRIPS_VERSION_NAMESPACE, tenant_id),
+            get_version(INVENTORY_VERSION_NAMESPACE, tenant_id),
+        ],
+        "origin": [validated_data["origin"]["type"], validated_data["origin"]["value"]],
+        "destination": [validated_data["destination"]["type"], validated_data["destination"]["value"]],
+        "date": validated_data["departure_date"].isoformat(),
+        "time": (validated_data.get("departure_time") or "ANY").upper(),
+        "passengers": validated_data.get("passengers") or 1,
+        "mode": validated_data.get("mode") or "ANY",
+        "filters": {
+            "providers": sorted(filters.get("providers") or []),
+            "max_price": None if max_price is None else f"{max_price:.2f}",
+            "direct_only": bool(filters.get("direct_only")),
+            "max_transfers": filters.get("max_transfers", DEFAULT_MAX_TRANSFERS),
+            "min_transfer_minutes": filters.get("min_transfer_minutes", DEFAULT_MIN_TRANSFER_MINUTES),
+        },
+        "sort": [validated_data.get("sort_by") or "DEPARTURE_TIME", validated_data.get("sort_order") or "ASC"],
+    }
+    raw = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return CACHE_KEY_PREFIX + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached_search(key: str) -> Optional[Dict]:
+    """
+    Look the key up in the local LRU, then the shared tier (if configured).
+    Shared hits are promoted into the local tier.
+    """
+    payload = _local.get(key)
+    if payload is not None:
+        metrics.incr("trip_search.cache.hit_local")
+        return payload
+
+    shared = _shared_cache()
+    if shared is not None:
+        payload = shared.get(key)
+        if payload is not None:
+            _local.set(key, payload)
+            metrics.incr("trip_search.cache.hit_shared")
+            return payload
+
+    metrics.incr("trip_search.cache.miss")
+    return None
+
+
+def store_search(key: str, payload: Dict) -> None:
+    _local.set(key, payload)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(key, payload, timeout=_ttl())
+
+
+def store_result_set(search_id, tenant_id, payload: Dict) -> None:
+    """
+    Keep a rendered result set for cursor pagination. The payload is the same
+    object the search cache holds, so locally this costs one reference.
+    """
+    key = RESULT_SET_KEY_PREFIX + str(search_id)
+    entry = (str(tenant_id), payload)
+    _result_sets.set(key, entry)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(key, entry, timeout=getattr(settings, "TRIP_SEARCH_RESULT_SET_TTL_SECONDS", 600))
+
+
+def get_result_set(search_id, tenant_id) -> Optional[Dict]:
+    key = RESULT_SET_KEY_PREFIX + str(search_id)
+    entry = _result_sets.get(key)
+    if entry is None:
+        shared = _shared_cache()
+        if shared is not None:
+            entry = shared.get(key)
+            if entry is not None:
+                _result_sets.set(key, entry)
+    if entry is None or entry[0] != str(tenant_id):
+        return None
+    return entry[1]
+
+
+def note_inventory_writes(tenant_id) -> None:
+    """
+    Seat counts changed: cached search results for the tenant are stale.
+    """
+    bump_version(INVENTORY_VERSION_NAMESPACE, str(tenant_id))
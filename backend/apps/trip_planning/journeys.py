@@ -0,0 +1,454 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from apps.catalog.models import RouteStop, Trip
+from apps.core.versioning import get_version
+from apps.tenancy.models import Tenant
+
+from .spatial import STOPS_VERSION_NAMESPACE, great_circle_km
+from .timetable import ROUTES_VERSION_NAMESPACE, TRIPS_VERSION_NAMESPACE, trip_writes_between
+
+INF = 1 << 30
+
+DEFAULT_MAX_TRANSFERS = 2
+DEFAULT_MIN_TRANSFER_MINUTES = 5
+
+# Service days kept in memory per tenant (most recently searched first out).
+MAX_DAYS_PER_TENANT = 30
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+class _Pattern:
+    """
+    Trips of one route that never overtake each other, stored column-major:
+    times[pos * n_trips + t] is the minute trip t passes stop stops[pos].
+    Columns are therefore sorted, and "first trip leaving pos at or after m"
+    is one bisect.
+    """
+
+    __slots__ = ("route_id", "stops", "trip_ids", "times", "n_trips")
+
+    def __init__(self, route_id: str, stops: array, trip_ids: List[str], rows: List[List[int]]):
+        self.route_id = route_id
+        self.stops = stops
+        self.trip_ids = trip_ids
+        self.n_trips = len(trip_ids)
+        self.times = array("i", [0]) * (len(stops) * self.n_trips)
+        for t, row in enumerate(rows):
+            for pos, minute in enumerate(row):
+                self.times[pos * self.n_trips + t] = minute
+
+    def time_at(self, trip: int, pos: int) -> int:
+        return self.times[pos * self.n_trips + trip]
+
+    def earliest_trip(self, pos: int, ready: int) -> Optional[int]:
+        lo = pos * self.n_trips
+        idx = bisect_left(self.times, ready, lo, lo + self.n_trips)
+        if idx >= lo + self.n_trips:
+            return None
+        return idx - lo
+
+
+def _is_estimated(pattern: _Pattern, board: int, alight: int) -> bool:
+    """
+    Only the first and last stop of a route carry scheduled times; anything
+    in between is interpolated.
+    """
+    return board != 0 or alight != len(pattern.stops) - 1
+
+
+class DayNetwork:
+    """
+    RAPTOR input for one tenant and service_date.
+
+    Catalog trips only carry endpoint times, so times at intermediate
+    RouteStops are interpolated by great-circle distance along the sequence.
+
+    The patterns are derived from route_shapes and route_trips, which are
+    kept so trip writes can be patched in without reloading the day.
+    """
+
+    def __init__(self, service_date: date, version: Tuple[int, int, int]):
+        self.service_date = service_date
+        self.version = version
+        # route_id -> (stop_ids, fractions of the route's length)
+        self.route_shapes: Dict[str, Tuple[List[str], List[float]]] = {}
+        # route_id -> {trip_id: (departure_minute, arrival_minute)}
+        self.route_trips: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self.stop_ids: List[str] = []
+        self.stop_index: Dict[str, int] = {}
+        self.patterns: List[_Pattern] = []
+        # stop idx -> [(pattern idx, position), ...]
+        self.serving: List[List[Tuple[int, int]]] = []
+
+    def _stop(self, stop_id: str) -> int:
+        idx = self.stop_index.get(stop_id)
+        if idx is None:
+            idx = len(self.stop_ids)
+            self.stop_index[stop_id] = idx
+            self.stop_ids.append(stop_id)
+            self.serving.append([])
+        return idx
+
+    def add_route(
+        self,
+        route_id: str,
+        stop_ids: List[str],
+        fractions: List[float],
+        trips: List[Tuple[str, int, int]],
+    ) -> None:
+        """
+        trips: (trip_id, departure_minute, arrival_minute) at the first and
+        last stop. Split into overtaking-free patterns greedily.
+        """
+        stops = array("i", [self._stop(s) for s in stop_ids])
+        chains: List[List[Tuple[str, List[int]]]] = []
+
+        for trip_id, dep, arr in sorted(trips, key=lambda t: (t[1], t[2])):
+            if arr < dep:
+                arr += 24 * 60  # overnight
+            row = [dep + int(round((arr - dep) * f)) for f in fractions]
+            for chain in chains:
+                last = chain[-1][1]
+                if all(a <= b for a, b in zip(last, row)):
+                    chain.append((trip_id, row))
+                    break
+            else:
+                chains.append([(trip_id, row)])
+
+        for chain in chains:
+            pattern_idx = len(self.patterns)
+            self.patterns.append(
+                _Pattern(route_id, stops, [c[0] for c in chain], [c[1] for c in chain])
+            )
+            for pos, stop in enumerate(stops):
+                self.serving[stop].append((pattern_idx, pos))
+
+    def segment_times(self, origin_id, destination_id) -> Dict[str, Tuple[int, int, bool]]:
+        """
+        trip_id -> (minute at origin, minute at destination, estimated) for
+        every trip passing origin before destination, read from the same
+        interpolated stop times the planner rides.
+        """
+        origin = self.stop_index.get(str(origin_id))
+        target = self.stop_index.get(str(destination_id))
+        if origin is None or target is None or origin == target:
+            return {}
+
+        segments: Dict[str, Tuple[int, int, bool]] = {}
+        for pattern_idx, board in self.serving[origin]:
+            pattern = self.patterns[pattern_idx]
+            alight = next(
+                (pos for pos in range(board + 1, len(pattern.stops)) if pattern.stops[pos] == target),
+                None,
+            )
+            if alight is None:
+                continue
+            estimated = _is_estimated(pattern, board, alight)
+            for trip, trip_id in enumerate(pattern.trip_ids):
+                segments.setdefault(
+                    trip_id,
+                    (pattern.time_at(trip, board), pattern.time_at(trip, alight), estimated),
+                )
+        return segments
+
+    def plan(
+        self,
+        origin_id: str,
+        destination_id: str,
+        depart_after: int,
+        max_transfers: int = DEFAULT_MAX_TRANSFERS,
+        min_transfer_minutes: int = DEFAULT_MIN_TRANSFER_MINUTES,
+    ) -> List[Dict]:
+        """
+        Round-based RAPTOR. Round k rides k vehicles, so the arrival at the
+        destination after each round that improves on all earlier rounds gives
+        the Pareto set over (arrival time, transfers).
+        """
+        origin = self.stop_index.get(str(origin_id))
+        target = self.stop_index.get(str(destination_id))
+        if origin is None or target is None or origin == target:
+            return []
+
+        n = len(self.stop_ids)
+        best = [INF] * n
+        prev = [INF] * n
+        prev[origin] = depart_after
+        best[origin] = depart_after
+        # per round: stop -> (pattern, trip, board_pos, alight_pos)
+        parents: List[Dict[int, Tuple[int, int, int, int]]] = [{}]
+        marked = {origin}
+        journeys: List[Dict] = []
+
+        for k in range(1, max_transfers + 2):
+            queue: Dict[int, int] = {}
+            for stop in marked:
+                for pattern_idx, pos in self.serving[stop]:
+                    if pos < queue.get(pattern_idx, INF):
+                        queue[pattern_idx] = pos
+            if not queue:
+                break
+
+            cur = list(prev)
+            parent: Dict[int, Tuple[int, int, int, int]] = {}
+            marked = set()
+            slack = min_transfer_minutes if k > 1 else 0
+
+            for pattern_idx, start in queue.items():
+                pattern = self.patterns[pattern_idx]
+                trip = None
+                board = -1
+                for pos in range(start, len(pattern.stops)):
+                    stop = pattern.stops[pos]
+                    if trip is not None:
+                        arrival = pattern.time_at(trip, pos)
+                        if arrival < best[stop] and arrival < best[target]:
+                            cur[stop] = arrival
+                            best[stop] = arrival
+                            parent[stop] = (pattern_idx, trip, board, pos)
+                            marked.add(stop)
+                    if prev[stop] < INF:
+                        ready = prev[stop] + slack
+                        if trip is None or ready <= pattern.time_at(trip, pos):
+                            candidate = pattern.earliest_trip(pos, ready)
+                            if candidate is not None and (
+                                trip is None
+                                or pattern.time_at(candidate, pos) < pattern.time_at(trip, pos)
+                            ):
+                                trip = candidate
+                                board = pos
+
+            parents.append(parent)
+            if target in parent:
+                journeys.append(self._reconstruct(parents, k, target))
+            prev = cur
+
+        return journeys
+
+    def _reconstruct(self, parents, k: int, target: int) -> Dict:
+        legs = []
+        stop = target
+        round_no = k
+        while round_no > 0:
+            # A label copied from an earlier round keeps that round's parent.
+            while round_no > 0 and stop not in parents[round_no]:
+                round_no -= 1
+            if round_no == 0:
+                break
+            pattern_idx, trip, board, alight = parents[round_no][stop]
+            pattern = self.patterns[pattern_idx]
+            legs.append(
+                {
+                    "trip_id": pattern.trip_ids[trip],
+                    "route_id": pattern.route_id,
+                    "from_stop_id": self.stop_ids[pattern.stops[board]],
+                    "to_stop_id": self.stop_ids[pattern.stops[alight]],
+                    "departure_minute": pattern.time_at(trip, board),
+                    "arrival_minute": pattern.time_at(trip, alight),
+                    "estimated": _is_estimated(pattern, board, alight),
+                }
+            )
+            stop = pattern.stops[board]
+            round_no -= 1
+        legs.reverse()
+        return {
+            "transfers": len(legs) - 1,
+            "departure_minute": legs[0]["departure_minute"],
+            "arrival_minute": legs[-1]["arrival_minute"],
+            "legs": legs,
+        }
+
+
+# ---------------------------
+# Per-tenant registry
+# ---------------------------
+
+_networks: Dict[str, "OrderedDict[date, DayNetwork]"] = {}
+_registry_lock = threading.Lock()
+
+
+def _current_version(tenant_id: str) -> Tuple[int, int, int]:
+    return (
+        get_version(TRIPS_VERSION_NAMESPACE, tenant_id),
+        get_version(ROUTES_VERSION_NAMESPACE, tenant_id),
+        get_version(STOPS_VERSION_NAMESPACE, tenant_id),
+    )
+
+
+def _trip_rows(tenant_id: str, service_date: date, **filters):
+    return (
+        Trip.objects.filter(
+            tenant_id=tenant_id,
+            service_date=service_date,
+            active=True,
+            route__active=True,
+            **filters,
+        )
+        .values_list(
+            "id",
+            "route_id",
+            "route__origin_id",
+            "route__destination_id",
+            "departure_time",
+            "arrival_time",
+        )
+        .iterator(chunk_size=5000)
+    )
+
+
+def _load_route_shapes(endpoints: Dict[str, Tuple[Optional[str], Optional[str]]]) -> Dict:
+    """
+    route_id -> (stop_ids, fractions) for the given routes: their RouteStops,
+    or origin -> destination when fewer than two are set. Routes with
+    neither are left out.
+    """
+    sequences: Dict[str, List[Tuple[str, float, float]]] = {}
+    route_stops = (
+        RouteStop.objects.filter(route_id__in=list(endpoints))
+        .order_by("route_id", "sequence_index")
+        .values_list("route_id", "stop_id", "stop__lat", "stop__lng")
+    )
+    for route_id, stop_id, lat, lng in route_stops.iterator(chunk_size=5000):
+        sequences.setdefault(str(route_id), []).append((str(stop_id), float(lat), float(lng)))
+
+    shapes = {}
+    for route_id, (origin_id, destination_id) in endpoints.items():
+        seq = sequences.get(route_id)
+        if seq and len(seq) >= 2:
+            stop_ids = [s[0] for s in seq]
+            cumulative = [0.0]
+            for (_, lat1, lng1), (_, lat2, lng2) in zip(seq, seq[1:]):
+                cumulative.append(cumulative[-1] + great_circle_km(lat1, lng1, lat2, lng2))
+            total = cumulative[-1]
+            if total > 0:
+                fractions = [c / total for c in cumulative]
+            else:
+                fractions = [i / (len(seq) - 1) for i in range(len(seq))]
+        elif origin_id and destination_id:
+            stop_ids = [str(origin_id), str(destination_id)]
+            fractions = [0.0, 1.0]
+        else:
+            continue
+        shapes[route_id] = (stop_ids, fractions)
+    return shapes
+
+
+def _assemble(service_date: date, version, route_shapes: Dict, route_trips: Dict) -> DayNetwork:
+    network = DayNetwork(service_date, version)
+    network.route_shapes = route_shapes
+    network.route_trips = route_trips
+    for route_id, trips in route_trips.items():
+        shape = route_shapes.get(route_id)
+        if trips and shape is not None:
+            stop_ids, fractions = shape
+            network.add_route(
+                route_id, stop_ids, fractions, [(trip_id, dep, arr) for trip_id, (dep, arr) in trips.items()]
+            )
+    return network
+
+
+def _build_network(tenant_id: str, service_date: date, version) -> DayNetwork:
+    route_trips: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    endpoints: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    for trip_id, route_id, origin_id, destination_id, dep, arr in _trip_rows(tenant_id, service_date):
+        route_id = str(route_id)
+        route_trips.setdefault(route_id, {})[str(trip_id)] = (_minutes(dep), _minutes(arr))
+        endpoints[route_id] = (origin_id, destination_id)
+
+    if not route_trips:
+        return DayNetwork(service_date, version)
+    return _assemble(service_date, version, _load_route_shapes(endpoints), route_trips)
+
+
+def _patch_network(tenant_id: str, network: DayNetwork, trip_ids: Iterable[str], version) -> DayNetwork:
+    """
+    A copy of `network` with the given trips re-read: only those rows (and
+    the stops of routes new to the day) are loaded, then the patterns are
+    re-derived in memory. The loaded network itself is never mutated, so
+    concurrent searches keep a consistent view.
+    """
+    trip_ids = set(trip_ids)
+    route_trips = dict(network.route_trips)
+    for route_id, trips in network.route_trips.items():
+        if not trip_ids.isdisjoint(trips):
+            route_trips[route_id] = {t: times for t, times in trips.items() if t not in trip_ids}
+
+    new_routes: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    rows = _trip_rows(tenant_id, network.service_date, id__in=list(trip_ids)) if trip_ids else ()
+    for trip_id, route_id, origin_id, destination_id, dep, arr in rows:
+        route_id = str(route_id)
+        trips = route_trips.get(route_id)
+        if trips is None or trips is network.route_trips.get(route_id):
+            trips = route_trips[route_id] = dict(trips or {})
+        trips[str(trip_id)] = (_minutes(dep), _minutes(arr))
+        if route_id not in network.route_shapes:
+            new_routes[route_id] = (origin_id, destination_id)
+
+    route_shapes = network.route_shapes
+    if new_routes:
+        route_shapes = {**route_shapes, **_load_route_shapes(new_routes)}
+    return _assemble(network.service_date, version, route_shapes, route_trips)
+
+
+def _refresh_network(tenant_id: str, service_date: date, network: Optional[DayNetwork], version) -> DayNetwork:
+    """
+    Bring a day up to `version`: when only trips changed and every write
+    since the loaded version is still journaled, patch those trips in;
+    otherwise (routes or stops changed, journal expired) rebuild the day.
+    """
+    if network is not None and network.version[1:] == version[1:]:
+        written = trip_writes_between(tenant_id, network.version[0], version[0])
+        if written is not None:
+            return _patch_network(tenant_id, network, written, version)
+    return _build_network(tenant_id, service_date, version)
+
+
+def get_day_network(tenant: Tenant, service_date: date) -> DayNetwork:
+    tenant_id = str(tenant.id)
+    version = _current_version(tenant_id)
+
+    days = _networks.get(tenant_id)
+    network = days.get(service_date) if days is not None else None
+    if network is not None and network.version == version:
+        return network
+
+    with _registry_lock:
+        days = _networks.setdefault(tenant_id, OrderedDict())
+        network = days.get(service_date)
+        if network is None or network.version != version:
+            network = _refresh_network(tenant_id, service_date, network, version)
+            days[service_date] = network
+        days.move_to_end(service_date)
+        while len(days) > MAX_DAYS_PER_TENANT:
+            days.popitem(last=False)
+    return network
+
+
+def plan_journeys(
+    tenant: Tenant,
+    service_date: date,
+    origin_id,
+    destination_id,
+    depart_after: Optional[time] = None,
+    max_transfers: int = DEFAULT_MAX_TRANSFERS,
+    min_transfer_minutes: int = DEFAULT_MIN_TRANSFER_MINUTES,
+) -> List[Dict]:
+    """
+    Pareto-optimal (arrival, transfers) journeys leaving origin at or after
+    depart_after. Times are minutes after midnight of service_date.
+    """
+    network = get_day_network(tenant, service_date)
+    return network.plan(
+        str(origin_id),
+        str(destination_id),
+        _minutes(depart_after) if depart_after else 0,
+        max_transfers=max_transfers,
+        min_transfer_minutes=min_transfer_minutes,
+    )
@@ -0,0 +1,193 @@
+import json
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable
+
+from rest_framework import serializers
+
+try:  # optional fast encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+from apps.catalog.models import Trip, get_zone
+
+_datetime_field = serializers.DateTimeField()
+_money_field = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+_CONSTRAINTS = {
+    "refundable": True,
+    "changeable": True,
+    "baggage_included": True,
+    "checkin_required": False,
+}
+
+
+def encode_json(data) -> bytes:
+    """
+    Same bytes as rest_framework.renderers.JSONRenderer for plain payloads.
+    """
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    # JSONRenderer escapes the two JS-unsafe line separators.
+    if b"\xe2\x80\xa8" in body or b"\xe2\x80\xa9" in body:
+        body = body.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return body
+
+
+def _iso(value: datetime) -> str:
+    """
+    JSON encoder's datetime form (no timezone conversion), for DictField values.
+    """
+    representation = value.isoformat()
+    if representation.endswith("+00:00"):
+        representation = representation[:-6] + "Z"
+    return representation
+
+
+@lru_cache(maxsize=4096)
+def _stop_repr(code: str, name: str, city_code: str) -> Dict:
+    return {"stop_id": code, "name": name, "city_code": city_code}
+
+
+def stop_repr(stop) -> Dict:
+    city = stop.city
+    return _stop_repr(stop.code, stop.name, city.code if city else "")
+
+
+def provider_repr(provider) -> Dict:
+    return {
+        "id": str(provider.code),
+        "name": provider.name,
+        "logo_url": getattr(provider, "logo_url", "") or "",
+    }
+
+
+class TripTimes:
+    """
+    Per-trip datetime fields computed once, with a cached ZoneInfo.
+    """
+
+    __slots__ = ("departure", "arrival", "duration_minutes")
+
+    def __init__(self, trip: Trip):
+        tz = get_zone(trip.time_zone)
+        self.departure = datetime.combine(trip.service_date, trip.departure_time).replace(tzinfo=tz)
+        self.arrival = datetime.combine(trip.service_date, trip.arrival_time).replace(tzinfo=tz)
+        delta = self.arrival - self.departure
+        self.duration_minutes = max(0, int(delta.total_seconds() // 60))
+
+
+def render_search_row(item) -> Dict:
+    """
+    TripResultSerializer representation of a services.TripSearchResult.
+
+    Built directly in final form (values go through the same DRF field
+    to_representation code), so the serializer pass can be skipped and
+    encode_json() yields the bytes JSONRenderer would.
+    """
+    trip = item.trip
+    route = trip.route
+    origin = stop_repr(item.origin)
+    destination = stop_repr(item.destination)
+
+    return {
+        "trip_id": str(trip.id),
+        "provider": provider_repr(trip.provider),
+        "mode": str(route.mode),
+        "product_type": str(route.product_type),
+        "origin": dict(origin),
+        "destination": dict(destination),
+        "departure_time": _datetime_field.to_representation(item.departure_datetime),
+        "arrival_time": _datetime_field.to_representation(item.arrival_datetime),
+        "duration_minutes": item.duration_minutes,
+        "times_estimated": item.estimated,
+        "available_seats": int(trip.available_seats),
+        "price": {
+            "currency": str(trip.currency),
+            "total": _money_field.to_representation(item.total_price),
+            "per_passenger": _money_field.to_representation(item.per_passenger_price),
+            "fees_included": True,
+        },
+        "constraints": dict(_CONSTRAINTS),
+        "tags": [],
+        "preview": {
+            "vehicle_type": trip.vehicle_type or "",
+            "route_label": f"{origin['name']} → {destination['name']}",
+            "badge": "",
+            "primary_color": "",
+        },
+    }
+
+
+def render_itinerary(itinerary) -> Dict:
+    """
+    ItinerarySerializer representation of a services.ItineraryResult.
+    """
+    legs = [
+        {
+            "trip_id": str(leg.trip.id),
+            "provider": provider_repr(leg.trip.provider),
+            "mode": str(leg.trip.route.mode),
+            "origin": dict(stop_repr(leg.from_stop)),
+            "destination": dict(stop_repr(leg.to_stop)),
+            "departure_time": _datetime_field.to_representation(leg.departure_datetime),
+            "arrival_time": _datetime_field.to_representation(leg.arrival_datetime),
+            "times_estimated": leg.estimated,
+        }
+        for leg in itinerary.legs
+    ]
+    return {
+        "transfers": itinerary.transfers,
+        "departure_time": legs[0]["departure_time"],
+        "arrival_time": legs[-1]["arrival_time"],
+        "duration_minutes": itinerary.duration_minutes,
+        "times_estimated": itinerary.estimated,
+        "price": {
+            "currency": str(itinerary.legs[0].trip.currency),
+            "total": _money_field.to_representation(itinerary.total_price),
+            "per_passenger": _money_field.to_representation(itinerary.per_passenger_price),
+            "fees_included": True,
+        },
+        "legs": legs,
+    }
+
+
+def render_search_rows(items: Iterable) -> list:
+    return [render_search_row(item) for item in items]
+
+
+def render_trip_summary(trip: Trip) -> Dict:
+    """
+    TripSummarySerializer representation of a Trip (route endpoints joined).
+    """
+    route = trip.route
+    times = TripTimes(trip)
+    latest_deadline = _iso(times.departure - timedelta(days=1))
+    base_price = _money_field.to_representation(trip.base_price)
+
+    return {
+        "trip_id": str(trip.id),
+        "provider": provider_repr(trip.provider),
+        "mode": str(route.mode),
+        "product_type": str(route.product_type),
+        "origin": dict(stop_repr(route.origin)),
+        "destination": dict(stop_repr(route.destination)),
+        "departure_time": _datetime_field.to_representation(times.departure),
+        "arrival_time": _datetime_field.to_representation(times.arrival),
+        "duration_minutes": times.duration_minutes,
+        "available_seats": int(trip.available_seats),
+        "currency": str(trip.currency),
+        "total_price": base_price,
+        "per_passenger_price": base_price,
+        "fare_rules": {
+            "refundable": True,
+            "changeable": True,
+            "refund_penalty_percent": 10,
+            "change_penalty_percent": 5,
+            "latest_change_deadline": latest_deadline,
+            "latest_refund_deadline": latest_deadline,
+        },
+    }
@@ -27,6 +27,12 @@ class TripSearchFiltersSerializer(serializers.Serializer):
         max_digits=12, decimal_places=2, required=False, allow_null=True
     )
     direct_only = serializers.BooleanField(required=False, default=False)
+    max_transfers = serializers.IntegerField(
+        required=False, min_value=0, max_value=4, default=2
+    )
+    min_transfer_minutes = serializers.IntegerField(
+        required=False, min_value=0, max_value=180, default=5
+    )
 
 
 class TripSearchRequestSerializer(serializers.Serializer):
@@ -50,6 +56,10 @@ class TripSearchRequestSerializer(serializers.Serializer):
         choices=["ASC", "DESC"],
         default="ASC",
     )
+    page_size = serializers.IntegerField(
+        required=False, min_value=1, max_value=200
+    )
+    stream = serializers.BooleanField(required=False, default=False)
 
     def validate_departure_date(self, value):
         # Enforce today/future (you can relax this for history if needed)
@@ -58,6 +68,13 @@ class TripSearchRequestSerializer(serializers.Serializer):
         return value
 
 
+class TripSearchPageQuerySerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    page_size = serializers.IntegerField(
+        required=False, min_value=1, max_value=200, default=50
+    )
+
+
 class TripPriceSerializer(serializers.Serializer):
     currency = serializers.CharField()
     total = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -87,6 +104,8 @@ class TripResultSerializer(serializers.Serializer):
     departure_time = serializers.DateTimeField()
     arrival_time = serializers.DateTimeField()
     duration_minutes = serializers.IntegerField()
+    # Boarding/alighting at an intermediate stop: times are interpolated.
+    times_estimated = serializers.BooleanField(default=False)
     available_seats = serializers.IntegerField()
     price = TripPriceSerializer()
     constraints = serializers.DictField(child=serializers.BooleanField(), default=dict)
@@ -96,10 +115,32 @@ class TripResultSerializer(serializers.Serializer):
     preview = serializers.DictField(child=serializers.CharField(), default=dict)
 
 
+class ItineraryLegSerializer(serializers.Serializer):
+    trip_id = serializers.CharField()
+    provider = TripProviderSerializer()
+    mode = serializers.CharField()
+    origin = TripStopSerializer()
+    destination = TripStopSerializer()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    times_estimated = serializers.BooleanField(default=False)
+
+
+class ItinerarySerializer(serializers.Serializer):
+    transfers = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration_minutes = serializers.IntegerField()
+    times_estimated = serializers.BooleanField(default=False)
+    price = TripPriceSerializer()
+    legs = ItineraryLegSerializer(many=True)
+
+
 class TripSearchResponseSerializer(serializers.Serializer):
     search_id = serializers.UUIDField()
     currency = serializers.CharField()
     results = TripResultSerializer(many=True)
+    itineraries = ItinerarySerializer(many=True, required=False)
 
 
 class TripSummarySerializer(serializers.Serializer):
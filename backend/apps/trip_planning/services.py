@@ -1,22 +1,75 @@
+import itertools
 import uuid
-from datetime import time
+from datetime import datetime, time, timedelta
 from typing import Dict, List, Tuple
 
-from django.db.models import F, ExpressionWrapper, DurationField
-from django.utils import timezone
-
-from apps.catalog.models import Trip, Stop
+from apps.catalog.models import Trip, Stop, get_zone
+from apps.catalog.services import has_seats
 from apps.tenancy.models import Tenant
 
+from .journeys import DEFAULT_MAX_TRANSFERS, DEFAULT_MIN_TRANSFER_MINUTES, get_day_network, plan_journeys
+from .spatial import nearest_stops
+
+# Trips hydrated per query when streaming search results.
+STREAM_CHUNK_SIZE = 500
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _stop_datetime(trip: Trip, minute: int) -> datetime:
+    """
+    Minutes after midnight of the trip's service_date (may pass 24h for
+    overnight trips) as an aware datetime in the trip's zone.
+    """
+    midnight = datetime.combine(trip.service_date, time(0, 0))
+    return (midnight + timedelta(minutes=minute)).replace(tzinfo=get_zone(trip.time_zone))
+
 
 class TripSearchResult:
     """
     Simple in-memory representation used by the serializers.
     """
 
-    def __init__(self, trip: Trip, passengers: int):
+    def __init__(
+        self,
+        trip: Trip,
+        passengers: int,
+        origin: Stop = None,
+        destination: Stop = None,
+        departure_minute: int = None,
+        arrival_minute: int = None,
+        estimated: bool = False,
+    ):
         self.trip = trip
         self.passengers = passengers
+        # Where the passenger boards / alights; may be intermediate stops.
+        self.origin = origin or trip.route.origin
+        self.destination = destination or trip.route.destination
+        # Minutes after midnight at origin / destination; scheduled
+        # endpoint times when not given.
+        if departure_minute is None:
+            departure_minute = _minutes(trip.departure_time)
+            arrival_minute = _minutes(trip.arrival_time)
+            if arrival_minute < departure_minute:
+                arrival_minute += 24 * 60  # overnight
+        self.departure_minute = departure_minute
+        self.arrival_minute = arrival_minute
+        # True when either time is interpolated at an intermediate stop.
+        self.estimated = estimated
+
+    @property
+    def departure_datetime(self) -> datetime:
+        return _stop_datetime(self.trip, self.departure_minute)
+
+    @property
+    def arrival_datetime(self) -> datetime:
+        return _stop_datetime(self.trip, self.arrival_minute)
+
+    @property
+    def duration_minutes(self) -> int:
+        return max(0, self.arrival_minute - self.departure_minute)
 
     @property
     def total_price(self):
@@ -27,6 +80,64 @@ class TripSearchResult:
         return self.trip.base_price
 
 
+class ItineraryLeg:
+    """
+    One ride of a multi-leg itinerary. Boarding/alighting can be intermediate
+    stops, so times are the planner's (interpolated) stop times; estimated
+    says whether they are.
+    """
+
+    def __init__(
+        self,
+        trip: Trip,
+        from_stop: Stop,
+        to_stop: Stop,
+        departure_minute: int,
+        arrival_minute: int,
+        estimated: bool = False,
+    ):
+        self.trip = trip
+        self.from_stop = from_stop
+        self.to_stop = to_stop
+        self.departure_minute = departure_minute
+        self.arrival_minute = arrival_minute
+        self.estimated = estimated
+
+    @property
+    def departure_datetime(self) -> datetime:
+        return _stop_datetime(self.trip, self.departure_minute)
+
+    @property
+    def arrival_datetime(self) -> datetime:
+        return _stop_datetime(self.trip, self.arrival_minute)
+
+
+class ItineraryResult:
+    def __init__(self, legs: List[ItineraryLeg], passengers: int):
+        self.legs = legs
+        self.passengers = passengers
+
+    @property
+    def transfers(self) -> int:
+        return len(self.legs) - 1
+
+    @property
+    def estimated(self) -> bool:
+        return any(leg.estimated for leg in self.legs)
+
+    @property
+    def duration_minutes(self) -> int:
+        return self.legs[-1].arrival_minute - self.legs[0].departure_minute
+
+    @property
+    def per_passenger_price(self):
+        return sum((leg.trip.base_price for leg in self.legs), 0)
+
+    @property
+    def total_price(self):
+        return self.per_passenger_price * self.passengers
+
+
 def _get_time_range(departure_time_str: str) -> Tuple[time | None, time | None]:
     """
     Map 'departure_time' string to a time-of-day window.
@@ -71,7 +182,7 @@ def _resolve_location(tenant: Tenant, location_data: Dict, is_origin: bool) -> S
     Supports:
     - STOP_ID: Stop.code (your STOP_ID)
     - CITY_CODE: any Stop in that City (using City.code)
-    - COORDINATES: nearest Stop by lat/lng
+    - COORDINATES: nearest active Stop by great-circle distance (spatial index)
     """
     from apps.catalog.models import City  # local import to avoid cycles
 
@@ -112,30 +223,110 @@ def _resolve_location(tenant: Tenant, location_data: Dict, is_origin: bool) -> S
         except Exception:
             raise ValueError("Invalid coordinates format; expected 'lat,lng'.")
 
-        qs = Stop.objects.filter(
+        # Grid index lookup by great-circle distance; only the winner is
+        # fetched from the DB.
+        matches = nearest_stops(tenant, lat, lng, k=1)
+        if not matches:
+            raise ValueError("No suitable stops found near given coordinates.")
+
+        _, stop_id = matches[0]
+        try:
+            return Stop.objects.select_related("city").get(id=stop_id, tenant=tenant)
+        except Stop.DoesNotExist:
+            raise ValueError("No suitable stops found near given coordinates.")
+
+    raise ValueError(f"Unsupported location type: {loc_type}")
+
+
+def _plan_itineraries(
+    tenant: Tenant,
+    departure_date,
+    origin_stop: Stop,
+    destination_stop: Stop,
+    from_time,
+    to_time,
+    passengers: int,
+    mode: str,
+    filters: Dict,
+    direct_trip_ids=frozenset(),
+) -> List[ItineraryResult]:
+    """
+    Run the RAPTOR planner and hydrate its legs, dropping itineraries whose
+    legs no longer satisfy seats / mode / provider / price filters, and
+    single-ride itineraries already listed as direct results.
+    """
+    journeys = plan_journeys(
+        tenant,
+        departure_date,
+        origin_stop.id,
+        destination_stop.id,
+        depart_after=from_time,
+        max_transfers=filters.get("max_transfers", DEFAULT_MAX_TRANSFERS),
+        min_transfer_minutes=filters.get("min_transfer_minutes", DEFAULT_MIN_TRANSFER_MINUTES),
+    )
+    if to_time is not None:
+        latest = to_time.hour * 60 + to_time.minute
+        journeys = [j for j in journeys if j["departure_minute"] <= latest]
+    journeys = [
+        j for j in journeys
+        if not (j["transfers"] == 0 and j["legs"][0]["trip_id"] in direct_trip_ids)
+    ]
+    if not journeys:
+        return []
+
+    trip_ids = {leg["trip_id"] for j in journeys for leg in j["legs"]}
+    stop_ids = {leg[k] for j in journeys for leg in j["legs"] for k in ("from_stop_id", "to_stop_id")}
+
+    trips = {
+        str(t.id): t
+        for t in Trip.objects.select_related("route", "provider").filter(
+            has_seats(passengers),
             tenant=tenant,
+            id__in=trip_ids,
             active=True,
+            route__active=True,
         )
-        nearest = None
-        best_dist = None
-        for stop in qs:
-            dlat = float(stop.lat) - lat
-            dlng = float(stop.lng) - lng
-            dist2 = dlat * dlat + dlng * dlng
-            if best_dist is None or dist2 < best_dist:
-                best_dist = dist2
-                nearest = stop
-
-        if nearest is None:
-            raise ValueError("No suitable stops found near given coordinates.")
-        return nearest
+    }
+    stops = {
+        str(s.id): s
+        for s in Stop.objects.select_related("city").filter(tenant=tenant, id__in=stop_ids)
+    }
 
-    raise ValueError(f"Unsupported location type: {loc_type}")
+    providers_filter = filters.get("providers") or []
+    max_price = filters.get("max_price")
+
+    itineraries = []
+    for journey in journeys:
+        legs = []
+        for leg in journey["legs"]:
+            trip = trips.get(leg["trip_id"])
+            if trip is None:
+                break
+            if mode != "ANY" and trip.route.mode != mode:
+                break
+            if providers_filter and trip.provider.code not in providers_filter:
+                break
+            legs.append(
+                ItineraryLeg(
+                    trip=trip,
+                    from_stop=stops[leg["from_stop_id"]],
+                    to_stop=stops[leg["to_stop_id"]],
+                    departure_minute=leg["departure_minute"],
+                    arrival_minute=leg["arrival_minute"],
+                    estimated=leg["estimated"],
+                )
+            )
+        else:
+            itinerary = ItineraryResult(legs, passengers)
+            if max_price is None or itinerary.per_passenger_price <= max_price:
+                itineraries.append(itinerary)
+    return itineraries
 
 
 def search_trips(
     tenant: Tenant,
     validated_data: Dict,
+    lazy: bool = False,
 ) -> Dict:
     """
     Core search logic used by TripSearchView.
@@ -144,8 +335,15 @@ def search_trips(
     {
       'search_id': UUID,
       'currency': 'NGN',
-      'results': [TripSearchResult(...), ...]
+      'results': [TripSearchResult(...), ...],
+      'itineraries': [ItineraryResult(...), ...]  # empty when direct_only
     }
+
+    Departure / arrival times, the time window and sorting all use the
+    (interpolated) times at the boarding and alighting stops.
+
+    With lazy=True, 'results' is an iterator that hydrates trips in chunks
+    instead of a list (used by streamed responses).
     """
     origin_loc = validated_data["origin"]
     destination_loc = validated_data["destination"]
@@ -162,30 +360,26 @@ def search_trips(
 
     from_time, to_time = _get_time_range(departure_time_str)
 
-    qs = (
-        Trip.objects.select_related(
-            "route",
-            "route__origin",
-            "route__destination",
-            "provider",
-        )
-        .filter(
-            tenant=tenant,
-            active=True,
-            route__active=True,
-            service_date=departure_date,
-            available_seats__gte=passengers,
-            route__origin=origin_stop,
-            route__destination=destination_stop,
-        )
-    )
+    # Per-stop times of every trip passing origin before destination
+    # (intermediate stops included), filtered on the time at the boarding stop.
+    segments = get_day_network(tenant, departure_date).segment_times(origin_stop.id, destination_stop.id)
+    earliest = _minutes(from_time) if from_time is not None else None
+    latest = _minutes(to_time) if to_time is not None else None
+    segments = {
+        trip_id: segment
+        for trip_id, segment in segments.items()
+        if (earliest is None or segment[0] >= earliest) and (latest is None or segment[0] <= latest)
+    }
 
-    # Time-of-day filter (within the service_date)
-    if from_time is not None and to_time is not None:
-        qs = qs.filter(
-            departure_time__gte=from_time,
-            departure_time__lte=to_time,
-        )
+    # Boarding/alighting stops are already resolved, so route endpoints are
+    # not joined.
+    qs = Trip.objects.filter(
+        has_seats(passengers),
+        tenant=tenant,
+        id__in=list(segments),
+        active=True,
+        route__active=True,
+    )
 
     # Filter by mode (based on route.mode)
     if mode != "ANY":
@@ -201,38 +395,75 @@ def search_trips(
     if max_price is not None:
         qs = qs.filter(base_price__lte=max_price)
 
-    # Sorting
-    if sort_by == "PRICE":
-        order_field = "base_price"
-    elif sort_by == "ARRIVAL_TIME":
-        order_field = "arrival_time"
-    elif sort_by == "DURATION":
-        # Postgres: difference between time fields -> interval
-        qs = qs.annotate(
-            duration=ExpressionWrapper(
-                F("arrival_time") - F("departure_time"),
-                output_field=DurationField(),
-            )
+    # Sorting on the boarding / alighting stop times, so it agrees with what
+    # is presented. Only (id, base_price) is read before the order is known.
+    matches = [(str(trip_id), base_price) for trip_id, base_price in qs.values_list("id", "base_price")]
+
+    def sort_key(match):
+        trip_id, base_price = match
+        board, alight, _ = segments[trip_id]
+        if sort_by == "PRICE":
+            primary = base_price
+        elif sort_by == "ARRIVAL_TIME":
+            primary = alight
+        elif sort_by == "DURATION":
+            primary = alight - board
+        else:
+            # DEPARTURE_TIME (default)
+            primary = board
+        return primary, board, trip_id
+
+    matches.sort(key=sort_key, reverse=sort_order == "DESC")
+    ordered_ids = [trip_id for trip_id, _ in matches]
+
+    def hydrate(trip_ids):
+        trips = {
+            str(pk): trip
+            for pk, trip in Trip.objects.select_related("route", "provider").in_bulk(trip_ids).items()
+        }
+        for trip_id in trip_ids:
+            trip = trips.get(trip_id)
+            if trip is None:
+                continue
+            board, alight, estimated = segments[trip_id]
+            yield TripSearchResult(trip, passengers, origin_stop, destination_stop, board, alight, estimated)
+
+    if lazy:
+        rows = (
+            item
+            for offset in range(0, len(ordered_ids), STREAM_CHUNK_SIZE)
+            for item in hydrate(ordered_ids[offset:offset + STREAM_CHUNK_SIZE])
         )
-        order_field = "duration"
+        first = next(rows, None)
+        currency = first.trip.currency if first is not None else "NGN"
+        results = itertools.chain([first], rows) if first is not None else iter(())
     else:
-        # DEPARTURE_TIME (default)
-        order_field = "departure_time"
-
-    if sort_order == "DESC":
-        order_field = f"-{order_field}"
-
-    qs = qs.order_by(order_field)
-
-    results: List[TripSearchResult] = [TripSearchResult(trip, passengers) for trip in qs]
-
-    # Decide currency: from first result or default "NGN"
-    currency = "NGN"
-    if results:
-        currency = results[0].trip.currency
+        results: List[TripSearchResult] = list(hydrate(ordered_ids))
+
+        # Decide currency: from first result or default "NGN"
+        currency = "NGN"
+        if results:
+            currency = results[0].trip.currency
+
+    # Multi-leg journeys (Pareto-optimal over arrival time and transfers)
+    itineraries: List[ItineraryResult] = []
+    if not filters.get("direct_only"):
+        itineraries = _plan_itineraries(
+            tenant,
+            departure_date,
+            origin_stop,
+            destination_stop,
+            from_time,
+            to_time,
+            passengers,
+            mode,
+            filters,
+            direct_trip_ids=frozenset(ordered_ids),
+        )
 
     return {
         "search_id": uuid.uuid4(),
         "currency": currency,
         "results": results,
+        "itineraries": itineraries,
     }
@@ -0,0 +1,232 @@
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from apps.catalog.models import Stop
+from apps.core.versioning import bump_version, get_version
+from apps.tenancy.models import Tenant
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Grid cell size in degrees (~5.5 km of latitude). Small enough that a city
+# terminal lookup touches a handful of cells, large enough that rural stops
+# are still found within a few rings.
+CELL_DEG = 0.05
+
+STOPS_VERSION_NAMESPACE = "catalog.stops"
+
+
+def great_circle_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Haversine distance in km (unrounded, unlike pricing.haversine_distance_km).
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell_of(lat: float, lng: float) -> Tuple[int, int]:
+    return int(math.floor(lat / CELL_DEG)), int(math.floor(lng / CELL_DEG))
+
+
+def _ring_lower_bound_km(lat: float, ring: int) -> float:
+    """
+    Lower bound on the distance from (lat, ·) to any point that lies outside
+    rings 0..`ring` of cells around its own cell.
+
+    Such a point is either more than ring * CELL_DEG away in
+    latitude (bounded by the meridian arc) or in longitude (bounded through the
+    haversine term using the largest latitude still inside the ring).
+    """
+    if ring <= 0:
+        return 0.0
+    span = math.radians(ring * CELL_DEG)
+    lat_bound = EARTH_RADIUS_KM * span
+    max_lat = min(90.0, abs(lat) + (ring + 1) * CELL_DEG)
+    lng_bound = 2 * EARTH_RADIUS_KM * math.asin(
+        min(1.0, math.cos(math.radians(max_lat)) * math.sin(span / 2))
+    )
+    return min(lat_bound, lng_bound)
+
+
+class StopSpatialIndex:
+    """
+    Uniform lat/lng grid over a tenant's active stops.
+
+    Each cell holds {stop_id: (lat, lng)}. Nearest-stop queries scan rings of
+    cells outward from the query point and stop as soon as the k-th best
+    great-circle distance beats the lower bound for the next ring.
+    """
+
+    def __init__(self, version: int):
+        self.version = version
+        self._cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        self._cell_by_stop: Dict[str, Tuple[int, int]] = {}
+        # (min_row, max_row, min_col, max_col) ever occupied; only grows, which
+        # keeps it a safe upper limit for ring expansion.
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cell_by_stop)
+
+    def upsert(self, stop_id, lat: float, lng: float, active: bool = True) -> None:
+        stop_id = str(stop_id)
+        with self._lock:
+            self._remove_locked(stop_id)
+            if not active:
+                return
+            cell = _cell_of(lat, lng)
+            self._cells.setdefault(cell, {})[stop_id] = (lat, lng)
+            self._cell_by_stop[stop_id] = cell
+            if self._bounds is None:
+                self._bounds = (cell[0], cell[0], cell[1], cell[1])
+            else:
+                min_r, max_r, min_c, max_c = self._bounds
+                self._bounds = (
+                    min(min_r, cell[0]),
+                    max(max_r, cell[0]),
+                    min(min_c, cell[1]),
+                    max(max_c, cell[1]),
+                )
+
+    def remove(self, stop_id) -> None:
+        with self._lock:
+            self._remove_locked(str(stop_id))
+
+    def _remove_locked(self, stop_id: str) -> None:
+        cell = self._cell_by_stop.pop(stop_id, None)
+        if cell is None:
+            return
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(stop_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        max_distance_km: Optional[float] = None,
+    ) -> List[Tuple[float, str]]:
+        """
+        Return up to k (distance_km, stop_id) pairs, closest first.
+        """
+        with self._lock:
+            if not self._cells or k <= 0:
+                return []
+
+            min_r, max_r, min_c, max_c = self._bounds
+            crow, ccol = _cell_of(lat, lng)
+            max_ring = max(
+                abs(crow - min_r),
+                abs(crow - max_r),
+                abs(ccol - min_c),
+                abs(ccol - max_c),
+            )
+
+            found: List[Tuple[float, str]] = []
+            ring = 0
+            while ring <= max_ring:
+                for cell in _ring_cells(crow, ccol, ring):
+                    bucket = self._cells.get(cell)
+                    if not bucket:
+                        continue
+                    for stop_id, (slat, slng) in bucket.items():
+                        found.append((great_circle_km(lat, lng, slat, slng), stop_id))
+
+                bound = _ring_lower_bound_km(lat, ring)
+                if max_distance_km is not None and bound > max_distance_km:
+                    break
+                if len(found) >= k:
+                    found.sort()
+                    found = found[:k]
+                    if found[-1][0] <= bound:
+                        break
+                ring += 1
+
+        found.sort()
+        if max_distance_km is not None:
+            found = [f for f in found if f[0] <= max_distance_km]
+        return found[:k]
+
+
+def _ring_cells(crow: int, ccol: int, ring: int) -> Iterable[Tuple[int, int]]:
+    if ring == 0:
+        yield crow, ccol
+        return
+    for dc in range(-ring, ring + 1):
+        yield crow - ring, ccol + dc
+        yield crow + ring, ccol + dc
+    for dr in range(-ring + 1, ring):
+        yield crow + dr, ccol - ring
+        yield crow + dr, ccol + ring
+
+
+# ---------------------------
+# Per-tenant registry
+# ---------------------------
+
+_indexes: Dict[str, StopSpatialIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def _build_index(tenant_id, version: int) -> StopSpatialIndex:
+    index = StopSpatialIndex(version)
+    rows = Stop.objects.filter(tenant_id=tenant_id, active=True).values_list("id", "lat", "lng")
+    for stop_id, lat, lng in rows.iterator(chunk_size=5000):
+        index.upsert(stop_id, float(lat), float(lng))
+    return index
+
+
+def get_stop_index(tenant: Tenant) -> StopSpatialIndex:
+    """
+    Return the tenant's spatial index, rebuilding it if the stops version moved
+    (i.e. another worker wrote stops since this process built its copy).
+    """
+    tenant_id = str(tenant.id)
+    version = get_version(STOPS_VERSION_NAMESPACE, tenant_id)
+    index = _indexes.get(tenant_id)
+    if index is not None and index.version == version:
+        return index
+
+    with _registry_lock:
+        index = _indexes.get(tenant_id)
+        if index is None or index.version != version:
+            index = _build_index(tenant_id, version)
+            _indexes[tenant_id] = index
+    return index
+
+
+def nearest_stops(tenant: Tenant, lat: float, lng: float, k: int = 1) -> List[Tuple[float, str]]:
+    return get_stop_index(tenant).nearest(lat, lng, k=k)
+
+
+def apply_stop_writes(tenant_id, stops: Iterable[Tuple[str, float, float, bool]]) -> None:
+    """
+    Record committed stop writes: bump the stops version and patch this
+    process's index in place when it was current, so only other workers pay
+    for a rebuild.
+
+    `stops` is an iterable of (stop_id, lat, lng, active). Call it from
+    transaction.on_commit so no worker rebuilds from uncommitted rows.
+    """
+    tenant_id = str(tenant_id)
+    new_version = bump_version(STOPS_VERSION_NAMESPACE, tenant_id)
+
+    with _registry_lock:
+        index = _indexes.get(tenant_id)
+        if index is None:
+            return
+        if index.version != new_version - 1:
+            # We missed someone else's write – rebuild lazily on next lookup.
+            _indexes.pop(tenant_id, None)
+            return
+        for stop_id, lat, lng, active in stops:
+            index.upsert(stop_id, float(lat), float(lng), active)
+        index.version = new_version
@@ -0,0 +1,56 @@
+from typing import Iterable, Optional, Set
+
+from django.core.cache import cache
+
+from apps.core.versioning import bump_version
+
+TRIPS_VERSION_NAMESPACE = "catalog.trips"
+ROUTES_VERSION_NAMESPACE = "catalog.routes"
+
+# Trip ids written under each trips version, so loaded day networks
+# (journeys.py) re-read just those trips. Kept in the shared cache, next to
+# the version counters, so every worker sees them; a network that falls
+# further behind than this rebuilds its day instead.
+TRIP_WRITES_TTL_SECONDS = 3600
+MAX_JOURNALED_VERSIONS = 50
+
+
+def _trip_writes_key(tenant_id, version: int) -> str:
+    return f"trip_writes:{tenant_id}:{version}"
+
+
+def note_trip_writes(tenant_id, trip_ids: Iterable) -> None:
+    """
+    Trips were written: loaded day networks patch these trips in on their
+    next use.
+
+    Call it from transaction.on_commit.
+    """
+    version = bump_version(TRIPS_VERSION_NAMESPACE, str(tenant_id))
+    cache.set(
+        _trip_writes_key(tenant_id, version),
+        [str(trip_id) for trip_id in trip_ids],
+        timeout=TRIP_WRITES_TTL_SECONDS,
+    )
+
+
+def trip_writes_between(tenant_id, old_version: int, new_version: int) -> Optional[Set[str]]:
+    """
+    Ids of trips written after old_version up to new_version, or None when
+    that is no longer known (too many versions apart, or an entry expired or
+    is not stored yet).
+    """
+    if not old_version < new_version <= old_version + MAX_JOURNALED_VERSIONS:
+        return None
+    keys = [_trip_writes_key(tenant_id, version) for version in range(old_version + 1, new_version + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return None
+    return set().union(*found.values())
+
+
+def note_route_writes(tenant_id) -> None:
+    """
+    Route endpoints / activity changed: loaded day networks rebuild lazily.
+    """
+    bump_version(ROUTES_VERSION_NAMESPACE, str(tenant_id))
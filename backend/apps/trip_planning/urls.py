@@ -1,8 +1,10 @@
 from django.urls import path
 
-from .views import TripSearchView, TripSummaryView
+from .views import TripSearchPageView, TripSearchView, TripSeatMapView, TripSummaryView
 
 urlpatterns = [
     path("search", TripSearchView.as_view(), name="trip-search"),
+    path("search/<uuid:search_id>", TripSearchPageView.as_view(), name="trip-search-page"),
     path("<str:trip_id>/summary", TripSummaryView.as_view(), name="trip-summary"),
+    path("<str:trip_id>/seats", TripSeatMapView.as_view(), name="trip-seat-map"),
 ]
@@ -1,5 +1,7 @@
-from datetime import timedelta
+import base64
+import uuid
 
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -7,12 +9,27 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.catalog.models import Trip
+from apps.catalog.services import render_seat_map
 from apps.tenancy.models import Tenant
+from apps.tenancy.registry import get_tenant_by_slug
 
 from .serializers import (
+    TripSearchPageQuerySerializer,
     TripSearchRequestSerializer,
-    TripSearchResponseSerializer,
-    TripSummarySerializer,
+)
+from .cache import (
+    get_cached_search,
+    get_result_set,
+    search_fingerprint,
+    store_result_set,
+    store_search,
+)
+from .rendering import (
+    encode_json,
+    render_itinerary,
+    render_search_row,
+    render_search_rows,
+    render_trip_summary,
 )
 from .services import search_trips
 
@@ -29,15 +46,82 @@ def get_tenant_from_request(request) -> Tenant:
     if not tenant_slug:
         raise ValidationError("X-Tenant header is required.")
 
-    try:
-        return Tenant.objects.get(slug=tenant_slug)
-    except Tenant.DoesNotExist:
+    # Usually already resolved by TenantMiddleware; otherwise the registry
+    # answers from memory.
+    tenant = getattr(request, "tenant", None)
+    if tenant is not None and tenant.slug == tenant_slug:
+        return tenant
+
+    tenant = get_tenant_by_slug(tenant_slug)
+    if tenant is None:
         raise ValidationError("Invalid tenant in X-Tenant header.")
+    return tenant
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    from rest_framework.exceptions import ValidationError
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, offset = base64.urlsafe_b64decode(padded).decode("ascii").split(":", 1)
+        if prefix != "o" or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except Exception:
+        raise ValidationError("Invalid cursor.")
+
+
+def _json_response(payload) -> HttpResponse:
+    """
+    Pre-rendered JSON body (same bytes JSONRenderer produces), bypassing the
+    serializer and content negotiation for the hot search paths.
+    """
+    return HttpResponse(encode_json(payload), content_type="application/json", status=status.HTTP_200_OK)
+
+
+def _page(search_id, result_set: dict, offset: int, page_size: int) -> dict:
+    results = result_set["results"]
+    end = offset + page_size
+    return {
+        "search_id": str(search_id),
+        "currency": result_set["currency"],
+        "results": results[offset:end],
+        # Itineraries are few; they ride along with the first page only.
+        "itineraries": result_set.get("itineraries", []) if offset == 0 else [],
+        "next_cursor": _encode_cursor(end) if end < len(results) else None,
+    }
+
+
+def _stream_search(result) -> StreamingHttpResponse:
+    """
+    Write the search response row by row as the queryset is iterated, without
+    building the full result list or running the response serializer on it.
+    """
+    def chunks():
+        yield b'{"search_id":' + encode_json(str(result["search_id"]))
+        yield b',"currency":' + encode_json(result["currency"])
+        yield b',"results":['
+        for index, item in enumerate(result["results"]):
+            yield (b"," if index else b"") + encode_json(render_search_row(item))
+        yield b'],"itineraries":'
+        yield encode_json([render_itinerary(i) for i in result["itineraries"]])
+        yield b"}"
+
+    return StreamingHttpResponse(chunks(), content_type="application/json", status=status.HTTP_200_OK)
 
 
 class TripSearchView(APIView):
     """
     POST /api/v1/trips/search
+
+    Optional body fields:
+    - page_size: return the first page plus next_cursor; further pages are
+      read from the stored result set via GET /api/v1/trips/search/{search_id}.
+    - stream: write rows as they are produced (no caching, no pagination).
     """
 
     permission_classes = [IsAuthenticated]
@@ -47,71 +131,63 @@ class TripSearchView(APIView):
 
         serializer = TripSearchRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        page_size = serializer.validated_data.get("page_size")
+
+        if serializer.validated_data.get("stream"):
+            result = search_trips(tenant=tenant, validated_data=serializer.validated_data, lazy=True)
+            return _stream_search(result)
+
+        search_id = uuid.uuid4()
+        cache_key = search_fingerprint(tenant.id, serializer.validated_data)
+        cached = get_cached_search(cache_key)
+        if cached is None:
+            result = search_trips(tenant=tenant, validated_data=serializer.validated_data)
+            search_id = result["search_id"]
+
+            cached = {
+                "currency": result["currency"],
+                "results": render_search_rows(result["results"]),
+                "itineraries": [render_itinerary(i) for i in result["itineraries"]],
+            }
+            store_search(cache_key, cached)
 
-        result = search_trips(tenant=tenant, validated_data=serializer.validated_data)
+        if page_size is None:
+            return _json_response({"search_id": str(search_id), **cached})
 
-        serialized_results = []
-        for item in result["results"]:
-            trip = item.trip
-            route = trip.route
-            origin = route.origin
-            destination = route.destination
-            provider = trip.provider
+        store_result_set(search_id, tenant.id, cached)
+        return _json_response(_page(search_id, cached, 0, page_size))
 
-            serialized_results.append(
+
+class TripSearchPageView(APIView):
+    """
+    GET /api/v1/trips/search/{search_id}?cursor=...&page_size=...
+
+    Next page of a paginated search, served from the stored result set.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, search_id):
+        tenant = get_tenant_from_request(request)
+
+        result_set = get_result_set(search_id, tenant.id)
+        if result_set is None:
+            return Response(
                 {
-                    "trip_id": str(trip.id),
-                    "provider": {
-                        "id": provider.code,
-                        "name": provider.name,
-                        "logo_url": getattr(provider, "logo_url", "") or "",
-                    },
-                    "mode": route.mode,
-                    "product_type": route.product_type,
-                    "origin": {
-                        "stop_id": origin.code,
-                        "name": origin.name,
-                        "city_code": origin.city.code if origin.city else "",
-                    },
-                    "destination": {
-                        "stop_id": destination.code,
-                        "name": destination.name,
-                        "city_code": destination.city.code if destination.city else "",
-                    },
-                    "departure_time": trip.departure_datetime,
-                    "arrival_time": trip.arrival_datetime,
-                    "duration_minutes": trip.duration_minutes,
-                    "available_seats": trip.available_seats,
-                    "price": {
-                        "currency": trip.currency,
-                        "total": item.total_price,
-                        "per_passenger": item.per_passenger_price,
-                        "fees_included": True,
-                    },
-                    "constraints": {
-                        "refundable": True,
-                        "changeable": True,
-                        "baggage_included": True,
-                        "checkin_required": False,
-                    },
-                    "tags": [],
-                    "preview": {
-                        "vehicle_type": trip.vehicle_type or "",
-                        "route_label": f"{origin.name} → {destination.name}",
-                        "badge": "",
-                        "primary_color": "",
-                    },
-                }
+                    "error": {
+                        "code": "SEARCH_EXPIRED",
+                        "message": "Search results expired; run the search again.",
+                    }
+                },
+                status=status.HTTP_404_NOT_FOUND,
             )
 
-        response_payload = {
-            "search_id": result["search_id"],
-            "currency": result["currency"],
-            "results": serialized_results,
-        }
+        query = TripSearchPageQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        cursor = query.validated_data.get("cursor")
+        offset = _decode_cursor(cursor) if cursor else 0
 
-        response_serializer = TripSearchResponseSerializer(response_payload)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return _json_response(_page(search_id, result_set, offset, query.validated_data["page_size"]))
 
 
 class TripSummaryView(APIView):
@@ -136,48 +212,26 @@ class TripSummaryView(APIView):
             active=True,
         )
 
-        route = trip.route
-        origin = route.origin
-        destination = route.destination
-        provider = trip.provider
-
-        latest_deadline = trip.departure_datetime - timedelta(days=1)
-
-        payload = {
-            "trip_id": str(trip.id),
-            "provider": {
-                "id": provider.code,
-                "name": provider.name,
-                "logo_url": getattr(provider, "logo_url", "") or "",
-            },
-            "mode": route.mode,
-            "product_type": route.product_type,
-            "origin": {
-                "stop_id": origin.code,
-                "name": origin.name,
-                "city_code": origin.city.code if origin.city else "",
-            },
-            "destination": {
-                "stop_id": destination.code,
-                "name": destination.name,
-                "city_code": destination.city.code if destination.city else "",
-            },
-            "departure_time": trip.departure_datetime,
-            "arrival_time": trip.arrival_datetime,
-            "duration_minutes": trip.duration_minutes,
-            "available_seats": trip.available_seats,
-            "currency": trip.currency,
-            "total_price": trip.base_price,
-            "per_passenger_price": trip.base_price,
-            "fare_rules": {
-                "refundable": True,
-                "changeable": True,
-                "refund_penalty_percent": 10,
-                "change_penalty_percent": 5,
-                "latest_change_deadline": latest_deadline,
-                "latest_refund_deadline": latest_deadline,
-            },
-        }
-
-        serializer = TripSummarySerializer(payload)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return _json_response(render_trip_summary(trip))
+
+
+class TripSeatMapView(APIView):
+    """
+    GET /api/v1/trips/{trip_id}/seats
+
+    Live seat map: one read of the trip's TripSeatMap row.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, trip_id: str):
+        tenant = get_tenant_from_request(request)
+
+        trip = get_object_or_404(
+            Trip.objects.only("id", "vehicle_capacity"),
+            tenant=tenant,
+            id=trip_id,
+            active=True,
+        )
+
+        return _json_response(render_seat_map(trip))
@@ -136,6 +136,74 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Default cache. It holds the version counters (apps/core/versioning.py)
+# that tell every process to drop its in-process structures: stop grid and
+# timetable indexes, tenant / provider registries, webhook routing, search
+# cache keys. With more than one process (several gunicorn workers, a
+# separate deliver_webhooks worker) it MUST be a shared backend such as
+# Redis or Memcached, e.g.
+#   DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   DJANGO_CACHE_LOCATION=redis://redis:6379/1
+# The local-memory default only suits a single process (development); other
+# processes then see writes only when their TTLs expire.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
+# Trip search result cache (apps/trip_planning/cache.py).
+# TRIP_SEARCH_SHARED_CACHE is a CACHES alias for the shared tier; empty = local LRU only.
+TRIP_SEARCH_CACHE_TTL_SECONDS = int(os.getenv("TRIP_SEARCH_CACHE_TTL_SECONDS", "30"))
+TRIP_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("TRIP_SEARCH_CACHE_MAX_ENTRIES", "2048"))
+TRIP_SEARCH_SHARED_CACHE = os.getenv("TRIP_SEARCH_SHARED_CACHE", "")
+# How long paginated result sets stay readable by search_id.
+TRIP_SEARCH_RESULT_SET_TTL_SECONDS = int(os.getenv("TRIP_SEARCH_RESULT_SET_TTL_SECONDS", "600"))
+TRIP_SEARCH_RESULT_SETS_MAX_ENTRIES = int(os.getenv("TRIP_SEARCH_RESULT_SETS_MAX_ENTRIES", "1024"))
+
+# In-process tenant registry used by TenantMiddleware (see apps/tenancy/registry.py).
+TENANT_REGISTRY_TTL_SECONDS = int(os.getenv("TENANT_REGISTRY_TTL_SECONDS", "60"))
+TENANT_REGISTRY_MAX_ENTRIES = int(os.getenv("TENANT_REGISTRY_MAX_ENTRIES", "4096"))
+TENANT_REGISTRY_VERSION_CHECK_SECONDS = float(os.getenv("TENANT_REGISTRY_VERSION_CHECK_SECONDS", "1"))
+# Provider lookups in IsProviderUserOrTenantAdmin (see apps/providers/registry.py).
+PROVIDER_CONTEXT_TTL_SECONDS = int(os.getenv("PROVIDER_CONTEXT_TTL_SECONDS", "15"))
+PROVIDER_CONTEXT_MAX_ENTRIES = int(os.getenv("PROVIDER_CONTEXT_MAX_ENTRIES", "8192"))
+PROVIDER_CONTEXT_VERSION_CHECK_SECONDS = float(os.getenv("PROVIDER_CONTEXT_VERSION_CHECK_SECONDS", "1"))
+# Vehicle location ingest: COPY on PostgreSQL, bulk_create batches otherwise.
+VEHICLE_INGEST_USE_COPY = os.getenv("VEHICLE_INGEST_USE_COPY", "true").lower() == "true"
+VEHICLE_INGEST_BATCH_SIZE = int(os.getenv("VEHICLE_INGEST_BATCH_SIZE", "2000"))
+# vehicle_location partitions (manage_vehicle_location_partitions) and
+# per-minute downsampling (downsample_vehicle_locations).
+VEHICLE_LOCATION_PARTITION_PERIOD = os.getenv("VEHICLE_LOCATION_PARTITION_PERIOD", "day")
+VEHICLE_LOCATION_RETENTION_DAYS = int(os.getenv("VEHICLE_LOCATION_RETENTION_DAYS", "7"))
+VEHICLE_TRAJECTORY_LAG_MINUTES = int(os.getenv("VEHICLE_TRAJECTORY_LAG_MINUTES", "10"))
+# Reservation expiry sweeper (expire_reservations).
+BOOKING_EXPIRY_BATCH_SIZE = int(os.getenv("BOOKING_EXPIRY_BATCH_SIZE", "1000"))
+BOOKING_EXPIRY_INTERVAL_SECONDS = float(os.getenv("BOOKING_EXPIRY_INTERVAL_SECONDS", "5"))
+# Webhook outbox worker (deliver_webhooks).
+WEBHOOK_WORKER_THREADS = int(os.getenv("WEBHOOK_WORKER_THREADS", "16"))
+WEBHOOK_ENDPOINT_CONCURRENCY = int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", "4"))
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "5"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_BACKOFF_BASE_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_BASE_SECONDS", "10"))
+WEBHOOK_BACKOFF_MAX_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_MAX_SECONDS", "3600"))
+WEBHOOK_CLAIM_LEASE_SECONDS = int(os.getenv("WEBHOOK_CLAIM_LEASE_SECONDS", "60"))
+# Per-host keep-alive pools and concurrent fan-out (apps/notifications/transport.py).
+WEBHOOK_POOL_MAXSIZE = int(os.getenv("WEBHOOK_POOL_MAXSIZE", "10"))
+WEBHOOK_FANOUT_THREADS = int(os.getenv("WEBHOOK_FANOUT_THREADS", "32"))
+# (tenant, event_type) -> endpoints routing table (apps/notifications/routing.py).
+WEBHOOK_ROUTING_TTL_SECONDS = int(os.getenv("WEBHOOK_ROUTING_TTL_SECONDS", "300"))
+WEBHOOK_ROUTING_MAX_ENTRIES = int(os.getenv("WEBHOOK_ROUTING_MAX_ENTRIES", "4096"))
+WEBHOOK_ROUTING_VERSION_CHECK_SECONDS = float(os.getenv("WEBHOOK_ROUTING_VERSION_CHECK_SECONDS", "1"))
+# Per-endpoint circuit breaker and adaptive concurrency (apps/notifications/breaker.py).
+# WEBHOOK_ENDPOINT_CONCURRENCY above is the ceiling of the adaptive limit.
+WEBHOOK_BREAKER_WINDOW = int(os.getenv("WEBHOOK_BREAKER_WINDOW", "20"))
+WEBHOOK_BREAKER_MIN_REQUESTS = int(os.getenv("WEBHOOK_BREAKER_MIN_REQUESTS", "10"))
+WEBHOOK_BREAKER_FAILURE_RATE = float(os.getenv("WEBHOOK_BREAKER_FAILURE_RATE", "0.5"))
+WEBHOOK_BREAKER_OPEN_SECONDS = float(os.getenv("WEBHOOK_BREAKER_OPEN_SECONDS", "30"))
+WEBHOOK_LATENCY_TARGET_MS = int(os.getenv("WEBHOOK_LATENCY_TARGET_MS", "1000"))
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
 LOGGING = {